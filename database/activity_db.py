@@ -1,17 +1,213 @@
-from database.connection import create_connection
+# database/activity_db.py
+"""
+Audit trail (activity_logs), written off the caller's thread.
 
-def log_activity(user_id, action):
-    conn = create_connection()
-    if conn:
+log_activity() only appends to an in-memory queue, so auditing never adds a
+database round trip to a user action. A background thread writes the queue
+with multi-row INSERTs once FLUSH_SIZE entries are waiting or FLUSH_SECONDS
+after the oldest one arrived, whichever comes first. close_activity_log()
+writes whatever is left when the application exits.
+
+The log is stored by month (database/activity_partitions.py); get_activity()
+only reads the months of the requested range.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from database.activity_partitions import create_month_table, ensure_partitions, month_of, month_table, stored_months
+from database.connection import DB_BACKEND, get_connection
+
+FLUSH_SIZE = int(os.environ.get("TRACKLAB_ACTIVITY_FLUSH_SIZE", "100"))
+FLUSH_SECONDS = float(os.environ.get("TRACKLAB_ACTIVITY_FLUSH_SECONDS", "2"))
+MAX_PENDING = 10000   # Entries kept while the database is unreachable; the oldest are dropped beyond that
+
+ACTION_MAX_LENGTH = 255   # activity_logs.action is VARCHAR(255)
+ACTIVITY_PAGE_SIZE = 500
+
+ACTIVITY_COLUMNS = "log_id, user_id, action, `timestamp`"
+
+CURRENT_USER = object()   # log_activity() default: whoever is signed in (utils.session)
+
+_STOP = object()
+
+def _session_user_id():
+    # Imported here: the database layer is also used by scripts without a GUI session
+    from utils.session import Session
+    user = Session.get_user()
+    return user.get('user_id') if user else None
+
+_month_tables = set()   # SQLite month tables known to exist (writer thread only)
+
+def _insert_rows(cursor, table, rows):
+    values = ", ".join(["(%s, %s, %s)"] * len(rows))
+    cursor.execute(f"INSERT INTO {table} (user_id, action, `timestamp`) VALUES {values}",
+                   tuple(v for entry in rows for v in entry))
+
+def _write_batch(batch):
+    """One multi-row INSERT for the whole batch (per month on SQLite). Returns False if it could not be written."""
+    with get_connection() as conn:
+        if not conn: return False
+        cursor = conn.cursor()
         try:
-            cursor = conn.cursor()
-            query = "INSERT INTO activity_logs (user_id, ACTION) VALUES (%s, %s)"
-            cursor.execute(query, (user_id, action))
+            if DB_BACKEND == "sqlite":
+                by_month = {}
+                for entry in batch:
+                    by_month.setdefault(month_of(entry[2]), []).append(entry)
+                for month, rows in sorted(by_month.items()):
+                    if month not in _month_tables:
+                        create_month_table(cursor, month)
+                        _month_tables.add(month)
+                    _insert_rows(cursor, month_table(month), rows)
+            else:
+                # Partition pruning routes each row to its month
+                _insert_rows(cursor, "activity_logs", batch)
             conn.commit()
-            print(f"✅ Activity logged: {action}")
+            return True
         except Exception as e:
             print(f"❌ Log Activity Error: {e}")
+            conn.rollback()
+            return False
         finally:
-            if conn and conn.is_connected():
+            cursor.close()
+
+class ActivityLogger:
+    """Queue + writer thread behind log_activity(). The thread starts with the first entry."""
+
+    def __init__(self, flush_size=FLUSH_SIZE, flush_seconds=FLUSH_SECONDS):
+        self.flush_size = max(flush_size, 1)
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def log(self, user_id, action):
+        if self._closed:
+            return
+        # Stamped now, not when the batch is written
+        self._queue.put((user_id, str(action)[:ACTION_MAX_LENGTH], datetime.now().replace(microsecond=0)))
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="tracklab-activity", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)   # Scripts that never call close_activity_log()
+
+    @staticmethod
+    def _prepare():
+        """Once per process, before the first write: make sure this month's partitions exist."""
+        with get_connection() as conn:
+            if not conn: return
+            cursor = conn.cursor()
+            try:
+                ensure_partitions(cursor)
+                conn.commit()
+            except Exception as e:
+                print(f"❌ Activity Partition Error: {e}")
+            finally:
                 cursor.close()
-                conn.close()
\ No newline at end of file
+
+    def _run(self):
+        self._prepare()
+        pending = []
+        stopping = False
+        while not stopping:
+            # Wait for the first entry, then collect more until the batch is full or old enough
+            try:
+                item = self._queue.get(timeout=self.flush_seconds if pending else None)
+            except queue.Empty:
+                item = None
+            deadline = time.monotonic() + self.flush_seconds
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                    break
+                pending.append(item)
+                if len(pending) >= self.flush_size: break
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    item = None
+
+            while pending:
+                batch = pending[:self.flush_size]
+                if not _write_batch(batch):
+                    break   # Kept for the next flush
+                del pending[:len(batch)]
+            if len(pending) > MAX_PENDING:
+                print(f"⚠️ Activity log backlog full; dropping {len(pending) - MAX_PENDING} oldest entries.")
+                del pending[:len(pending) - MAX_PENDING]
+
+    def close(self, timeout=5.0):
+        """Writes the queued entries and stops the thread (waits at most `timeout` seconds)."""
+        with self._lock:
+            if self._closed: return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+_logger = ActivityLogger()
+
+def log_activity(action, user_id=CURRENT_USER):
+    """
+    Queues an audit entry and returns immediately; pass user_id=None for actions
+    not taken by a person (e.g. the overdue scheduler).
+    """
+    if user_id is CURRENT_USER:
+        user_id = _session_user_id()
+    _logger.log(user_id, action)
+
+def _as_datetime(value):
+    if isinstance(value, datetime): return value
+    if isinstance(value, date): return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value))
+
+def get_activity(start, end, user_id=None, limit=ACTIVITY_PAGE_SIZE):
+    """
+    Audit entries with start <= timestamp < end (datetimes, dates or ISO strings),
+    optionally of one user, newest first. Only the months overlapping the range
+    are read: MySQL prunes partitions on the timestamp range, and on SQLite only
+    those month tables are queried. Entries not yet flushed are not included.
+    Returns [] on error.
+    """
+    start, end = _as_datetime(start), _as_datetime(end)
+    if end <= start: return []
+    where = " WHERE `timestamp` >= %s AND `timestamp` < %s" + (" AND user_id = %s" if user_id is not None else "")
+    params = (start, end) + ((user_id,) if user_id is not None else ())
+
+    with get_connection() as conn:
+        if not conn: return []
+        cursor = conn.cursor(dictionary=True)
+        try:
+            if DB_BACKEND == "sqlite":
+                first, last = month_of(start), month_of(end - timedelta(microseconds=1))
+                lookup = conn.cursor()
+                try:
+                    months = [m for m in stored_months(lookup) if first <= m <= last]
+                finally:
+                    lookup.close()
+                if not months: return []
+                query = " UNION ALL ".join(f"SELECT {ACTIVITY_COLUMNS} FROM {month_table(m)}{where}" for m in months)
+                params = params * len(months)
+            else:
+                query = f"SELECT {ACTIVITY_COLUMNS} FROM activity_logs{where}"
+            cursor.execute(query + " ORDER BY `timestamp` DESC, log_id DESC LIMIT %s", params + (limit,))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"❌ Activity Query Error: {e}")
+            return []
+        finally:
+            cursor.close()
+
+def close_activity_log():
+    """Flushes the audit queue (called when the application exits)."""
+    _logger.close()
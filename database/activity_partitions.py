@@ -0,0 +1,173 @@
+# database/activity_partitions.py
+"""
+Monthly partitions of the activity log, so audit lookups and retention only
+touch the months they need.
+
+  MySQL:  activity_logs is RANGE partitioned on TO_DAYS(`timestamp`), one
+          partition per month (p202501, p202502, ...) plus pmax for rows past
+          the last one. ensure_partitions() keeps a few months ready ahead.
+  SQLite: one table per month (activity_logs_202501, ...), created on the
+          first write of that month.
+
+Retention: archive_old_months() writes each month older than the retention
+window to data/archive/activity_logs/YYYY-MM.jsonl.gz and then drops the
+partition (or table), which is instant however many rows it held.
+
+    python setup/archive_activity_logs.py --keep-months 12
+"""
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime
+
+from database.connection import DB_BACKEND, get_connection
+from utils.paths import DATA_DIR
+
+MONTHS_AHEAD = 2   # MySQL partitions created past the current month
+RETENTION_MONTHS = int(os.environ.get("TRACKLAB_ACTIVITY_RETENTION_MONTHS", "12"))
+ARCHIVE_CHUNK_SIZE = 5000
+
+_MONTH_TABLE_RE = re.compile(r"^activity_logs_(\d{4})(\d{2})$")
+_PARTITION_RE = re.compile(r"^p(\d{4})(\d{2})$")
+
+# --- MONTH ARITHMETIC ---
+def month_of(value):
+    """First day of the month holding a date/datetime."""
+    return date(value.year, value.month, 1)
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def months_between(first, last):
+    """Every month from first to last (inclusive); both are first-of-month dates."""
+    month = first
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+# --- SQLITE: ONE TABLE PER MONTH ---
+def month_table(month):
+    return f"activity_logs_{month:%Y%m}"
+
+def create_month_table(cursor, month):
+    table = month_table(month)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INT,
+            action VARCHAR(255),
+            timestamp DATETIME NOT NULL
+        )
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_time ON {table} (timestamp)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user ON {table} (user_id, timestamp)")
+    return table
+
+# --- MYSQL: RANGE PARTITIONS ---
+def _partition_sql(month):
+    return f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{add_months(month, 1):%Y-%m-%d}'))"
+
+def partition_by_month(cursor, first, last):
+    """Turns the (unpartitioned) activity_logs into monthly partitions first..last plus pmax."""
+    parts = [_partition_sql(month) for month in months_between(first, last)]
+    parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    cursor.execute("ALTER TABLE activity_logs PARTITION BY RANGE (TO_DAYS(`timestamp`)) (" + ", ".join(parts) + ")")
+
+def ensure_partitions(cursor, today=None):
+    """Splits monthly partitions off pmax up to MONTHS_AHEAD months from now (MySQL); no-op elsewhere."""
+    if DB_BACKEND == "sqlite": return
+    months = stored_months(cursor)
+    if not months: return   # Not partitioned (migration 009 not applied yet)
+    target = add_months(month_of(today or date.today()), MONTHS_AHEAD)
+    missing = list(months_between(add_months(months[-1], 1), target))
+    if missing:
+        cursor.execute("ALTER TABLE activity_logs REORGANIZE PARTITION pmax INTO ("
+                       + ", ".join(_partition_sql(m) for m in missing)
+                       + ", PARTITION pmax VALUES LESS THAN MAXVALUE)")
+
+# --- BOTH BACKENDS ---
+def stored_months(cursor):
+    """Months that have a partition (MySQL) or table (SQLite), oldest first."""
+    if DB_BACKEND == "sqlite":
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'activity!_logs!_%' ESCAPE '!'")
+        pattern = _MONTH_TABLE_RE
+    else:
+        cursor.execute("""
+            SELECT partition_name FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = 'activity_logs' AND partition_name IS NOT NULL
+        """)
+        pattern = _PARTITION_RE
+    months = []
+    for (name,) in cursor.fetchall():
+        match = pattern.match(name)
+        if match: months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+def month_source(month):
+    """FROM target holding exactly one month's rows."""
+    if DB_BACKEND == "sqlite":
+        return month_table(month)
+    return f"activity_logs PARTITION (p{month:%Y%m})"
+
+def _drop_month(cursor, month):
+    if DB_BACKEND == "sqlite":
+        cursor.execute(f"DROP TABLE IF EXISTS {month_table(month)}")
+    else:
+        cursor.execute(f"ALTER TABLE activity_logs DROP PARTITION p{month:%Y%m}")
+
+def _archive_month(conn, month, archive_dir):
+    """Writes one month to <archive_dir>/YYYY-MM.jsonl.gz (all or nothing). Returns the row count."""
+    path = os.path.join(archive_dir, f"{month:%Y-%m}.jsonl.gz")
+    partial = path + ".part"
+    written = 0
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(f"SELECT log_id, user_id, action, `timestamp` FROM {month_source(month)} ORDER BY log_id")
+        with gzip.open(partial, "wt", encoding="utf-8") as out:
+            while True:
+                rows = cursor.fetchmany(ARCHIVE_CHUNK_SIZE)
+                if not rows: break
+                for row in rows:
+                    stamp = row['timestamp']
+                    row['timestamp'] = stamp.isoformat(sep=" ") if isinstance(stamp, datetime) else stamp
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                written += len(rows)
+        os.replace(partial, path)
+        return written
+    except Exception:
+        if os.path.exists(partial): os.remove(partial)
+        raise
+    finally:
+        cursor.close()
+
+def archive_old_months(keep_months=RETENTION_MONTHS, archive=True, today=None):
+    """
+    Moves every month before the last `keep_months` (the current one included)
+    out of the database: archived to gzip JSONL first (unless archive=False),
+    then the partition or table is dropped. A month whose archive fails is kept.
+    Returns [(month, rows archived)], or None when the database is unreachable.
+    """
+    cutoff = add_months(month_of(today or date.today()), -(max(keep_months, 1) - 1))
+    archive_dir = os.path.join(DATA_DIR, "archive", "activity_logs")
+    os.makedirs(archive_dir, exist_ok=True)
+    done = []
+    with get_connection() as conn:
+        if not conn: return None
+        cursor = conn.cursor()
+        try:
+            old = [m for m in stored_months(cursor) if m < cutoff]
+            for month in old:
+                try:
+                    rows = _archive_month(conn, month, archive_dir) if archive else 0
+                    _drop_month(cursor, month)
+                    conn.commit()
+                    done.append((month, rows))
+                except Exception as e:
+                    print(f"❌ Activity Archive Error ({month:%Y-%m}): {e}")
+                    conn.rollback()
+            ensure_partitions(cursor, today)
+            return done
+        finally:
+            cursor.close()
@@ -1,107 +1,239 @@
 # database/borrow_db.py
-from database.connection import create_connection
+from database.connection import get_connection, run_in_transaction
+from database.equipment_cache import equipment_cache
+from database.daily_usage import add_usage, usage_day
+from database.data_versions import BORROWS, EQUIPMENT, bump_versions
+from database.activity_db import log_activity
 
-def borrow_equipment(equipment_id, borrower_id, borrow_date, expected_return, purpose):
-    conn = create_connection()
-    if conn:
+# borrow_equipment() / borrow_cart() outcomes
+BORROW_OK = "ok"
+BORROW_INSUFFICIENT_STOCK = "insufficient_stock"
+BORROW_FAILED = "failed"
+
+# Borrow statuses: a borrow is open until it is Returned, and the overdue scheduler
+# (utils/overdue_scheduler.py) moves it from Ongoing to Overdue when it falls due
+ONGOING, OVERDUE, RETURNED = "Ongoing", "Overdue", "Returned"
+
+class InsufficientStock(Exception):
+    """Raised inside a transaction to roll it back when stock ran out."""
+
+# Dashboard query; setup/check_query_plans.py EXPLAINs it (with and without the student filter)
+ACTIVE_BORROWS_QUERY = """
+SELECT
+    t.borrow_id,
+    b.full_name,
+    b.student_id,
+    b.department,
+    e.name as item_name,
+    DATE_FORMAT(t.borrow_date, '%h:%i %p') as borrow_time,
+    DATE_FORMAT(t.expected_return_date, '%b %d %h:%i %p') as due_time,
+    t.status,
+    u.profile_image
+FROM borrow_transactions t
+JOIN borrowers b ON t.borrower_id = b.borrower_id
+JOIN equipment e ON t.equipment_id = e.equipment_id
+LEFT JOIN users u ON u.user_id = b.user_id
+WHERE t.status IN ('Ongoing', 'Overdue')
+"""
+ACTIVE_BORROWS_STUDENT_FILTER = " AND b.student_id = %s"
+ACTIVE_BORROWS_ORDER = " ORDER BY t.borrow_date DESC"
+
+ONGOING_EQUIPMENT_QUERY = ("SELECT equipment_id, borrow_date FROM borrow_transactions "
+                           "WHERE borrow_id = %s AND status IN ('Ongoing', 'Overdue')")
+
+# Overdue scheduler: due times of the borrows that have yet to become overdue, and the flip itself
+DUE_BORROWS_QUERY = """
+SELECT borrow_id, expected_return_date FROM borrow_transactions
+WHERE status = 'Ongoing' AND expected_return_date IS NOT NULL
+"""
+MARK_OVERDUE_QUERY = """
+UPDATE borrow_transactions SET status = 'Overdue'
+WHERE status = 'Ongoing' AND expected_return_date IS NOT NULL AND expected_return_date <= %s
+"""
+
+def _find_short_items(conn, wanted):
+    """Which cart items the current stock cannot cover (after a rolled-back reservation)."""
+    cursor = conn.cursor()
+    try:
+        placeholders = ", ".join(["%s"] * len(wanted))
+        cursor.execute(f"SELECT equipment_id, quantity FROM equipment WHERE equipment_id IN ({placeholders})",
+                       tuple(wanted))
+        stock = dict(cursor.fetchall())
+        return [eq_id for eq_id, q in wanted.items() if stock.get(eq_id, 0) < q]
+    except Exception as e:
+        print(f"Error checking stock: {e}")
+        return []
+    finally:
+        cursor.close()
+
+def borrow_cart(borrower_id, lines, borrow_date, expected_return, purpose):
+    """
+    Borrows several items at once for one borrower.
+    lines: iterable of (equipment_id, quantity); repeated items are merged.
+
+    The stock of every line is checked and decremented by one set-based UPDATE,
+    and the borrow rows go in as one multi-row INSERT; both commit together, so
+    either the whole cart is borrowed or nothing is.
+    Returns (status, short_equipment_ids); the list names the items that ran out
+    when status is BORROW_INSUFFICIENT_STOCK.
+    """
+    wanted = {}
+    for equipment_id, quantity in lines:
+        wanted[equipment_id] = wanted.get(equipment_id, 0) + int(quantity)
+    if not wanted or any(q < 1 for q in wanted.values()):
+        return BORROW_FAILED, []
+
+    # Lock rows in a fixed order so two carts sharing items cannot deadlock
+    cart = sorted(wanted.items())
+
+    def reserve(cursor):
+        # 1. One UPDATE for the whole cart, decrementing only rows with enough stock left:
+        #    every line must match, or another kiosk took some of it first
+        wanted_qty = "CASE equipment_id " + " ".join(["WHEN %s THEN %s"] * len(cart)) + " END"
+        pairs = tuple(v for line in cart for v in line)
+        placeholders = ", ".join(["%s"] * len(cart))
+        cursor.execute(f"UPDATE equipment SET quantity = quantity - {wanted_qty} "
+                       f"WHERE equipment_id IN ({placeholders}) AND quantity >= {wanted_qty}",
+                       pairs + tuple(eq_id for eq_id, _ in cart) + pairs)
+        if cursor.rowcount != len(cart):
+            raise InsufficientStock()
+
+        # 2. One transaction row per unit (returns and voids restore 1 each)
+        query = """
+        INSERT INTO borrow_transactions
+        (equipment_id, borrower_id, borrow_date, expected_return_date, purpose, status)
+        VALUES (%s, %s, %s, %s, %s, 'Ongoing')
+        """
+        rows = [(eq_id, borrower_id, borrow_date, expected_return, purpose) for eq_id, q in cart for _ in range(q)]
+        cursor.executemany(query, rows)
+        add_usage(cursor, {(usage_day(borrow_date), eq_id): (q, 0, 0) for eq_id, q in cart})
+        return bump_versions(cursor, BORROWS, EQUIPMENT)
+
+    with get_connection() as conn:
+        if not conn: return BORROW_FAILED, []
         try:
-            cursor = conn.cursor()
-            query = """
-            INSERT INTO borrow_transactions 
-            (equipment_id, borrower_id, borrow_date, expected_return_date, purpose, status)
-            VALUES (%s, %s, %s, %s, %s, 'Ongoing')
-            """
-            cursor.execute(query, (equipment_id, borrower_id, borrow_date, expected_return, purpose))
-            
-            # Decrease quantity
-            cursor.execute("UPDATE equipment SET quantity = quantity - 1 WHERE equipment_id = %s", (equipment_id,))
-            
-            conn.commit()
-            return True
+            versions = run_in_transaction(conn, reserve)
+            equipment_cache.adjust_quantities({eq_id: -q for eq_id, q in cart}, version=versions.get(EQUIPMENT))
+            log_activity(f"Borrowed for borrower {borrower_id}: "
+                         + ", ".join(f"equipment {eq_id} x{q}" for eq_id, q in cart))
+            return BORROW_OK, []
+        except InsufficientStock:
+            # Another kiosk got there first, so the cached stock is stale
+            equipment_cache.invalidate()
+            short = _find_short_items(conn, wanted)
+            print(f"Borrow rejected: not enough stock for equipment {short}.")
+            return BORROW_INSUFFICIENT_STOCK, short
         except Exception as e:
             print(f"Error borrowing: {e}")
-            return False
-        finally:
-            if conn.is_connected(): cursor.close(); conn.close()
-    return False
+            return BORROW_FAILED, []
+
+def borrow_equipment(equipment_id, borrower_id, borrow_date, expected_return, purpose, quantity=1):
+    """
+    Reserves `quantity` units of one item (a single-line borrow_cart).
+    The stock check and the decrement are a single conditional UPDATE, so two kiosks
+    can never both take the last unit. Returns BORROW_OK, BORROW_INSUFFICIENT_STOCK
+    or BORROW_FAILED.
+    """
+    status, _ = borrow_cart(borrower_id, [(equipment_id, quantity)], borrow_date, expected_return, purpose)
+    return status
 
 def delete_borrow_transaction(borrow_id):
     """
     ADMIN FUNCTION: Deletes a borrow record and restores the quantity.
     Returns the equipment_id and quantity to restore.
     """
-    conn = create_connection()
-    if conn:
+    with get_connection() as conn:
+        if not conn: return False
+        cursor = conn.cursor()
         try:
-            cursor = conn.cursor()
-            
             # 1. Get the equipment ID (This is safe because we only delete ONGOING items)
-            cursor.execute("SELECT equipment_id FROM borrow_transactions WHERE borrow_id = %s AND status = 'Ongoing'", (borrow_id,))
+            cursor.execute(ONGOING_EQUIPMENT_QUERY, (borrow_id,))
             result = cursor.fetchone()
-            
+
             if not result:
                 print(f"Borrow ID {borrow_id} not found or already returned.")
                 return False
-            
-            equipment_id = result[0]
+
+            equipment_id, borrow_date = result
 
             # 2. Delete the transaction
             cursor.execute("DELETE FROM borrow_transactions WHERE borrow_id = %s", (borrow_id,))
-            
+
             # 3. Restore quantity (always restore 1 since borrowing is 1-at-a-time logic)
             cursor.execute("UPDATE equipment SET quantity = quantity + 1 WHERE equipment_id = %s", (equipment_id,))
-            
+            # A voided borrow never happened, so it leaves the usage chart too
+            add_usage(cursor, {(usage_day(borrow_date), equipment_id): (-1, 0, 0)})
+            versions = bump_versions(cursor, BORROWS, EQUIPMENT)
+
             conn.commit()
+            equipment_cache.adjust_quantities({equipment_id: 1}, version=versions.get(EQUIPMENT))
+            log_activity(f"Voided borrow {borrow_id} (equipment {equipment_id})")
             return True
         except Exception as e:
             print(f"❌ Error deleting borrow transaction: {e}")
             return False
         finally:
-            if conn.is_connected(): cursor.close(); conn.close()
-    return False
+            cursor.close()
 
 def get_active_borrows(student_id_filter=None):
     """
     Fetches active borrows with Profile Images.
     """
-    conn = create_connection()
-    if conn:
+    with get_connection() as conn:
+        if not conn: return []
+        cursor = conn.cursor(dictionary=True)
         try:
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-            SELECT 
-                t.borrow_id, 
-                b.full_name, 
-                b.student_id, 
-                b.department, 
-                e.name as item_name, 
-                DATE_FORMAT(t.borrow_date, '%h:%i %p') as borrow_time,
-                DATE_FORMAT(t.expected_return_date, '%b %d %h:%i %p') as due_time,
-                CASE 
-                    WHEN t.expected_return_date IS NOT NULL AND NOW() > t.expected_return_date THEN 'Overdue'
-                    ELSE t.status 
-                END as status,
-                u.profile_image
-            FROM borrow_transactions t
-            JOIN borrowers b ON t.borrower_id = b.borrower_id
-            JOIN equipment e ON t.equipment_id = e.equipment_id
-            LEFT JOIN users u ON b.student_id = CONCAT(CASE WHEN u.role = 'Student' THEN 'STU-' ELSE 'STF-' END, LPAD(u.user_id, 5, '0'))
-            WHERE t.status = 'Ongoing'
-            """
-            
+            query = ACTIVE_BORROWS_QUERY
+
             params = []
             if student_id_filter:
-                query += " AND b.student_id = %s"
+                query += ACTIVE_BORROWS_STUDENT_FILTER
                 params.append(student_id_filter)
-            
-            query += " ORDER BY t.borrow_date DESC"
-            
+
+            query += ACTIVE_BORROWS_ORDER
+
             cursor.execute(query, tuple(params))
             return cursor.fetchall()
         except Exception as e:
             print(f"Error fetching active borrows: {e}")
             return []
         finally:
-            if conn.is_connected(): cursor.close(); conn.close()
-    return []
\ No newline at end of file
+            cursor.close()
+
+def get_due_borrows():
+    """[(expected_return_date, borrow_id)] of every Ongoing borrow with a due time; None on error."""
+    with get_connection() as conn:
+        if not conn: return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute(DUE_BORROWS_QUERY)
+            return [(due, borrow_id) for borrow_id, due in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error fetching due borrows: {e}")
+            return None
+        finally:
+            cursor.close()
+
+def mark_overdue(now):
+    """
+    Persists the Ongoing -> Overdue transition of every borrow due at or before
+    `now` (a datetime on the same clock as the due times, i.e. the kiosk's).
+    Safe to run from several kiosks at once. Returns how many borrows changed.
+    """
+    def flip(cursor):
+        cursor.execute(MARK_OVERDUE_QUERY, (now,))
+        changed = cursor.rowcount
+        if changed:
+            bump_versions(cursor, BORROWS)
+        return changed
+
+    with get_connection() as conn:
+        if not conn: return 0
+        try:
+            changed = run_in_transaction(conn, flip)
+            if changed:
+                log_activity(f"Marked {changed} borrow(s) overdue", user_id=None)
+            return changed
+        except Exception as e:
+            print(f"Error marking overdue borrows: {e}")
+            return 0
@@ -1,27 +1,254 @@
 # database/connection.py
-import mysql.connector
-from mysql.connector import Error
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# "mysql" (XAMPP server) or "sqlite" (single-lab kiosk, no server needed)
+DB_BACKEND = os.environ.get("TRACKLAB_DB_BACKEND", "mysql").lower()
+SQLITE_PATH = os.environ.get("TRACKLAB_SQLITE_PATH", "tracklab.db")
+
+DB_CONFIG = {
+    "host": os.environ.get("TRACKLAB_DB_HOST", "127.0.0.1"),    # Force IPv4
+    "port": int(os.environ.get("TRACKLAB_DB_PORT", "3307")),     # Your XAMPP Port
+    "user": os.environ.get("TRACKLAB_DB_USER", "root"),
+    "password": os.environ.get("TRACKLAB_DB_PASSWORD", ""),
+    "database": os.environ.get("TRACKLAB_DB_NAME", "tracklab"),
+}
+
+# Pool tuning (override per kiosk through the environment)
+POOL_SIZE = int(os.environ.get("TRACKLAB_DB_POOL_SIZE", "5"))
+POOL_IDLE_TIMEOUT = float(os.environ.get("TRACKLAB_DB_POOL_IDLE_TIMEOUT", "300"))
+POOL_CHECKOUT_TIMEOUT = float(os.environ.get("TRACKLAB_DB_POOL_CHECKOUT_TIMEOUT", "5"))
+POOL_PING_AFTER = float(os.environ.get("TRACKLAB_DB_POOL_PING_AFTER", "2"))
+
+# Transaction retry on deadlock / lock-wait timeout
+TX_ATTEMPTS = 4
+TX_BACKOFF = 0.05   # Seconds; doubles on each retry
+
+# MySQL: 1205 = lock wait timeout, 1213 = deadlock
+RETRYABLE_MYSQL_ERRORS = (1205, 1213)
 
 def create_connection():
     """
-    Connects to XAMPP using 'use_pure=True' to prevent Driver Crashes.
+    Opens a brand-new connection to the configured backend.
+    Application code should use get_connection() instead, which reuses pooled connections.
     """
+    if DB_BACKEND == "sqlite":
+        return _create_sqlite_connection()
+    return _create_mysql_connection()
+
+def _create_mysql_connection():
+    """Connects to XAMPP using 'use_pure=True' to prevent Driver Crashes."""
+    # Imported here so SQLite kiosks don't need the MySQL driver installed
+    import mysql.connector
+    from mysql.connector import Error
+
     try:
-        print("[DB] Connecting (Pure Python Mode)...")
         connection = mysql.connector.connect(
-            host="127.0.0.1",    # Force IPv4
-            port=3307,           # Your XAMPP Port
-            user="root",
-            password="",
-            database="tracklab",
+            **DB_CONFIG,
             use_pure=True,       # <--- CRITICAL FIX: Prevents the crash
             connection_timeout=5
         )
-        
+
         if connection.is_connected():
-            print(f"✅ Connected to MySQL!")
+            print(f"✅ Connected to MySQL ({DB_CONFIG['host']}:{DB_CONFIG['port']})")
             return connection
-            
+
     except Error as e:
         print(f"❌ Connection Error: {e}")
-        return None
\ No newline at end of file
+    return None
+
+def _create_sqlite_connection():
+    import sqlite3
+    from database.sqlite_backend import connect
+
+    try:
+        return connect(SQLITE_PATH)
+    except sqlite3.Error as e:
+        print(f"❌ SQLite Connection Error ({SQLITE_PATH}): {e}")
+        return None
+
+
+class ConnectionPool:
+    """
+    A small thread-safe pool of open connections.
+
+    - At most `size` connections exist at once; extra callers wait up to
+      `checkout_timeout` seconds for one to be handed back.
+    - A connection that sat idle longer than `ping_after` seconds is pinged on
+      checkout and silently replaced if the server dropped it.
+    - Connections idle longer than `idle_timeout` seconds are closed.
+    """
+
+    def __init__(self, factory, size=POOL_SIZE, idle_timeout=POOL_IDLE_TIMEOUT,
+                 checkout_timeout=POOL_CHECKOUT_TIMEOUT, ping_after=POOL_PING_AFTER):
+        self.factory = factory
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.ping_after = ping_after
+        self._idle = []          # Stack of (connection, last_used) - most recent on top
+        self._checked_out = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Returns a healthy connection, or None if the database is unreachable."""
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._cond:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._checked_out < self.size:
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print("❌ Connection Pool Error: timed out waiting for a free connection")
+                    return None
+                self._cond.wait(remaining)
+            self._checked_out += 1
+
+        if conn is not None and not self._is_healthy(conn, last_used):
+            self._close_quietly(conn)
+            conn = None
+        if conn is None:
+            try:
+                conn = self.factory()
+            except Exception as e:
+                print(f"❌ Connection Pool Error: {e}")
+                conn = None
+            if conn is None:
+                # Give the slot back, or the pool shrinks with every failed connect
+                with self._cond:
+                    self._checked_out -= 1
+                    self._cond.notify()
+        return conn
+
+    def release(self, conn, discard=False):
+        """Hands a connection back. Any uncommitted work is rolled back first."""
+        if not discard:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self._close_quietly(conn)
+        with self._cond:
+            self._checked_out -= 1
+            if not discard:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        """Closes every idle connection (checked-out ones close when released)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            return {"size": self.size, "idle": len(self._idle), "in_use": self._checked_out}
+
+    def _evict_idle(self):
+        # Oldest connections sit at the bottom of the stack
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.pop(0)
+            self._close_quietly(conn)
+
+    def _is_healthy(self, conn, last_used):
+        if time.monotonic() - last_used < self.ping_after:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(create_connection)
+    return _pool
+
+@contextmanager
+def get_connection():
+    """
+    Checks a connection out of the shared pool and returns it on exit.
+    Yields None when the database is unreachable so callers keep their `if not conn` fallbacks.
+
+        with get_connection() as conn:
+            if not conn: return []
+            ...
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+    broken = False
+    try:
+        yield conn
+    except Exception:
+        # Don't hand a possibly broken socket to the next caller
+        broken = conn is not None and not _is_alive(conn)
+        raise
+    finally:
+        if conn is not None:
+            pool.release(conn, discard=broken)
+
+def _is_alive(conn):
+    try:
+        conn.ping(reconnect=False)
+        return True
+    except Exception:
+        return False
+
+def is_retryable_error(error):
+    """True for errors where the whole transaction can simply be run again."""
+    if getattr(error, "errno", None) in RETRYABLE_MYSQL_ERRORS:
+        return True
+    # sqlite3.OperationalError: "database is locked" / "database table is locked"
+    return type(error).__name__ == "OperationalError" and "locked" in str(error)
+
+def run_in_transaction(conn, work, attempts=TX_ATTEMPTS):
+    """
+    Runs work(cursor) and commits. If the database reports a deadlock or a
+    lock-wait timeout the transaction is rolled back and retried with
+    exponential backoff. Any other exception rolls back and propagates.
+    """
+    for attempt in range(1, attempts + 1):
+        cursor = conn.cursor()
+        try:
+            result = work(cursor)
+            conn.commit()
+            return result
+        except Exception as e:
+            conn.rollback()
+            if attempt == attempts or not is_retryable_error(e):
+                raise
+            print(f"[DB] Transaction conflict ({e}); retrying ({attempt}/{attempts - 1})...")
+            time.sleep(TX_BACKOFF * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+        finally:
+            cursor.close()
+
+def close_pool():
+    """Closes pooled connections (called when the application exits)."""
+    if _pool is not None:
+        _pool.close_all()
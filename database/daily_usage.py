@@ -0,0 +1,96 @@
+# database/daily_usage.py
+"""
+daily_usage rollup: one row per (day, equipment) with the number of borrows,
+returns and damaged returns. The borrow, return and void write paths add their
+counts inside their own transaction, so the analytics chart reads a few hundred
+small rows instead of grouping every transaction.
+
+If the rollup ever drifts (e.g. rows edited by hand), rebuild it from the raw
+tables while the kiosks are idle:  python setup/rebuild_daily_usage.py
+"""
+from database.connection import DB_BACKEND, get_connection
+
+DAILY_USAGE_DDL = """
+CREATE TABLE IF NOT EXISTS daily_usage (
+    day DATE NOT NULL,
+    equipment_id INT NOT NULL,
+    borrows INT NOT NULL DEFAULT 0,
+    returns INT NOT NULL DEFAULT 0,
+    damaged INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, equipment_id)
+)
+"""
+
+if DB_BACKEND == "sqlite":
+    _UPSERT = """
+    INSERT INTO daily_usage (day, equipment_id, borrows, returns, damaged) VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (day, equipment_id) DO UPDATE SET
+        borrows = borrows + excluded.borrows,
+        returns = returns + excluded.returns,
+        damaged = damaged + excluded.damaged
+    """
+else:
+    _UPSERT = """
+    INSERT INTO daily_usage (day, equipment_id, borrows, returns, damaged) VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        borrows = borrows + VALUES(borrows),
+        returns = returns + VALUES(returns),
+        damaged = damaged + VALUES(damaged)
+    """
+
+def usage_day(value):
+    """'YYYY-MM-DD' of a datetime, or of a timestamp string as MySQL/SQLite print it."""
+    return value.strftime("%Y-%m-%d") if hasattr(value, "strftime") else str(value)[:10]
+
+def add_usage(cursor, counts):
+    """
+    Call inside the writing transaction.
+    counts: {(day, equipment_id): (borrows, returns, damaged)}; negative values undo a void.
+    Rows are written in key order so concurrent writers lock them in the same order.
+    """
+    if counts:
+        cursor.executemany(_UPSERT, [(day, eq_id, *deltas) for (day, eq_id), deltas in sorted(counts.items())])
+
+def rebuild_daily_usage(cursor, since=None):
+    """
+    Recomputes the rollup from borrow_transactions and return_transactions
+    (from `since` 'YYYY-MM-DD' onwards, or everything). Returns the number of rows written.
+    """
+    counts = {}
+    since_filter = " WHERE t.borrow_date >= %s" if since else ""
+    cursor.execute("SELECT DATE_FORMAT(t.borrow_date, '%Y-%m-%d'), t.equipment_id, COUNT(*) "
+                   "FROM borrow_transactions t" + since_filter + " GROUP BY 1, 2", (since,) if since else ())
+    for day, eq_id, borrows in cursor.fetchall():
+        counts[(day, eq_id)] = [int(borrows), 0, 0]
+
+    since_filter = " WHERE r.return_date >= %s" if since else ""
+    cursor.execute("SELECT DATE_FORMAT(r.return_date, '%Y-%m-%d'), t.equipment_id, COUNT(*), "
+                   "SUM(CASE WHEN r.`condition` = 'Good' THEN 0 ELSE 1 END) "
+                   "FROM return_transactions r JOIN borrow_transactions t ON r.borrow_id = t.borrow_id"
+                   + since_filter + " GROUP BY 1, 2", (since,) if since else ())
+    for day, eq_id, returns, damaged in cursor.fetchall():
+        row = counts.setdefault((day, eq_id), [0, 0, 0])
+        row[1], row[2] = int(returns), int(damaged or 0)
+
+    if since:
+        cursor.execute("DELETE FROM daily_usage WHERE day >= %s", (since,))
+    else:
+        cursor.execute("DELETE FROM daily_usage")
+    add_usage(cursor, {key: tuple(row) for key, row in counts.items()})
+    return len(counts)
+
+def rebuild(since=None):
+    """Standalone rebuild in its own transaction. Returns the row count, or None on error."""
+    with get_connection() as conn:
+        if not conn: return None
+        cursor = conn.cursor()
+        try:
+            written = rebuild_daily_usage(cursor, since)
+            conn.commit()
+            return written
+        except Exception as e:
+            print(f"❌ Daily Usage Rebuild Error: {e}")
+            conn.rollback()
+            return None
+        finally:
+            cursor.close()
@@ -0,0 +1,50 @@
+# database/data_versions.py
+"""
+Per-table change counters. Every write path bumps the counters of what it
+touched inside its own transaction, so a client can poll get_data_versions()
+(one tiny query) and skip refetching when nothing changed.
+"""
+from database.connection import get_connection
+
+EQUIPMENT = "equipment"   # Catalog rows and stock levels
+BORROWS = "borrows"       # Borrow and return transactions
+USERS = "users"           # Profile pictures shown on the dashboard
+
+TRACKED = (EQUIPMENT, BORROWS, USERS)
+
+DATA_VERSIONS_DDL = """
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+)
+"""
+
+def bump_versions(cursor, *names):
+    """
+    Call inside the writing transaction, after its other statements (keeps the row lock short).
+    Returns {name: version} as of this write, so the writer's caches can record it.
+    """
+    names = sorted(set(names))
+    placeholders = ", ".join(["%s"] * len(names))
+    cursor.execute(f"UPDATE data_versions SET version = version + 1 WHERE name IN ({placeholders})", tuple(names))
+    # The rows are locked by the UPDATE until commit, so these are this write's versions
+    cursor.execute(f"SELECT name, version FROM data_versions WHERE name IN ({placeholders})", tuple(names))
+    return dict(cursor.fetchall())
+
+def get_data_versions():
+    """Returns {name: version}, or None when the database is unreachable."""
+    with get_connection() as conn:
+        if not conn: return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT name, version FROM data_versions")
+            return dict(cursor.fetchall())
+        except Exception as e:
+            print(f"❌ Data Version Error: {e}")
+            return None
+        finally:
+            cursor.close()
+
+def get_data_version(name):
+    versions = get_data_versions()
+    return versions.get(name) if versions else None
@@ -0,0 +1,116 @@
+# database/equipment_cache.py
+"""
+In-process cache of the equipment catalog (the rows get_all_equipment() returns).
+
+Writes made through this process patch the cached rows in place (and move the
+cached version along with them) or drop the cache. Once the TTL expires, the
+cache asks for the equipment data version (database/data_versions.py) and
+reloads only if another kiosk changed something.
+"""
+import os
+import threading
+import time
+
+CACHE_TTL = float(os.environ.get("TRACKLAB_EQUIPMENT_CACHE_TTL", "5"))  # Seconds; 0 disables
+
+class EquipmentCache:
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0     # TTL expired but the data version was unchanged
+        self._rows = None          # list of row dicts, in catalog order
+        self._version = None       # data version the rows were loaded at
+        self._loaded_at = 0.0
+        self._generation = 0       # bumped by every write, so a load that raced a write is dropped
+        self._lock = threading.Lock()
+
+    def get(self, load, version=None):
+        """
+        Returns copies of the cached rows, calling load() on a miss.
+        version: optional callable returning the current data version; when the TTL
+        has expired and it is unchanged, the rows are kept without reloading.
+        """
+        with self._lock:
+            if self._rows is not None and time.monotonic() - self._loaded_at < self.ttl:
+                self.hits += 1
+                return [dict(row) for row in self._rows]
+            expired = self._rows is not None
+            cached_version = self._version
+            generation = self._generation
+
+        # Outside the lock: never hold it across a DB round trip.
+        # Read the version before the rows so a write in between is caught next time.
+        current = version() if version else None
+
+        if expired and current is not None and current == cached_version:
+            with self._lock:
+                if generation == self._generation:
+                    self.revalidations += 1
+                    self._loaded_at = time.monotonic()
+                    return [dict(row) for row in self._rows]
+
+        with self._lock:
+            self.misses += 1
+        rows = load()
+        if rows is None:
+            return []
+
+        with self._lock:
+            if generation == self._generation and self.ttl > 0:
+                self._rows = [dict(row) for row in rows]
+                self._version = current
+                self._loaded_at = time.monotonic()
+        return rows
+
+    def invalidate(self):
+        with self._lock:
+            self._rows = None
+            self._generation += 1
+
+    def _advance(self, version):
+        # Our own write moves the version by exactly one. A bigger jump means another
+        # kiosk wrote in between, so the version is left behind and the next expiry reloads.
+        if version is not None and self._version is not None and version == self._version + 1:
+            self._version = version
+
+    def update_item(self, equipment_id, version=None, **fields):
+        """
+        Patches one cached row (e.g. quantity=3, category='PPE').
+        version: the equipment data version the write produced (bump_versions()).
+        """
+        with self._lock:
+            self._generation += 1
+            self._advance(version)
+            for row in self._rows or []:
+                if row['equipment_id'] == equipment_id:
+                    row.update(fields)
+
+    def adjust_quantities(self, deltas, version=None):
+        """deltas: {equipment_id: +/- units} after a committed borrow or return."""
+        with self._lock:
+            self._generation += 1
+            self._advance(version)
+            for row in self._rows or []:
+                if row['equipment_id'] in deltas:
+                    row['quantity'] += deltas[row['equipment_id']]
+
+    def remove_item(self, equipment_id, version=None):
+        with self._lock:
+            self._generation += 1
+            self._advance(version)
+            if self._rows is not None:
+                self._rows = [row for row in self._rows if row['equipment_id'] != equipment_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "cached_rows": len(self._rows) if self._rows is not None else 0,
+                "age": round(time.monotonic() - self._loaded_at, 1) if self._rows is not None else None,
+            }
+
+# Shared by equipment_db, borrow_db and return_db
+equipment_cache = EquipmentCache()
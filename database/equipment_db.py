@@ -1,70 +1,228 @@
-from database.connection import create_connection
+import os
+
+from database.connection import DB_BACKEND, get_connection
+from database.equipment_cache import equipment_cache
+from database.activity_db import log_activity
+from database.data_versions import EQUIPMENT, bump_versions, get_data_version
+
+SEARCH_LIMIT = 50
+UNCATEGORIZED = "Others"   # Listed category of items without one
+
+# Catalogs up to this size are mirrored on the kiosk and searched in memory;
+# bigger ones are searched on the server with search_equipment()
+CATALOG_MIRROR_LIMIT = int(os.environ.get("TRACKLAB_CATALOG_MIRROR_LIMIT", "50000"))
+
+# Full-text index over name, code and category (created by migration 007)
+FULLTEXT_INDEX = "equipment_fts" if DB_BACKEND == "sqlite" else "ft_equipment_search"
+_has_fulltext = None   # Looked up once per process
 
 def add_equipment(name, code, category, quantity, condition):
     """Adds new equipment (No description)."""
-    conn = create_connection()
-    if conn:
+    with get_connection() as conn:
+        if not conn: return False
+        cursor = conn.cursor()
         try:
-            cursor = conn.cursor()
             # Using backticks for condition as it is a keyword
             query = "INSERT INTO equipment (name, code, category, quantity, `condition`) VALUES (%s, %s, %s, %s, %s)"
             cursor.execute(query, (name, code, category, quantity, condition))
+            bump_versions(cursor, EQUIPMENT)
             conn.commit()
+            equipment_cache.invalidate()
+            log_activity(f"Added equipment {code} ({name}), qty {quantity}")
             print(f"✅ Added Equipment: {name}")
             return True
         except Exception as e:
             print(f"❌ Add Equipment Error: {e}")
             return False
         finally:
-            if conn.is_connected(): cursor.close(); conn.close()
-    return False
+            cursor.close()
 
 def get_all_equipment():
-    """Fetches all equipment ordered by Code (EQ-XXXXX)."""
-    conn = create_connection()
-    if conn:
+    """Fetches all equipment ordered by Code (EQ-XXXXX). Served from equipment_cache."""
+    return equipment_cache.get(_load_all_equipment, version=lambda: get_data_version(EQUIPMENT))
+
+def _load_all_equipment():
+    """Reads the catalog from the database; None on error so failures are not cached."""
+    with get_connection() as conn:
+        if not conn: return None
+        cursor = conn.cursor(dictionary=True)
         try:
-            cursor = conn.cursor(dictionary=True)
             cursor.execute("SELECT * FROM equipment ORDER BY code ASC")
             return cursor.fetchall()
         except Exception as e:
             print(f"❌ Fetch Equipment Error: {e}")
-            return []
+            return None
         finally:
-            if conn.is_connected(): cursor.close(); conn.close()
-    return []
+            cursor.close()
+
+def get_equipment_cache_stats():
+    """Hit/miss counters of the catalog cache."""
+    return equipment_cache.stats()
 
 def update_equipment(eq_id, category, quantity, condition):
     """Updates ONLY category, quantity, and condition. Name/ID are locked."""
-    conn = create_connection()
-    if conn:
+    with get_connection() as conn:
+        if not conn: return False
+        cursor = conn.cursor()
         try:
-            cursor = conn.cursor()
             query = "UPDATE equipment SET category=%s, quantity=%s, `condition`=%s WHERE equipment_id=%s"
             cursor.execute(query, (category, quantity, condition, eq_id))
+            versions = bump_versions(cursor, EQUIPMENT)
             conn.commit()
+            equipment_cache.update_item(int(eq_id), version=versions.get(EQUIPMENT),
+                                        category=category, quantity=quantity, condition=condition)
+            log_activity(f"Updated equipment {eq_id}: category {category}, qty {quantity}, condition {condition}")
             print(f"✅ Updated Equipment ID: {eq_id}")
             return True
         except Exception as e:
             print(f"❌ Update Equipment Error: {e}")
             return False
         finally:
-            if conn.is_connected(): cursor.close(); conn.close()
-    return False
+            cursor.close()
 
 def delete_equipment(eq_id):
     """Deletes an equipment item."""
-    conn = create_connection()
-    if conn:
+    with get_connection() as conn:
+        if not conn: return False
+        cursor = conn.cursor()
         try:
-            cursor = conn.cursor()
             cursor.execute("DELETE FROM equipment WHERE equipment_id=%s", (eq_id,))
+            versions = bump_versions(cursor, EQUIPMENT)
             conn.commit()
+            equipment_cache.remove_item(int(eq_id), version=versions.get(EQUIPMENT))
+            log_activity(f"Deleted equipment {eq_id}")
             print(f"✅ Deleted Equipment ID: {eq_id}")
             return True
         except Exception as e:
             print(f"❌ Delete Equipment Error: {e}")
             return False
         finally:
-            if conn.is_connected(): cursor.close(); conn.close()
-    return False
\ No newline at end of file
+            cursor.close()
+
+def _fulltext_available(cursor):
+    global _has_fulltext
+    if _has_fulltext is None:
+        if DB_BACKEND == "sqlite":
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", (FULLTEXT_INDEX,))
+        else:
+            cursor.execute("""
+                SELECT 1 FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'equipment' AND index_name = %s LIMIT 1
+            """, (FULLTEXT_INDEX,))
+        _has_fulltext = cursor.fetchone() is not None
+    return _has_fulltext
+
+def _like_escape(term):
+    return term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+def _search_query(cursor, query, category, available_only):
+    """Builds the FROM/WHERE part and relevance expression of search_equipment()."""
+    terms = query.lower().split()
+    joins, where, params = "", [], []
+    score, score_params = "0", []
+
+    long_terms = [t for t in terms if len(t) >= 3]
+    if long_terms and _fulltext_available(cursor):
+        # Each term is a quoted phrase, so punctuation in codes (EQ-001) is not query syntax
+        if DB_BACKEND == "sqlite":
+            joins = " JOIN equipment_fts ON equipment_fts.rowid = e.equipment_id"
+            where.append("equipment_fts MATCH %s")
+            params.append(" ".join('"' + t.replace('"', '""') + '"' for t in long_terms))
+            score = "-bm25(equipment_fts)"   # bm25 is lower for better matches
+        else:
+            match = "MATCH(e.name, e.code, e.category) AGAINST (%s IN BOOLEAN MODE)"
+            phrase = " ".join('+"' + t.replace('"', '') + '"' for t in long_terms)
+            where.append(match)
+            params.append(phrase)
+            score, score_params = match, [phrase]
+        terms = [t for t in terms if len(t) < 3]
+
+    for term in terms:
+        if len(term) < 3:
+            # Too short for the n-gram index: match the start of a word
+            where.append("(e.name LIKE %s ESCAPE '!' OR e.name LIKE %s ESCAPE '!' "
+                         "OR e.code LIKE %s ESCAPE '!' OR e.category LIKE %s ESCAPE '!')")
+            prefix = _like_escape(term) + "%"
+            params += [prefix, "% " + prefix, prefix, prefix]
+        else:
+            # No full-text index (e.g. an SQLite build without FTS5 trigram)
+            where.append("(e.name LIKE %s ESCAPE '!' OR e.code LIKE %s ESCAPE '!' OR e.category LIKE %s ESCAPE '!')")
+            params += ["%" + _like_escape(term) + "%"] * 3
+
+    if category is not None:
+        where.append("(e.category = %s OR e.category IS NULL)" if category == UNCATEGORIZED else "e.category = %s")
+        params.append(category)
+    if available_only:
+        where.append("e.quantity > 0 AND e.`condition` != 'Broken'")
+
+    sql = " FROM equipment e" + joins + (" WHERE " + " AND ".join(where) if where else "")
+    return sql, params, score, score_params
+
+def search_equipment(query="", category=None, available_only=False, limit=SEARCH_LIMIT, offset=0):
+    """
+    One page of catalog rows matching every word of `query` (in name, code or
+    category), best matches first, then by code. Narrow with an exact `category`
+    or `available_only` (in stock and not Broken). Uses the full-text index, so
+    it never reads the whole table. Returns [] on error.
+    """
+    with get_connection() as conn:
+        if not conn: return []
+        cursor = conn.cursor(dictionary=True)
+        try:
+            sql, params, score, score_params = _search_query(cursor, query, category, available_only)
+            cursor.execute(f"SELECT e.*, {score} AS score" + sql + " ORDER BY score DESC, e.code ASC LIMIT %s OFFSET %s",
+                           tuple(score_params + params + [limit, offset]))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"❌ Search Equipment Error: {e}")
+            return []
+        finally:
+            cursor.close()
+
+def count_equipment(query="", category=None, available_only=False):
+    """Number of rows search_equipment() would page through; None on error."""
+    with get_connection() as conn:
+        if not conn: return None
+        cursor = conn.cursor()
+        try:
+            sql, params, _, _ = _search_query(cursor, query, category, available_only)
+            cursor.execute("SELECT COUNT(*)" + sql, tuple(params))
+            return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"❌ Count Equipment Error: {e}")
+            return None
+        finally:
+            cursor.close()
+
+def get_equipment_categories(available_only=False):
+    """[{'category', 'items'}] in name order, for category lists that load their items on demand."""
+    with get_connection() as conn:
+        if not conn: return []
+        cursor = conn.cursor(dictionary=True)
+        try:
+            where = " WHERE quantity > 0 AND `condition` != 'Broken'" if available_only else ""
+            cursor.execute(f"SELECT COALESCE(category, %s) AS category, COUNT(*) AS items "
+                           f"FROM equipment{where} GROUP BY 1 ORDER BY 1", (UNCATEGORIZED,))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"❌ Equipment Categories Error: {e}")
+            return []
+        finally:
+            cursor.close()
+
+def get_equipment_by_ids(ids):
+    """{equipment_id: row} for the given ids (e.g. to re-check the items in a cart)."""
+    ids = sorted(set(ids))
+    if not ids: return {}
+    with get_connection() as conn:
+        if not conn: return {}
+        cursor = conn.cursor(dictionary=True)
+        try:
+            placeholders = ", ".join(["%s"] * len(ids))
+            cursor.execute(f"SELECT * FROM equipment WHERE equipment_id IN ({placeholders})", tuple(ids))
+            return {row['equipment_id']: row for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"❌ Fetch Equipment Error: {e}")
+            return {}
+        finally:
+            cursor.close()
@@ -0,0 +1,246 @@
+# database/migrations.py
+"""
+Versioned schema migrations.
+
+setup/_setup_database.py creates the original tables; everything added afterwards
+lives here as an ordered list of migrations. Each one runs once and is recorded
+in the schema_version table. MySQL commits DDL implicitly, so every migration
+must also be idempotent (safe to re-run after a partial failure).
+
+Run after every update:  python setup/_setup_database.py
+"""
+from datetime import date
+
+from database.connection import DB_BACKEND, get_connection
+from database.data_versions import DATA_VERSIONS_DDL, TRACKED
+from database.daily_usage import DAILY_USAGE_DDL, rebuild_daily_usage
+from database.activity_partitions import (MONTHS_AHEAD, add_months, create_month_table, month_of,
+                                          partition_by_month, stored_months)
+from utils.id_generator import generate_formatted_id
+
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    description VARCHAR(255),
+    applied_at DATETIME
+)
+"""
+
+# --- HELPERS (idempotent DDL) ---
+def index_exists(cursor, table, name):
+    if DB_BACKEND == "sqlite":
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = %s", (name,))
+    else:
+        cursor.execute("""
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1
+        """, (table, name))
+    return cursor.fetchone() is not None
+
+def create_index(cursor, table, name, columns):
+    if not index_exists(cursor, table, name):
+        cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+def column_exists(cursor, table, column):
+    if DB_BACKEND == "sqlite":
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in cursor.fetchall())
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1
+    """, (table, column))
+    return cursor.fetchone() is not None
+
+def constraint_exists(cursor, table, name):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.table_constraints
+        WHERE table_schema = DATABASE() AND table_name = %s AND constraint_name = %s LIMIT 1
+    """, (table, name))
+    return cursor.fetchone() is not None
+
+# --- MIGRATIONS ---
+def _001_hot_query_indexes(cursor):
+    # Dashboard: WHERE status IN ('Ongoing', 'Overdue') ORDER BY borrow_date - one range per open
+    # status (covers the join keys and due date)
+    create_index(cursor, "borrow_transactions", "idx_borrow_status_date",
+                 "status, borrow_date, borrower_id, equipment_id, expected_return_date")
+    # Overdue report: WHERE status = 'Overdue' ORDER BY expected_return_date;
+    # overdue scheduler: due times of status = 'Ongoing' borrows
+    create_index(cursor, "borrow_transactions", "idx_borrow_status_due",
+                 "status, expected_return_date")
+    # Borrowing history and analytics chart: borrow_date ranges (covering both)
+    create_index(cursor, "borrow_transactions", "idx_borrow_date",
+                 "borrow_date, equipment_id, borrower_id, expected_return_date, status")
+    # Damage report: return_date range + condition filter
+    create_index(cursor, "return_transactions", "idx_return_date_cond",
+                 "return_date, `condition`, borrow_id")
+
+def _002_borrower_user_fk(cursor):
+    # borrowers.user_id replaces the CONCAT/LPAD join on the formatted Student/Staff ID
+    if not column_exists(cursor, "borrowers", "user_id"):
+        if DB_BACKEND == "sqlite":
+            cursor.execute("ALTER TABLE borrowers ADD COLUMN user_id INT REFERENCES users(user_id)")
+        else:
+            cursor.execute("ALTER TABLE borrowers ADD COLUMN user_id INT NULL")
+    create_index(cursor, "borrowers", "idx_borrowers_user", "user_id")
+    if DB_BACKEND != "sqlite" and not constraint_exists(cursor, "borrowers", "fk_borrowers_user"):
+        cursor.execute("ALTER TABLE borrowers ADD CONSTRAINT fk_borrowers_user FOREIGN KEY (user_id) REFERENCES users(user_id)")
+
+    # Backfill using the same rule the app uses to build the ID (utils/id_generator)
+    cursor.execute("SELECT user_id, role FROM users")
+    user_by_code = {generate_formatted_id(role, user_id): user_id for user_id, role in cursor.fetchall()}
+    cursor.execute("SELECT borrower_id, student_id FROM borrowers WHERE user_id IS NULL")
+    updates = [(user_by_code[code], borrower_id) for borrower_id, code in cursor.fetchall() if code in user_by_code]
+    if updates:
+        cursor.executemany("UPDATE borrowers SET user_id = %s WHERE borrower_id = %s", updates)
+
+def _seed_data_versions(cursor):
+    for name in TRACKED:
+        cursor.execute("SELECT 1 FROM data_versions WHERE name = %s", (name,))
+        if cursor.fetchone() is None:
+            cursor.execute("INSERT INTO data_versions (name, version) VALUES (%s, 0)", (name,))
+
+def _003_data_versions(cursor):
+    # Change counters polled by clients (database/data_versions.py)
+    cursor.execute(DATA_VERSIONS_DDL)
+    _seed_data_versions(cursor)
+
+def _004_users_data_version(cursor):
+    # Cached pages refresh avatars when a profile picture changes
+    _seed_data_versions(cursor)
+
+def _005_history_keyset_indexes(cursor):
+    # Paginated history: ORDER BY date DESC, id DESC with a (date, id) cursor
+    create_index(cursor, "return_transactions", "idx_return_date_id", "return_date, return_id")
+    create_index(cursor, "borrow_transactions", "idx_borrow_date_id", "borrow_date, borrow_id")
+
+def _006_daily_usage(cursor):
+    # Analytics chart rollup, kept current by the borrow/return/void write paths
+    cursor.execute(DAILY_USAGE_DDL)
+    rebuild_daily_usage(cursor)
+
+def _007_equipment_fulltext(cursor):
+    # search_equipment(): substring search on name, code and category without a table scan
+    create_index(cursor, "equipment", "idx_equipment_category", "category, code")
+    if DB_BACKEND == "sqlite":
+        # External-content FTS5 table kept in sync by triggers (trigram needs SQLite 3.34+)
+        import sqlite3
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS equipment_fts USING fts5(
+                    name, code, category, content='equipment', content_rowid='equipment_id', tokenize='trigram')
+            """)
+        except sqlite3.OperationalError as e:
+            # No FTS5 or no trigram tokenizer in this build: search_equipment() falls back to LIKE
+            print(f"   ⚠️ Skipping the equipment full-text index: {e}")
+            return
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS equipment_fts_insert AFTER INSERT ON equipment BEGIN
+                INSERT INTO equipment_fts (rowid, name, code, category) VALUES (new.equipment_id, new.name, new.code, new.category);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS equipment_fts_delete AFTER DELETE ON equipment BEGIN
+                INSERT INTO equipment_fts (equipment_fts, rowid, name, code, category)
+                VALUES ('delete', old.equipment_id, old.name, old.code, old.category);
+            END
+        """)
+        # Only text edits re-index; stock changes (every borrow and return) leave the FTS table alone
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS equipment_fts_update AFTER UPDATE OF name, code, category ON equipment BEGIN
+                INSERT INTO equipment_fts (equipment_fts, rowid, name, code, category)
+                VALUES ('delete', old.equipment_id, old.name, old.code, old.category);
+                INSERT INTO equipment_fts (rowid, name, code, category) VALUES (new.equipment_id, new.name, new.code, new.category);
+            END
+        """)
+        cursor.execute("INSERT INTO equipment_fts (equipment_fts) VALUES ('rebuild')")
+    elif not index_exists(cursor, "equipment", "ft_equipment_search"):
+        # n-gram parser: matches inside words ("eak" finds "Beaker") and works for codes
+        cursor.execute("ALTER TABLE equipment ADD FULLTEXT INDEX ft_equipment_search (name, code, category) WITH PARSER ngram")
+
+def _008_persist_overdue(cursor):
+    # Overdue is now a stored status (set by utils/overdue_scheduler.py); flip the backlog once
+    cursor.execute("""
+        UPDATE borrow_transactions SET status = 'Overdue'
+        WHERE status = 'Ongoing' AND expected_return_date IS NOT NULL AND expected_return_date < NOW()
+    """)
+
+def _table_exists(cursor, table):
+    if DB_BACKEND == "sqlite":
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+    else:
+        cursor.execute("""
+            SELECT 1 FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s LIMIT 1
+        """, (table,))
+    return cursor.fetchone() is not None
+
+def _009_partition_activity_logs(cursor):
+    # activity_logs by month (database/activity_partitions.py): audit lookups and retention touch only their months
+    if DB_BACKEND == "sqlite":
+        # One table per month; rows of the old single table are moved into them
+        if not _table_exists(cursor, "activity_logs"): return
+        cursor.execute("UPDATE activity_logs SET timestamp = NOW() WHERE timestamp IS NULL")
+        cursor.execute("SELECT DISTINCT DATE_FORMAT(timestamp, '%Y-%m-01') FROM activity_logs")
+        for (first_day,) in cursor.fetchall():
+            month = date.fromisoformat(first_day)
+            table = create_month_table(cursor, month)
+            cursor.execute(f"INSERT INTO {table} (user_id, action, timestamp) SELECT user_id, action, timestamp "
+                           f"FROM activity_logs WHERE timestamp >= %s AND timestamp < %s ORDER BY log_id",
+                           (f"{month:%Y-%m-%d}", f"{add_months(month, 1):%Y-%m-%d}"))
+        cursor.execute("DROP TABLE activity_logs")
+        return
+
+    if not stored_months(cursor):
+        # The partitioning column must be NOT NULL and part of every unique key
+        cursor.execute("UPDATE activity_logs SET `timestamp` = NOW() WHERE `timestamp` IS NULL")
+        cursor.execute("ALTER TABLE activity_logs MODIFY `timestamp` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+                       "DROP PRIMARY KEY, ADD PRIMARY KEY (log_id, `timestamp`)")
+        cursor.execute("SELECT MIN(`timestamp`) FROM activity_logs")
+        oldest = cursor.fetchone()[0]
+        this_month = month_of(date.today())
+        partition_by_month(cursor, month_of(oldest) if oldest else this_month, add_months(this_month, MONTHS_AHEAD))
+    create_index(cursor, "activity_logs", "idx_activity_time", "`timestamp`")
+    create_index(cursor, "activity_logs", "idx_activity_user", "user_id, `timestamp`")
+
+# (version, description, function) - append only, never renumber
+MIGRATIONS = [
+    (1, "Indexes for dashboard, overdue, history, analytics and damage queries", _001_hot_query_indexes),
+    (2, "borrowers.user_id foreign key (backfilled from student_id)", _002_borrower_user_fk),
+    (3, "data_versions change counters", _003_data_versions),
+    (4, "data_versions counter for user profiles", _004_users_data_version),
+    (5, "Indexes for keyset-paginated return and borrowing history", _005_history_keyset_indexes),
+    (6, "daily_usage rollup for the analytics chart (backfilled)", _006_daily_usage),
+    (7, "Full-text search index on equipment name, code and category", _007_equipment_fulltext),
+    (8, "Stored Overdue status for borrows past their due time", _008_persist_overdue),
+    (9, "Monthly partitions for activity_logs (monthly tables on SQLite)", _009_partition_activity_logs),
+]
+
+def get_schema_version(cursor):
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+def migrate():
+    """Applies pending migrations in order. Returns True when the schema is up to date."""
+    with get_connection() as conn:
+        if not conn: return False
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SCHEMA_VERSION_DDL)
+            current = get_schema_version(cursor)
+
+            for version, description, apply in MIGRATIONS:
+                if version <= current: continue
+                print(f"   - Applying migration {version:03d}: {description}")
+                apply(cursor)
+                cursor.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (%s, %s, NOW())",
+                               (version, description))
+                conn.commit()
+
+            print(f"✅ Schema is at version {MIGRATIONS[-1][0]}.")
+            return True
+        except Exception as e:
+            print(f"❌ Migration Error: {e}")
+            conn.rollback()
+            return False
+        finally:
+            cursor.close()
@@ -1,127 +1,206 @@
-from database.connection import create_connection
+from database.connection import DB_BACKEND, get_connection, get_pool
+
+# Report queries live at module level so setup/check_query_plans.py can EXPLAIN them.
+HISTORY_PAGE_SIZE = 100
+EXPORT_CHUNK_SIZE = 2000   # Rows per fetch when streaming an export
+
+BORROWING_HISTORY_QUERY = """
+SELECT
+    t.borrow_id,
+    t.borrow_date,
+    e.name AS item_name,
+    b.full_name AS borrower,
+    DATE_FORMAT(t.borrow_date, '%Y-%m-%d %h:%i %p') AS date_borrowed,
+    IFNULL(DATE_FORMAT(t.expected_return_date, '%Y-%m-%d'), 'Ongoing') AS due_date,
+    t.status
+FROM borrow_transactions t
+JOIN equipment e ON t.equipment_id = e.equipment_id
+JOIN borrowers b ON t.borrower_id = b.borrower_id
+WHERE t.borrow_date BETWEEN %s AND %s
+"""
+# Keyset pagination: rows after (borrow_date, borrow_id), written so the index can seek on borrow_date
+BORROWING_HISTORY_AFTER = " AND t.borrow_date <= %s AND (t.borrow_date < %s OR t.borrow_id < %s)"
+BORROWING_HISTORY_ORDER = " ORDER BY t.borrow_date DESC, t.borrow_id DESC"
+
+DAMAGE_REPORTS_QUERY = """
+SELECT
+    e.name AS item_name,
+    b.full_name AS reported_by,
+    DATE_FORMAT(r.return_date, '%Y-%m-%d') AS date_returned,
+    r.condition AS severity,
+    r.remarks
+FROM return_transactions r
+JOIN borrow_transactions t ON r.borrow_id = t.borrow_id
+JOIN borrowers b ON t.borrower_id = b.borrower_id
+JOIN equipment e ON t.equipment_id = e.equipment_id
+WHERE r.return_date BETWEEN %s AND %s
+AND r.condition != 'Good'
+ORDER BY r.return_date DESC
+"""
+
+OVERDUE_ITEMS_QUERY = """
+SELECT
+    e.name AS item_name,
+    b.full_name AS borrower,
+    DATE_FORMAT(t.borrow_date, '%Y-%m-%d') AS date_borrowed,
+    IFNULL(DATE_FORMAT(t.expected_return_date, '%Y-%m-%d'), 'N/A') AS due_date,
+    DATEDIFF(NOW(), t.expected_return_date) AS days_overdue
+FROM borrow_transactions t
+JOIN equipment e ON t.equipment_id = e.equipment_id
+JOIN borrowers b ON t.borrower_id = b.borrower_id
+WHERE t.status = 'Overdue'
+ORDER BY t.expected_return_date ASC
+"""
+
+INVENTORY_STATUS_QUERY = """
+SELECT
+    code, name, category, quantity,
+    CASE
+        WHEN quantity = 0 THEN 'Out of Stock'
+        WHEN `condition` = 'Broken' THEN 'Broken'
+        ELSE 'Available'
+    END as status
+FROM equipment
+ORDER BY category, name
+"""
+
+# Reads the daily_usage rollup (database/daily_usage.py): one small row per day and item
+ANALYTICS_CHART_QUERY = """
+SELECT
+    DATE_FORMAT(u.day, '%Y-%m-%d') as day,
+    SUM(u.borrows) as count
+FROM daily_usage u
+WHERE u.day BETWEEN %s AND %s
+GROUP BY u.day
+HAVING SUM(u.borrows) > 0
+ORDER BY u.day ASC
+"""
 
 def get_borrowing_history(start_date, end_date):
     """Fetches all borrow transactions (Ongoing & Returned) within a date range."""
-    conn = create_connection()
-    if not conn: return []
-    
-    try:
+    with get_connection() as conn:
+        if not conn: return []
         cursor = conn.cursor(dictionary=True)
-        # We append time to end_date to include the full day
-        query = """
-        SELECT 
-            e.name AS item_name, 
-            b.full_name AS borrower, 
-            DATE_FORMAT(t.borrow_date, '%Y-%m-%d %h:%i %p') AS date_borrowed,
-            IFNULL(DATE_FORMAT(t.expected_return_date, '%Y-%m-%d'), 'Ongoing') AS due_date,
-            t.status
-        FROM borrow_transactions t
-        JOIN equipment e ON t.equipment_id = e.equipment_id
-        JOIN borrowers b ON t.borrower_id = b.borrower_id
-        WHERE t.borrow_date BETWEEN %s AND %s
-        ORDER BY t.borrow_date DESC
-        """
-        cursor.execute(query, (start_date + " 00:00:00", end_date + " 23:59:59"))
-        return cursor.fetchall()
-    finally:
-        if conn.is_connected(): cursor.close(); conn.close()
+        try:
+            # We append time to end_date to include the full day
+            cursor.execute(BORROWING_HISTORY_QUERY + BORROWING_HISTORY_ORDER,
+                           (start_date + " 00:00:00", end_date + " 23:59:59"))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+def get_borrowing_history_page(start_date, end_date, after=None, limit=HISTORY_PAGE_SIZE):
+    """
+    One page of get_borrowing_history(), newest first. Pass the cursor returned
+    with the previous page as `after`; each page costs the same however deep it is.
+    Returns (rows, next cursor or None when this was the last page).
+    """
+    with get_connection() as conn:
+        if not conn: return [], None
+        cursor = conn.cursor(dictionary=True)
+        try:
+            query = BORROWING_HISTORY_QUERY
+            params = (start_date + " 00:00:00", end_date + " 23:59:59")
+            if after is not None:
+                query += BORROWING_HISTORY_AFTER
+                params += (after[0], after[0], after[1])
+            # One extra row tells whether another page exists
+            cursor.execute(query + BORROWING_HISTORY_ORDER + " LIMIT %s", params + (limit + 1,))
+            rows = cursor.fetchall()
+            if len(rows) <= limit:
+                return rows, None
+            rows = rows[:limit]
+            return rows, (rows[-1]['borrow_date'], rows[-1]['borrow_id'])
+        finally:
+            cursor.close()
 
 def get_damage_reports(start_date, end_date):
     """Fetches items returned with damage."""
-    conn = create_connection()
-    if not conn: return []
-    
-    try:
+    with get_connection() as conn:
+        if not conn: return []
         cursor = conn.cursor(dictionary=True)
-        query = """
-        SELECT 
-            e.name AS item_name, 
-            b.full_name AS reported_by, 
-            DATE_FORMAT(r.return_date, '%Y-%m-%d') AS date_returned,
-            r.condition AS severity,
-            r.remarks
-        FROM return_transactions r
-        JOIN borrow_transactions t ON r.borrow_id = t.borrow_id
-        JOIN borrowers b ON t.borrower_id = b.borrower_id
-        JOIN equipment e ON t.equipment_id = e.equipment_id
-        WHERE r.return_date BETWEEN %s AND %s 
-        AND r.condition != 'Good'
-        ORDER BY r.return_date DESC
-        """
-        cursor.execute(query, (start_date + " 00:00:00", end_date + " 23:59:59"))
-        return cursor.fetchall()
-    finally:
-        if conn.is_connected(): cursor.close(); conn.close()
+        try:
+            cursor.execute(DAMAGE_REPORTS_QUERY, (start_date + " 00:00:00", end_date + " 23:59:59"))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
 
 def get_overdue_items():
     """
     Fetches ongoing borrows that are past their expected return date.
     """
-    conn = create_connection()
-    if not conn: return []
-    
-    try:
+    with get_connection() as conn:
+        if not conn: return []
         cursor = conn.cursor(dictionary=True)
-        query = """
-        SELECT 
-            e.name AS item_name, 
-            b.full_name AS borrower, 
-            DATE_FORMAT(t.borrow_date, '%Y-%m-%d') AS date_borrowed,
-            IFNULL(DATE_FORMAT(t.expected_return_date, '%Y-%m-%d'), 'N/A') AS due_date,
-            DATEDIFF(NOW(), t.expected_return_date) AS days_overdue
-        FROM borrow_transactions t
-        JOIN equipment e ON t.equipment_id = e.equipment_id
-        JOIN borrowers b ON t.borrower_id = b.borrower_id
-        WHERE t.status = 'Ongoing' 
-        AND t.expected_return_date IS NOT NULL 
-        AND t.expected_return_date < NOW()
-        ORDER BY days_overdue DESC
-        """
-        cursor.execute(query)
-        return cursor.fetchall()
-    finally:
-        if conn.is_connected(): cursor.close(); conn.close()
+        try:
+            cursor.execute(OVERDUE_ITEMS_QUERY)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
 
 def get_inventory_status():
     """Fetches current stock levels."""
-    conn = create_connection()
-    if not conn: return []
-    
-    try:
+    with get_connection() as conn:
+        if not conn: return []
         cursor = conn.cursor(dictionary=True)
-        query = """
-        SELECT 
-            code, name, category, quantity, 
-            CASE 
-                WHEN quantity = 0 THEN 'Out of Stock'
-                WHEN `condition` = 'Broken' THEN 'Broken'
-                ELSE 'Available'
-            END as status
-        FROM equipment
-        ORDER BY category, name
-        """
-        cursor.execute(query)
-        return cursor.fetchall()
-    finally:
-        if conn.is_connected(): cursor.close(); conn.close()
+        try:
+            cursor.execute(INVENTORY_STATUS_QUERY)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
 
 def get_analytics_chart_data(start_date, end_date):
-    """Aggregates borrow counts by day for the visual chart."""
-    conn = create_connection()
-    if not conn: return []
-    
-    try:
+    """Borrow counts by day for the visual chart (from the daily_usage rollup)."""
+    with get_connection() as conn:
+        if not conn: return []
         cursor = conn.cursor(dictionary=True)
-        query = """
-        SELECT 
-            DATE_FORMAT(borrow_date, '%Y-%m-%d') as day, 
-            COUNT(*) as count
-        FROM borrow_transactions
-        WHERE borrow_date BETWEEN %s AND %s
-        GROUP BY day
-        ORDER BY day ASC
-        """
-        cursor.execute(query, (start_date + " 00:00:00", end_date + " 23:59:59"))
-        return cursor.fetchall()
+        try:
+            cursor.execute(ANALYTICS_CHART_QUERY, (start_date, end_date))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+def _export_query(report_type, start_date, end_date):
+    """The full query and params behind a report, as the Reports page names it."""
+    date_range = (start_date + " 00:00:00", end_date + " 23:59:59")
+    if report_type == "Borrowing History":
+        return BORROWING_HISTORY_QUERY + BORROWING_HISTORY_ORDER, date_range
+    if report_type == "Damage Reports":
+        return DAMAGE_REPORTS_QUERY, date_range
+    if report_type == "Overdue Items":
+        return OVERDUE_ITEMS_QUERY, ()
+    return INVENTORY_STATUS_QUERY, ()
+
+def stream_report(report_type, start_date, end_date, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Generator yielding the rows of a report in lists of up to chunk_size dicts.
+    MySQL uses an unbuffered cursor, so rows come off the socket as they are
+    written and a multi-year export never sits in memory whole. Closing the
+    generator early (a cancelled export) throws the connection away instead of
+    draining the rest of the result.
+    """
+    query, params = _export_query(report_type, start_date, end_date)
+    pool = get_pool()
+    conn = pool.acquire()
+    if not conn:
+        raise ConnectionError("Database is unreachable.")
+    finished = False
+    cursor = None
+    try:
+        if DB_BACKEND != "sqlite":
+            # The server waits on us while we write the file; don't let it give up
+            setup = conn.cursor()
+            setup.execute("SET SESSION net_write_timeout = 600")
+            setup.close()
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows: break
+            yield rows
+        finished = True
     finally:
-        if conn.is_connected(): cursor.close(); conn.close()
\ No newline at end of file
+        if cursor is not None and finished:
+            cursor.close()
+        # Unread rows would poison the connection for the next caller
+        pool.release(conn, discard=not finished)
@@ -1,62 +1,138 @@
-from database.connection import create_connection
+from database.connection import DB_BACKEND, get_connection, run_in_transaction
+from database.equipment_cache import equipment_cache
+from database.daily_usage import add_usage, usage_day
+from database.data_versions import BORROWS, EQUIPMENT, bump_versions
+from database.activity_db import log_activity
+
+HISTORY_PAGE_SIZE = 100
+
+# Return history, newest first; setup/check_query_plans.py EXPLAINs it (first and later pages).
+# DATE_FORMAT splits the timestamp; the raw return_date and return_id are the page cursor.
+RETURN_HISTORY_QUERY = """
+SELECT
+    r.return_id,
+    r.return_date,
+    e.name AS item_name,
+    e.code AS item_code,
+    b.full_name AS returned_by,
+    DATE_FORMAT(r.return_date, '%Y-%m-%d') AS ret_date,
+    DATE_FORMAT(r.return_date, '%h:%i %p') AS ret_time,
+    r.`condition`,
+    r.remarks
+FROM return_transactions r
+JOIN borrow_transactions t ON r.borrow_id = t.borrow_id
+JOIN equipment e ON t.equipment_id = e.equipment_id
+JOIN borrowers b ON t.borrower_id = b.borrower_id
+"""
+# Rows after (return_date, return_id), written so the index can seek on return_date
+RETURN_HISTORY_AFTER = " WHERE r.return_date <= %s AND (r.return_date < %s OR r.return_id < %s)"
+RETURN_HISTORY_ORDER = " ORDER BY r.return_date DESC, r.return_id DESC LIMIT %s"
+
+# SQLite locks the whole file on the first write; MySQL needs explicit row locks
+LOCK_ROWS = "" if DB_BACKEND == "sqlite" else " FOR UPDATE"
 
 def return_equipment(borrow_id, condition, remarks):
-    conn = create_connection()
-    if conn:
+    """Returns a single borrow. See return_many()."""
+    return return_many([(borrow_id, condition, remarks)]) == 1
+
+def return_many(returns):
+    """
+    Returns several borrows in one transaction (e.g. closing a lab section).
+    returns: list of (borrow_id, condition, remarks), each with its own condition
+    (if a borrow_id repeats, the last entry wins).
+
+    Borrows that are no longer out (Ongoing or Overdue) are skipped, so returning twice never
+    restores stock twice. Stock comes back only for items returned in Good condition.
+    Returns the number of borrows returned, or None on error.
+    """
+    by_id = {borrow_id: (condition, remarks) for borrow_id, condition, remarks in returns}
+    if not by_id:
+        return 0
+
+    def apply(cursor):
+        # 1. Which of these are still out (locked until commit)
+        placeholders = ", ".join(["%s"] * len(by_id))
+        cursor.execute(f"SELECT borrow_id, equipment_id FROM borrow_transactions "
+                       f"WHERE borrow_id IN ({placeholders}) AND status IN ('Ongoing', 'Overdue'){LOCK_ROWS}", tuple(by_id))
+        ongoing = cursor.fetchall()
+        if not ongoing:
+            return [], {}, None
+        ongoing_ids = [borrow_id for borrow_id, _ in ongoing]
+
+        # 2. Insert all return records in one batch, stamped with one server time
+        cursor.execute("SELECT NOW()")
+        now = cursor.fetchone()[0]
+        cursor.executemany("INSERT INTO return_transactions (borrow_id, return_date, `condition`, remarks) "
+                           "VALUES (%s, %s, %s, %s)",
+                           [(borrow_id, now, *by_id[borrow_id]) for borrow_id in ongoing_ids])
+
+        # 3. Close the borrows with one set-based UPDATE
+        placeholders = ", ".join(["%s"] * len(ongoing_ids))
+        cursor.execute(f"UPDATE borrow_transactions SET status = 'Returned' WHERE borrow_id IN ({placeholders})",
+                       tuple(ongoing_ids))
+
+        # 4. Restore Quantity for Good items in one UPDATE; count the day's returns
+        restock, usage = {}, {}
+        for borrow_id, equipment_id in ongoing:
+            good = by_id[borrow_id][0] == "Good"
+            if good:
+                restock[equipment_id] = restock.get(equipment_id, 0) + 1
+            returns, damaged = usage.get(equipment_id, (0, 0))
+            usage[equipment_id] = (returns + 1, damaged + (not good))
+        if restock:
+            lines = sorted(restock.items())
+            placeholders = ", ".join(["%s"] * len(lines))
+            cursor.execute("UPDATE equipment SET quantity = quantity + CASE equipment_id "
+                           + " ".join(["WHEN %s THEN %s"] * len(lines))
+                           + f" END WHERE equipment_id IN ({placeholders})",
+                           tuple(v for line in lines for v in line) + tuple(eq_id for eq_id, _ in lines))
+
+        # 5. Rollup after equipment, the same lock order as borrowing
+        day = usage_day(now)
+        add_usage(cursor, {(day, equipment_id): (0, returns, damaged)
+                           for equipment_id, (returns, damaged) in usage.items()})
+        if restock:
+            versions = bump_versions(cursor, BORROWS, EQUIPMENT)
+        else:
+            versions = bump_versions(cursor, BORROWS)
+        return ongoing_ids, restock, versions.get(EQUIPMENT)
+
+    with get_connection() as conn:
+        if not conn: return None
         try:
-            cursor = conn.cursor()
-            # 1. Insert into return_transactions
-            query = "INSERT INTO return_transactions (borrow_id, `condition`, remarks) VALUES (%s, %s, %s)"
-            cursor.execute(query, (borrow_id, condition, remarks))
-            
-            # 2. Update borrow_transactions status
-            cursor.execute("UPDATE borrow_transactions SET status='Returned' WHERE borrow_id=%s", (borrow_id,))
-            
-            # 3. Restore Quantity if Good
-            if condition == "Good":
-                cursor.execute("SELECT equipment_id FROM borrow_transactions WHERE borrow_id=%s", (borrow_id,))
-                result = cursor.fetchone()
-                if result:
-                    eq_id = result[0]
-                    cursor.execute("UPDATE equipment SET quantity = quantity + 1 WHERE equipment_id=%s", (eq_id,))
-
-            conn.commit()
-            return True
+            returned, restock, equipment_version = run_in_transaction(conn, apply)
+            equipment_cache.adjust_quantities(restock, version=equipment_version)
+            if returned:
+                log_activity(f"Returned {len(returned)} borrow(s): " + ", ".join(map(str, returned)))
+            return len(returned)
         except Exception as e:
             print(f"❌ Return Error: {e}")
-            return False
-        finally:
-            if conn.is_connected(): cursor.close(); conn.close()
-    return False
+            return None
 
-def get_return_history():
-    """Fetches history with separated Date and Time."""
-    conn = create_connection()
-    if conn:
+def get_return_history_page(after=None, limit=HISTORY_PAGE_SIZE):
+    """
+    One page of return history, newest first, with separated Date and Time.
+    Keyset pagination: pass the cursor returned with the previous page as `after`,
+    so every page costs the same however deep the user scrolls.
+    Returns (rows, next cursor or None when this was the last page).
+    """
+    with get_connection() as conn:
+        if not conn: return [], None
+        cursor = conn.cursor(dictionary=True)
         try:
-            # DATE_FORMAT splits the timestamp
-            query = """
-            SELECT 
-                r.return_id, 
-                e.name AS item_name, 
-                e.code AS item_code,
-                b.full_name AS returned_by, 
-                DATE_FORMAT(r.return_date, '%Y-%m-%d') AS ret_date,
-                DATE_FORMAT(r.return_date, '%h:%i %p') AS ret_time,
-                r.`condition`, 
-                r.remarks
-            FROM return_transactions r
-            JOIN borrow_transactions t ON r.borrow_id = t.borrow_id
-            JOIN equipment e ON t.equipment_id = e.equipment_id
-            JOIN borrowers b ON t.borrower_id = b.borrower_id
-            ORDER BY r.return_date DESC
-            """
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(query)
-            return cursor.fetchall()
+            query, params = RETURN_HISTORY_QUERY, ()
+            if after is not None:
+                query += RETURN_HISTORY_AFTER
+                params = (after[0], after[0], after[1])
+            # One extra row tells whether another page exists
+            cursor.execute(query + RETURN_HISTORY_ORDER, params + (limit + 1,))
+            rows = cursor.fetchall()
+            if len(rows) <= limit:
+                return rows, None
+            rows = rows[:limit]
+            return rows, (rows[-1]['return_date'], rows[-1]['return_id'])
         except Exception as e:
             print(f"❌ History Error: {e}")
-            return []
+            return [], None
         finally:
-            if conn.is_connected(): cursor.close(); conn.close()
-    return []
\ No newline at end of file
+            cursor.close()
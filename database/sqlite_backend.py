@@ -0,0 +1,166 @@
+# database/sqlite_backend.py
+"""
+Embedded SQLite backend.
+
+Wraps sqlite3 so the MySQL-flavoured queries in database/*.py run unchanged:
+  - '%s' placeholders are rewritten to '?'
+  - conn.cursor(dictionary=True) returns rows as dicts
+  - DATE_FORMAT, DATEDIFF, NOW, LPAD and CONCAT are registered as SQL functions
+"""
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+
+BUSY_TIMEOUT = 10  # Seconds a writer waits for another kiosk/thread to finish
+
+# --- DIALECT LAYER ---
+# MySQL DATE_FORMAT specifiers -> strftime
+_DATE_FORMAT_MAP = {
+    "Y": "%Y", "y": "%y", "m": "%m", "d": "%d", "e": "%d", "b": "%b", "M": "%B",
+    "H": "%H", "h": "%I", "I": "%I", "i": "%M", "s": "%S", "S": "%S", "p": "%p",
+    "a": "%a", "W": "%A", "j": "%j", "%": "%%",
+}
+
+def _parse_datetime(value):
+    if value is None: return None
+    if isinstance(value, datetime): return value
+    if isinstance(value, date): return datetime(value.year, value.month, value.day)
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=64)
+def _strftime_pattern(mysql_format):
+    return re.sub(r"%(.)", lambda m: _DATE_FORMAT_MAP.get(m.group(1), m.group(1)), mysql_format)
+
+def _date_format(value, mysql_format):
+    dt = _parse_datetime(value)
+    if dt is None or mysql_format is None: return None
+    return dt.strftime(_strftime_pattern(mysql_format))
+
+def _datediff(a, b):
+    da, db = _parse_datetime(a), _parse_datetime(b)
+    if da is None or db is None: return None
+    return (da.date() - db.date()).days
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _lpad(value, length, pad):
+    if value is None or length is None or pad is None: return None
+    value, length = str(value), int(length)
+    if len(value) >= length: return value[:length]
+    if not pad: return None
+    fill = (str(pad) * length)[:length - len(value)]
+    return fill + value
+
+def _concat(*args):
+    # MySQL semantics: any NULL argument makes the result NULL
+    if any(a is None for a in args): return None
+    return "".join(str(a) for a in args)
+
+# --- QUERY TRANSLATION ---
+_TOKEN_RE = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\")|%s")
+
+@lru_cache(maxsize=256)
+def translate(sql):
+    """Rewrites a MySQL-style query for sqlite3 (placeholders only; string literals are left alone)."""
+    return _TOKEN_RE.sub(lambda m: m.group(1) if m.group(1) else "?", sql)
+
+# Store datetimes the way MySQL prints them so text comparisons and BETWEEN keep working
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(" ", "seconds"))
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_converter("DATETIME", lambda b: _parse_datetime(b.decode()))
+sqlite3.register_converter("DATE", lambda b: date.fromisoformat(b.decode()[:10]))
+
+
+class SQLiteCursor:
+    """Cursor exposing the subset of the mysql-connector cursor API the app uses."""
+
+    def __init__(self, raw_cursor, dictionary=False):
+        self._cursor = raw_cursor
+        self._dictionary = dictionary
+
+    def execute(self, query, params=()):
+        self._cursor.execute(translate(query), tuple(params or ()))
+        return self
+
+    def executemany(self, query, seq_of_params):
+        self._cursor.executemany(translate(query), [tuple(p) for p in seq_of_params])
+        return self
+
+    def _shape(self, row):
+        if row is None or not self._dictionary: return row
+        return {col[0]: value for col, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._shape(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._shape(r) for r in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._shape(r) for r in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for row in self._cursor:
+            yield self._shape(row)
+
+    @property
+    def rowcount(self): return self._cursor.rowcount
+
+    @property
+    def lastrowid(self): return self._cursor.lastrowid
+
+    @property
+    def description(self): return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Connection wrapper matching the mysql-connector methods used by the pool and the db modules."""
+
+    def __init__(self, raw_conn):
+        self._conn = raw_conn
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SQLiteCursor(self._conn.cursor(), dictionary=dictionary)
+
+    def commit(self): self._conn.commit()
+
+    def rollback(self): self._conn.rollback()
+
+    def close(self): self._conn.close()
+
+    @property
+    def in_transaction(self): return self._conn.in_transaction
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1")
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+
+def connect(path):
+    """Opens the SQLite file with WAL journaling and the MySQL compatibility functions installed."""
+    raw = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                          detect_types=sqlite3.PARSE_DECLTYPES)
+    raw.execute("PRAGMA journal_mode=WAL")
+    raw.execute("PRAGMA synchronous=NORMAL")
+    raw.execute("PRAGMA foreign_keys=ON")
+
+    raw.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+    raw.create_function("DATEDIFF", 2, _datediff, deterministic=True)
+    raw.create_function("NOW", 0, _now)
+    raw.create_function("LPAD", 3, _lpad, deterministic=True)
+    raw.create_function("CONCAT", -1, _concat, deterministic=True)
+    return SQLiteConnection(raw)
@@ -1,105 +1,106 @@
 # database/users_db.py
-from database.connection import create_connection
+from database.connection import get_connection
+from database.data_versions import USERS, bump_versions
+from database.activity_db import log_activity
 import hashlib
+import hmac
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def check_user_exists(username):
-    conn = create_connection()
-    cursor = None
-    try:
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
+    with get_connection() as conn:
+        if not conn: return False
+        cursor = conn.cursor()
+        try:
             query = "SELECT user_id FROM users WHERE username = %s"
             cursor.execute(query, (username,))
             result = cursor.fetchone()
             return result is not None
-    except Exception as e:
-        print(f"❌ Check User Error: {e}")
-    finally:
-        if cursor: cursor.close()
-        if conn and conn.is_connected(): conn.close()
+        except Exception as e:
+            print(f"❌ Check User Error: {e}")
+        finally:
+            cursor.close()
     return False
 
 def register_user(username, password, role):
     if check_user_exists(username):
         return False, "Username already taken."
 
-    conn = create_connection()
-    cursor = None
-    try:
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
+    with get_connection() as conn:
+        if not conn:
+            return False, "Could not connect to database."
+        cursor = conn.cursor()
+        try:
             query = "INSERT INTO users (username, password, role) VALUES (%s, %s, %s)"
             hashed_pw = hash_password(password)
             cursor.execute(query, (username, hashed_pw, role))
             conn.commit()
+            log_activity(f"Registered {role} account '{username}'", user_id=cursor.lastrowid)
             return True, "User registered successfully."
-        else:
-            return False, "Could not connect to database."
-    except Exception as e:
-        return False, f"Database Error: {e}"
-    finally:
-        if cursor: cursor.close()
-        if conn and conn.is_connected(): conn.close()
+        except Exception as e:
+            return False, f"Database Error: {e}"
+        finally:
+            cursor.close()
 
 def login_user(username, password):
-    conn = create_connection()
-    cursor = None
-    try:
-        if conn and conn.is_connected():
-            cursor = conn.cursor(dictionary=True)
-            hashed_pw = hash_password(password)
-            query = "SELECT * FROM users WHERE username=%s AND password=%s"
-            cursor.execute(query, (username, hashed_pw))
-            user = cursor.fetchone()
-            
+    with get_connection() as conn:
+        if not conn: return None
+        cursor = conn.cursor(dictionary=True)
+        try:
+            # Looked up by name alone: the same row tells a wrong password from an unknown user
+            cursor.execute("SELECT * FROM users WHERE username=%s", (username,))
+            account = cursor.fetchone()
+            if account and hmac.compare_digest(account['password'], hash_password(password)):
+                user = account
+            else:
+                user = None
+
             # Ensure keys exist
             if user:
                 for key in ['email', 'contact', 'department', 'profile_image']:
                     if user.get(key) is None: user[key] = ""
+                log_activity("Logged in", user_id=user['user_id'])
+            else:
+                # Never log what was typed: it is sometimes the password
+                log_activity("Failed login", user_id=account['user_id'] if account else None)
             return user
-    except Exception as e:
-        print(f"❌ Login Error: {e}")
-    finally:
-        if cursor: cursor.close()
-        if conn and conn.is_connected(): conn.close()
+        except Exception as e:
+            print(f"❌ Login Error: {e}")
+        finally:
+            cursor.close()
     return None
 
 def update_user_profile(user_id, email, contact, department):
-    conn = create_connection()
-    cursor = None
-    try:
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
+    with get_connection() as conn:
+        if not conn: return False
+        cursor = conn.cursor()
+        try:
             query = "UPDATE users SET email=%s, contact=%s, department=%s WHERE user_id=%s"
             cursor.execute(query, (email, contact, department, user_id))
             conn.commit()
+            log_activity("Updated profile", user_id=user_id)
             return True
-    except Exception as e:
-        print(f"❌ Update Profile Error: {e}")
-        return False
-    finally:
-        if cursor: cursor.close()
-        if conn and conn.is_connected(): conn.close()
-    return False
+        except Exception as e:
+            print(f"❌ Update Profile Error: {e}")
+            return False
+        finally:
+            cursor.close()
 
 # --- NEW FUNCTION FOR IMAGE ---
 def update_profile_image(user_id, image_path):
-    conn = create_connection()
-    cursor = None
-    try:
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
+    with get_connection() as conn:
+        if not conn: return False
+        cursor = conn.cursor()
+        try:
             query = "UPDATE users SET profile_image=%s WHERE user_id=%s"
             cursor.execute(query, (image_path, user_id))
+            bump_versions(cursor, USERS)
             conn.commit()
+            log_activity("Changed profile picture", user_id=user_id)
             return True
-    except Exception as e:
-        print(f"❌ Update Image Error: {e}")
-        return False
-    finally:
-        if cursor: cursor.close()
-        if conn and conn.is_connected(): conn.close()
-    return False
\ No newline at end of file
+        except Exception as e:
+            print(f"❌ Update Image Error: {e}")
+            return False
+        finally:
+            cursor.close()
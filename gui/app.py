@@ -1,15 +1,39 @@
+import importlib
+import os
+import sys
 import tkinter as tk
-from PIL import Image, ImageTk, ImageOps # Import PIL
-import os # Import os to handle paths
+from collections import OrderedDict
 from utils.colors import COLORS
-# Import pages normally (this order is necessary for circular dependency fix)
-from gui.landing_page import LandingPage
-from gui.login_page import LoginPage
-from gui.dashboard_page import DashboardPage
-from gui.borrow_page import BorrowPage
-from gui.reports_page import ReportsPage
-from gui.equipment_page import EquipmentPage
-from gui.profile_page import ProfilePage 
+from utils.db_executor import DbExecutor
+from utils.logo import logo_image
+from utils.startup_profile import stage
+
+# Page modules (and the database and PIL modules they pull in) are imported on
+# first navigation, so the landing page does not wait for them
+PAGES = {
+    "landing": ("gui.landing_page", "LandingPage"),
+    "login": ("gui.login_page", "LoginPage"),
+    "dashboard": ("gui.dashboard_page", "DashboardPage"),
+    "borrow": ("gui.borrow_page", "BorrowPage"),
+    "reports": ("gui.reports_page", "ReportsPage"),
+    "equipment": ("gui.equipment_page", "EquipmentPage"),
+    "profile": ("gui.profile_page", "ProfilePage"),
+}
+
+# Signed-in pages kept alive between visits (least recently used is destroyed first).
+# A page's memory is its widget tree: every Tk widget holds a window, a Tcl command
+# and its options, so the cache is bounded by the widgets it holds as well as by
+# the page count.
+PAGE_CACHE_SIZE = int(os.environ.get("TRACKLAB_PAGE_CACHE_SIZE", "4"))
+PAGE_CACHE_MAX_WIDGETS = int(os.environ.get("TRACKLAB_PAGE_CACHE_MAX_WIDGETS", "15000"))
+
+def widget_count(widget):
+    """Widgets in a page's tree (the page included): the weight of a cached page."""
+    count, stack = 0, [widget]
+    while stack:
+        count += 1
+        stack.extend(stack.pop().winfo_children())
+    return count
 
 class TrackLabApp:
     def __init__(self, root):
@@ -23,73 +47,145 @@ class TrackLabApp:
             height = self.root.winfo_screenheight()
             self.root.geometry(f"{width}x{height}")
         
-        # Logo attribute (Accessed via self.controller.logo_image on child pages)
-        self.logo_image = self.load_logo()
+        # Worker threads for database calls (results come back on the Tk thread)
+        self.executor = DbExecutor(self.root)
+
+        # Flips borrows to Overdue at their due time while someone is signed in
+        self.overdue_scheduler = None
+
+        # Navigation bar logo, loaded on first use (see logo_image below)
+        self._logo_image = None
         
         self.container = tk.Frame(self.root, bg=COLORS["bg_light"])
         self.container.pack(fill="both", expand=True)
+        # Every page sits in the same grid cell; the visible one is raised on top
+        self.container.rowconfigure(0, weight=1)
+        self.container.columnconfigure(0, weight=1)
+
+        self.pages = OrderedDict()   # page class -> instance, oldest first
+        self.page_weights = {}       # page class -> widget_count() when built or last hidden
+        self.current_page = None
 
         self.show_landing_page()
 
-    def load_logo(self):
-        """Loads and prepares the tracklablogo.png from the utils folder.
-        
-        FIX: Uses os.getcwd() to anchor the path to the directory where python was executed,
-        which is the most reliable way when running main.py from the root."""
-        
-        # Get the directory where the python script was executed (D:\MHAR IDE\LabTrack)
-        root_dir = os.getcwd() 
-        # Construct path: D:\MHAR IDE\LabTrack\utils\tracklablogo.png
-        logo_path = os.path.join(root_dir, 'utils', 'tracklablogo.png')
-        
-        try:
-            # --- Load image using the standardized path ---
-            img = Image.open(logo_path)
-            
-            # --- Ensure strict aspect ratio calculation for quality ---
-            new_height = 40
-            aspect_ratio = img.width / img.height
-            new_width = max(1, int(new_height * aspect_ratio))
-            
-            resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            print(f"✅ Logo loaded successfully from: {logo_path}")
-            return ImageTk.PhotoImage(resized_img)
-            
-        except FileNotFoundError:
-            print(f"❌ Error: Logo file not found. Expected path: {logo_path}. Using text fallback.")
-            return None
-        except Exception as e:
-            print(f"❌ Error loading logo image: {e}. Using text fallback.")
-            return None
+    @property
+    def logo_image(self):
+        """Navigation bar logo (Accessed via self.controller.logo_image on child pages)."""
+        if self._logo_image is None:
+            self._logo_image = logo_image("nav") or False   # False: missing, don't retry
+        return self._logo_image or None
+
+    def page_class(self, name):
+        """Imports a page module the first time it is needed."""
+        module_name, class_name = PAGES[name]
+        module = sys.modules.get(module_name)
+        if module is None:
+            with stage(f"import {module_name}"):
+                module = importlib.import_module(module_name)
+        return getattr(module, class_name)
 
     def clear_container(self):
+        """Destroys every page (used on login/logout, when pages would show the wrong user)."""
         for widget in self.container.winfo_children():
             widget.destroy()
+        self.pages.clear()
+        self.page_weights.clear()
+        self.current_page = None
+
+    def show_page(self, page_class):
+        """
+        Raises a cached page (or builds it on first visit) instead of rebuilding it.
+        Pages may define on_show() / on_hide(); on_show() is where they refresh stale data.
+        """
+        page = self.pages.get(page_class)
+        if page is self.current_page and page is not None:
+            return
+
+        if self.current_page is not None:
+            if hasattr(self.current_page, "on_hide"):
+                self.current_page.on_hide()
+            # Only the page being left can have grown since it was weighed
+            if type(self.current_page) in self.page_weights:
+                self.page_weights[type(self.current_page)] = widget_count(self.current_page)
+
+        if page is None:
+            with stage(f"build {page_class.__name__}"):
+                page = page_class(self.container, self)
+            page.grid(row=0, column=0, sticky="nsew")
+            self.pages[page_class] = page
+            self.page_weights[page_class] = widget_count(page)
+        self.pages.move_to_end(page_class)
+        self.evict_pages(keep=page)
 
+        page.tkraise()
+        self.current_page = page
+        if hasattr(page, "on_show"):
+            page.on_show()
+
+    def evict_pages(self, keep):
+        """Destroys least recently used pages (never `keep`) until the cache is within both caps."""
+        total = sum(self.page_weights.values())
+        for cls in list(self.pages):
+            if len(self.pages) <= max(PAGE_CACHE_SIZE, 1) and total <= PAGE_CACHE_MAX_WIDGETS:
+                break
+            if self.pages[cls] is keep:
+                continue
+            total -= self.page_weights.pop(cls, 0)
+            self.pages.pop(cls).destroy()
+
+    def refresh_if_changed(self, page, seen_versions, refresh):
+        """For on_show(): runs refresh() only if the data versions moved since seen_versions."""
+        from database.data_versions import get_data_versions
+
+        def check(versions):
+            if versions is None or versions != seen_versions:
+                refresh()
+        self.executor.submit(get_data_versions, on_success=check, owner=page,
+                             key=f"{type(page).__name__}.versions")
+
+    def start_overdue_scheduler(self):
+        if self.overdue_scheduler is None:
+            from utils.overdue_scheduler import OverdueScheduler
+            self.overdue_scheduler = OverdueScheduler(self.root, self.executor, self.on_overdue)
+        self.overdue_scheduler.start()
+
+    def stop_overdue_scheduler(self):
+        if self.overdue_scheduler is not None:
+            self.overdue_scheduler.stop()
+
+    def on_overdue(self, count):
+        """
+        Borrows just became overdue: the page on screen may define on_overdue() to
+        redraw now. Cached pages see the bumped data version in on_show().
+        """
+        if self.current_page is not None and hasattr(self.current_page, "on_overdue"):
+            self.current_page.on_overdue()
+
+    # Signed-out pages are never cached
     def show_landing_page(self):
+        self.stop_overdue_scheduler()
         self.clear_container()
-        LandingPage(self.container, self).pack(fill="both", expand=True)
+        self.page_class("landing")(self.container, self).grid(row=0, column=0, sticky="nsew")
 
     def show_login_page(self):
+        self.stop_overdue_scheduler()
         self.clear_container()
-        LoginPage(self.container, self).pack(fill="both", expand=True)
+        self.page_class("login")(self.container, self).grid(row=0, column=0, sticky="nsew")
 
     def show_dashboard(self):
-        self.clear_container()
-        DashboardPage(self.container, self).pack(fill="both", expand=True)
+        # Coming from the login page: drop the signed-out page first
+        if self.current_page is None: self.clear_container()
+        self.show_page(self.page_class("dashboard"))
+        self.start_overdue_scheduler()
 
     def show_borrow_page(self):
-        self.clear_container()
-        BorrowPage(self.container, self).pack(fill="both", expand=True)
+        self.show_page(self.page_class("borrow"))
 
     def show_reports(self):
-        self.clear_container()
-        ReportsPage(self.container, self).pack(fill="both", expand=True)
+        self.show_page(self.page_class("reports"))
 
     def show_equipment_page(self):
-        self.clear_container()
-        EquipmentPage(self.container, self).pack(fill="both", expand=True)
+        self.show_page(self.page_class("equipment"))
 
     def show_profile_page(self):
-        self.clear_container()
-        ProfilePage(self.container, self).pack(fill="both", expand=True)
\ No newline at end of file
+        self.show_page(self.page_class("profile"))
@@ -4,10 +4,12 @@ from datetime import datetime, timedelta
 import calendar
 from utils.colors import COLORS
 from utils.session import Session
-from database.equipment_db import get_all_equipment
+from database.equipment_db import get_equipment_categories, get_equipment_by_ids, search_equipment
 from database.borrower_db import get_or_create_borrower
-from database.borrow_db import borrow_equipment
+from database.borrow_db import borrow_cart, BORROW_OK, BORROW_INSUFFICIENT_STOCK, BORROW_FAILED
+from database.data_versions import get_data_versions
 from utils.id_generator import generate_formatted_id
+from gui.equipment_picker import EquipmentPicker
 
 class CalendarPopup(tk.Toplevel):
     """A Custom, dependency-free Date Picker"""
@@ -108,11 +110,17 @@ class CalendarPopup(tk.Toplevel):
 
 
 class BorrowPage(tk.Frame):
+    SECTION_ROWS = 30   # Items listed when a category is opened; the rest are found through the search box
+
     def __init__(self, parent, controller):
         super().__init__(parent, bg=COLORS["bg_light"])
         self.controller = controller
         self.user = Session.get_user()
         self.selected_item_data = None
+        self.cart = {}  # equipment_id -> quantity, in the order added
+        self.cart_items = {}  # equipment_id -> equipment row (stock as last loaded)
+        self.sections = {}  # category -> accordion entry (see create_accordion)
+        self.data_versions = None  # Versions the item list was loaded at
         self.build_ui()
 
     def build_ui(self):
@@ -164,6 +172,7 @@ class BorrowPage(tk.Frame):
         dept = self.user.get('department', '')
         contact = self.user.get('contact', '')
 
+        self.shown_profile = (dept, contact)
         self.create_entry(form_card, "Full Name", val=uname, readonly=True)
         self.stu_id_ent = self.create_entry(form_card, "Student / Staff ID (Auto)", val=u_id_fmt, readonly=True)
         self.dept_ent = self.create_entry(form_card, "Department / Section", val=dept, readonly=False)
@@ -174,19 +183,9 @@ class BorrowPage(tk.Frame):
                  bg="white", fg=COLORS["primary_green"]).pack(anchor="w", pady=(20, 15))
 
         tk.Label(form_card, text="Select Item", bg="white", font=("Arial", 9, "bold"), fg="#555").pack(anchor="w")
-        self.inventory_map = {}
-        try:
-            all_items = get_all_equipment()
-            item_names = []
-            for i in all_items:
-                if i['quantity'] > 0 and i['condition'] != 'Broken':
-                    self.inventory_map[i['name']] = i
-                    item_names.append(i['name'])
-        except: item_names = []
-
-        self.item_cb = ttk.Combobox(form_card, values=item_names, state="readonly", font=("Arial", 10))
+        # Type part of a name or code; matches are searched on the server
+        self.item_cb = EquipmentPicker(form_card, self.controller.executor, self.on_item_select, font=("Arial", 10))
         self.item_cb.pack(fill="x", pady=(5, 10), ipady=4)
-        self.item_cb.bind("<<ComboboxSelected>>", self.on_item_select)
 
         # ID Row
         self.eq_id_entry = self.create_entry(form_card, "Equipment ID (Auto)", readonly=True)
@@ -234,10 +233,19 @@ class BorrowPage(tk.Frame):
         self.qty_spin.pack(side="left")
         self.max_lbl = tk.Label(qty_frame, text="(Max: -)", bg="white", fg="#999")
         self.max_lbl.pack(side="left", padx=10)
+        tk.Button(qty_frame, text="+ Add to Cart", bg="#E0E0E0", relief="flat",
+                  command=self.add_to_cart).pack(side="right")
+
+        # --- CART (several items borrowed in one transaction) ---
+        tk.Label(form_card, text="Cart", bg="white", font=("Arial", 9, "bold"), fg="#555").pack(anchor="w", pady=(10, 0))
+        self.cart_frame = tk.Frame(form_card, bg="#FAFAFA", padx=10, pady=5)
+        self.cart_frame.pack(fill="x", pady=5)
+        self.render_cart()
 
-        tk.Button(form_card, text="Confirm Borrow", bg=COLORS["primary_green"], fg="white", 
-                  font=("Arial", 11, "bold"), relief="flat", padx=20, pady=10,
-                  command=self.confirm).pack(side="bottom", pady=20, anchor="e")
+        self.confirm_btn = tk.Button(form_card, text="Confirm Borrow", bg=COLORS["primary_green"], fg="white", 
+                                     font=("Arial", 11, "bold"), relief="flat", padx=20, pady=10,
+                                     command=self.confirm)
+        self.confirm_btn.pack(side="bottom", pady=20, anchor="e")
 
         # ==========================
         # RIGHT: LIST (Accordion)
@@ -256,15 +264,69 @@ class BorrowPage(tk.Frame):
 
         tk.Label(self.scroll_content, text="Available Items", font=("Arial", 12, "bold"), 
                  bg="white", fg="#333").pack(anchor="w", pady=(0, 15))
-
-        cat_map = {}
-        for name, data in self.inventory_map.items():
-            c = data['category']
-            if c not in cat_map: cat_map[c] = []
-            cat_map[c].append(data)
-
-        for cat, items in cat_map.items():
-            self.create_accordion(self.scroll_content, cat, items)
+        self.accordion_frame = tk.Frame(self.scroll_content, bg="white")
+        self.accordion_frame.pack(fill="x")
+        tk.Label(self.accordion_frame, text="Loading...", bg="white", fg="#999").pack(anchor="w")
+
+        self.load_items()
+
+    # --- PAGE LIFECYCLE (called by TrackLabApp.show_page) ---
+    def on_show(self):
+        # The Profile page may have changed these since the form was filled in
+        profile = (self.user.get('department', ''), self.user.get('contact', ''))
+        if profile != self.shown_profile:
+            for ent, val in ((self.dept_ent, profile[0]), (self.contact_ent, profile[1])):
+                ent.delete(0, tk.END); ent.insert(0, val or "")
+            self.shown_profile = profile
+        # Stock only needs reloading if someone borrowed, returned or edited items meanwhile
+        if self.data_versions is not None:
+            self.controller.refresh_if_changed(self, self.data_versions, self.load_items)
+
+    def load_items(self):
+        held = list(self.cart)
+        if self.selected_item_data: held.append(self.selected_item_data['equipment_id'])
+        self.controller.executor.submit(self.fetch_items, held, on_success=self.show_available_items,
+                                        on_error=lambda e: self.show_available_items((None, [], {})),
+                                        owner=self, key="borrow.items")
+
+    @staticmethod
+    def fetch_items(held):
+        """Runs on a worker thread: category counts, plus fresh stock for the items in the form."""
+        return get_data_versions(), get_equipment_categories(available_only=True), get_equipment_by_ids(held)
+
+    @staticmethod
+    def available(item):
+        return item is not None and item['quantity'] > 0 and item['condition'] != 'Broken'
+
+    def show_available_items(self, result):
+        self.data_versions, categories, held = result
+
+        # Items that ran out meanwhile drop out of the cart
+        for eq_id in list(self.cart):
+            if self.available(held.get(eq_id)):
+                self.cart_items[eq_id] = held[eq_id]
+            else:
+                del self.cart[eq_id]
+                self.cart_items.pop(eq_id, None)
+        self.render_cart()
+
+        # Keep the selection (with its fresh stock level) if the item is still available
+        item = held.get(self.selected_item_data['equipment_id']) if self.selected_item_data else None
+        if self.available(item):
+            self.item_cb.show(item)
+            self.on_item_select(item)
+        elif self.selected_item_data:
+            self.selected_item_data = None
+            self.item_cb.clear()
+        self.item_cb.refresh()
+
+        # Sections are rebuilt closed; their items load when opened
+        for widget in self.accordion_frame.winfo_children(): widget.destroy()
+        self.sections = {}
+        if not categories:
+            tk.Label(self.accordion_frame, text="No items available.", bg="white", fg="#999").pack(anchor="w")
+        for cat in categories:
+            self.sections[cat['category']] = self.create_accordion(self.accordion_frame, cat['category'], cat['items'])
 
     def open_calendar(self):
         CalendarPopup(self.winfo_toplevel(), lambda date: self.date_var.set(date))
@@ -279,32 +341,54 @@ class BorrowPage(tk.Frame):
         if readonly: e.config(state="readonly")
         return e
 
-    def create_accordion(self, parent, title, items):
+    def create_accordion(self, parent, title, count):
         wrapper = tk.Frame(parent, bg="white", pady=2)
         wrapper.pack(fill="x")
         content = tk.Frame(wrapper, bg="#F9F9F9", padx=10)
+        section = {'content': content, 'loaded': False}
+        header = f"{title} ({count})"
         
         def toggle():
             if content.winfo_ismapped():
                 content.pack_forget()
-                btn.config(text=f"▶ {title}")
+                btn.config(text=f"▶ {header}")
             else:
                 content.pack(fill="x")
-                btn.config(text=f"▼ {title}")
+                btn.config(text=f"▼ {header}")
+                if not section['loaded']: self.load_section(title, section)
 
-        btn = tk.Button(wrapper, text=f"▶ {title}", bg="#F0F0F0", relief="flat", anchor="w", command=toggle, font=("Arial", 10, "bold"))
+        btn = tk.Button(wrapper, text=f"▶ {header}", bg="#F0F0F0", relief="flat", anchor="w", command=toggle, font=("Arial", 10, "bold"))
         btn.pack(fill="x", ipady=5)
-
-        for i in items:
-            row = tk.Frame(content, bg="#F9F9F9", pady=2)
+        return section
+
+    def load_section(self, category, section):
+        section['loaded'] = True
+        tk.Label(section['content'], text="Loading...", bg="#F9F9F9", fg="#999").pack(anchor="w")
+        # One extra row tells whether there are more than fit
+        self.controller.executor.submit(search_equipment, "", category, True, self.SECTION_ROWS + 1,
+                                        on_success=lambda items: self.show_section(section, items),
+                                        on_error=lambda e: section.update(loaded=False),
+                                        owner=section['content'], key=f"borrow.section.{category}")
+
+    def show_section(self, section, items):
+        content = section['content']
+        for widget in content.winfo_children(): widget.destroy()
+        for i in items[:self.SECTION_ROWS]:
+            row = tk.Frame(content, bg="#F9F9F9", pady=2, cursor="hand2")
             row.pack(fill="x")
-            tk.Label(row, text=i['name'], bg="#F9F9F9", width=20, anchor="w").pack(side="left")
-            tk.Label(row, text=f"Qty: {i['quantity']}", bg="#F9F9F9", fg=COLORS["primary_green"], font=("Arial", 9, "bold")).pack(side="right")
-
-    def on_item_select(self, event):
-        name = self.item_cb.get()
-        if name in self.inventory_map:
-            self.selected_item_data = self.inventory_map[name]
+            name = tk.Label(row, text=i['name'], bg="#F9F9F9", width=20, anchor="w")
+            name.pack(side="left")
+            qty = tk.Label(row, text=f"Qty: {i['quantity']}", bg="#F9F9F9", fg=COLORS["primary_green"], font=("Arial", 9, "bold"))
+            qty.pack(side="right")
+            # Clicking an item selects it in the form
+            for widget in (row, name, qty):
+                widget.bind("<Button-1>", lambda e, item=i: (self.item_cb.show(item), self.on_item_select(item)))
+        if len(items) > self.SECTION_ROWS:
+            tk.Label(content, text="More items: type a name in Select Item.", bg="#F9F9F9", fg="#999").pack(anchor="w")
+
+    def on_item_select(self, item):
+        if item is not None:
+            self.selected_item_data = item
             self.eq_id_entry.config(state="normal")
             self.eq_id_entry.delete(0, tk.END)
             self.eq_id_entry.insert(0, self.selected_item_data['code'])
@@ -314,10 +398,51 @@ class BorrowPage(tk.Frame):
             self.qty_spin.config(to=max_q)
             self.qty_spin.set(1)
 
-    def confirm(self):
+    def add_to_cart(self):
         if not self.selected_item_data:
             messagebox.showerror("Error", "Please select an item.")
             return
+        try:
+            qty = int(self.qty_spin.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid Quantity")
+            return
+
+        eq_id = self.selected_item_data['equipment_id']
+        total = self.cart.get(eq_id, 0) + qty
+        if qty < 1 or total > self.selected_item_data['quantity']:
+            messagebox.showerror("Error", "Not enough stock.")
+            return
+        self.cart[eq_id] = total
+        self.cart_items[eq_id] = self.selected_item_data
+        self.render_cart()
+
+    def remove_from_cart(self, eq_id):
+        self.cart.pop(eq_id, None)
+        self.cart_items.pop(eq_id, None)
+        self.render_cart()
+
+    def render_cart(self):
+        for widget in self.cart_frame.winfo_children(): widget.destroy()
+
+        if not self.cart:
+            tk.Label(self.cart_frame, text="Cart is empty - the selected item is borrowed on its own.",
+                     bg="#FAFAFA", fg="#999").pack(anchor="w")
+            return
+
+        for eq_id, qty in self.cart.items():
+            row = tk.Frame(self.cart_frame, bg="#FAFAFA")
+            row.pack(fill="x", pady=1)
+            tk.Label(row, text=self.cart_items[eq_id]['name'], bg="#FAFAFA", anchor="w").pack(side="left")
+            tk.Button(row, text="✕", bg="#FAFAFA", fg="#999", relief="flat", cursor="hand2",
+                      command=lambda i=eq_id: self.remove_from_cart(i)).pack(side="right")
+            tk.Label(row, text=f"x{qty}", bg="#FAFAFA", fg=COLORS["primary_green"],
+                     font=("Arial", 9, "bold")).pack(side="right", padx=10)
+
+    def confirm(self):
+        if not self.cart and not self.selected_item_data:
+            messagebox.showerror("Error", "Please select an item.")
+            return
 
         # 1. VALIDATE TIME LIMIT
         try:
@@ -341,26 +466,73 @@ class BorrowPage(tk.Frame):
             messagebox.showerror("Error", "Invalid Date or Time.")
             return
 
-        # 2. PROCEED
-        try:
-            qty = int(self.qty_spin.get())
-            if qty > self.selected_item_data['quantity']:
+        # 2. PROCEED (an empty cart borrows just the selected item)
+        if self.cart:
+            lines = list(self.cart.items())
+        else:
+            try:
+                qty = int(self.qty_spin.get())
+            except ValueError:
+                messagebox.showerror("Error", "Invalid Quantity")
+                return
+            if qty < 1 or qty > self.selected_item_data['quantity']:
                 messagebox.showerror("Error", "Not enough stock.")
                 return
-            
-            uname = self.user.get('username', 'Guest')
-            contact = self.contact_ent.get()
-            dept = self.dept_ent.get()
-            stu_id = self.stu_id_ent.get() 
-
-            b_id = get_or_create_borrower(stu_id, uname, contact, dept)
-            
-            # PASS THE RETURN DATE TO DB
-            if borrow_equipment(self.selected_item_data['equipment_id'], b_id, datetime.now(), return_dt, "Standard Borrow"):
-                messagebox.showinfo("Success", f"Successfully borrowed. Due: {return_dt.strftime('%b %d, %I:%M %p')}")
-                self.controller.show_dashboard()
-            else:
-                messagebox.showerror("Error", "Transaction Failed.")
-
-        except ValueError:
-            messagebox.showerror("Error", "Invalid Quantity")
\ No newline at end of file
+            lines = [(self.selected_item_data['equipment_id'], qty)]
+
+        uname = self.user.get('username', 'Guest')
+        contact = self.contact_ent.get()
+        dept = self.dept_ent.get()
+        stu_id = self.stu_id_ent.get()
+
+        self.set_busy(True)
+        self.controller.executor.submit(self.submit_borrow, stu_id, uname, contact, dept,
+                                        self.user.get('user_id'), lines, return_dt,
+                                        on_success=lambda result: self.on_borrow_done(result, return_dt),
+                                        on_error=self.on_borrow_failed, owner=self, key="borrow.confirm")
+
+    @staticmethod
+    def submit_borrow(stu_id, uname, contact, dept, user_id, lines, return_dt):
+        """Runs on a worker thread: resolves the borrower, then borrows the whole cart at once."""
+        b_id = get_or_create_borrower(stu_id, uname, contact, dept, user_id)
+        if not b_id:
+            return BORROW_FAILED, []
+        return borrow_cart(b_id, lines, datetime.now(), return_dt, "Standard Borrow")
+
+    def reset_form(self):
+        """Clears the selection and cart so the cached page is ready for the next borrow."""
+        self.cart.clear()
+        self.cart_items.clear()
+        self.render_cart()
+        self.selected_item_data = None
+        self.item_cb.clear()
+        self.eq_id_entry.config(state="normal"); self.eq_id_entry.delete(0, tk.END); self.eq_id_entry.config(state="readonly")
+        self.max_lbl.config(text="(Max: -)")
+        self.qty_spin.config(to=1); self.qty_spin.set(1)
+
+    def set_busy(self, busy):
+        if busy:
+            self.confirm_btn.config(state="disabled", text="Please wait...")
+        else:
+            self.confirm_btn.config(state="normal", text="Confirm Borrow")
+
+    def on_borrow_failed(self, error):
+        self.set_busy(False)
+        messagebox.showerror("Error", f"Database Error: {error}")
+
+    def on_borrow_done(self, result, return_dt):
+        self.set_busy(False)
+        status, short_ids = result
+        if status == BORROW_OK:
+            messagebox.showinfo("Success", f"Successfully borrowed. Due: {return_dt.strftime('%b %d, %I:%M %p')}")
+            self.reset_form()
+            self.controller.show_dashboard()
+        elif status == BORROW_INSUFFICIENT_STOCK:
+            held = dict(self.cart_items)
+            if self.selected_item_data: held.setdefault(self.selected_item_data['equipment_id'], self.selected_item_data)
+            names = [held[eq_id]['name'] for eq_id in short_ids if eq_id in held]
+            messagebox.showerror("Not Enough Stock",
+                                 "Someone else just borrowed some of these items. Not enough stock is left for:\n"
+                                 + "\n".join(names or ["(unknown item)"]))
+        else:
+            messagebox.showerror("Error", "Transaction Failed.")
@@ -1,19 +1,24 @@
 import tkinter as tk
-from tkinter import ttk
-from PIL import Image, ImageTk, ImageDraw, ImageOps 
-import os
+from tkinter import ttk, messagebox
 import random
 
 from utils.colors import COLORS
 from utils.session import Session
 from utils.id_generator import generate_formatted_id
+from utils.avatars import avatar_image
 # FIX: Removed circular import here
 
-from gui.popups import BorrowPopup, ReturnPopup
+from gui.popups import BorrowPopup, ReturnPopup, BulkReturnPopup
+from gui.virtual_list import VirtualList
 from database.borrow_db import get_active_borrows, delete_borrow_transaction 
-from database.equipment_db import get_all_equipment
+from database.equipment_db import get_equipment_categories, search_equipment
+from database.data_versions import get_data_versions
 
 class DashboardPage(tk.Frame):
+    POLL_MS = 5000  # How often to check the data versions for changes made elsewhere
+    CARD_HEIGHT = 84  # Borrower cards are recycled by a VirtualList, so they have a fixed height
+    SECTION_ROWS = 25  # Inventory rows loaded per category (and per "Show more")
+
     def __init__(self, parent, controller):
         super().__init__(parent, bg=COLORS["bg_light"])
         self.controller = controller
@@ -23,11 +28,36 @@ class DashboardPage(tk.Frame):
         self.user_db_id = self.user.get('user_id', 0) if self.user else 0
         self.my_formatted_id = generate_formatted_id(self.user_role, self.user_db_id)
         
-        self.image_refs = []
+        self.active_borrows = []
+        # Inventory widgets, keyed so a refresh only touches rows that changed
+        self.inv_sections = {}    # category -> accordion entry (see create_accordion)
+        self.data_versions = None   # Versions the cards on screen were built from
+        self.poll_job = None
         
         self.build_ui()
+
+    # --- PAGE LIFECYCLE (called by TrackLabApp.show_page) ---
+    def on_show(self):
+        # First visit loads everything; later visits only check whether anything changed
+        if self.data_versions is None:
+            self.refresh_data()
+            self.poll_job = self.after(self.POLL_MS, self.poll_versions)
+        else:
+            self.poll_versions()
+
+    def on_hide(self):
+        # No polling while another page is on top
+        if self.poll_job: self.after_cancel(self.poll_job)
+        self.poll_job = None
+
+    def on_overdue(self):
+        # Pushed by the overdue scheduler the moment a borrow falls due
         self.refresh_data()
 
+    def destroy(self):
+        self.on_hide()
+        super().destroy()
+
     def build_ui(self):
         nav_bar = tk.Frame(self, bg="white", height=60, padx=20)
         nav_bar.pack(side="top", fill="x", pady=(0, 2))
@@ -61,17 +91,16 @@ class DashboardPage(tk.Frame):
         left_panel = tk.Frame(content, bg=COLORS["bg_light"])
         left_panel.grid(row=0, column=0, sticky="nsew", padx=(0, 20))
 
-        tk.Label(left_panel, text="Current Equipment Holders", font=("Arial", 14, "bold"), bg=COLORS["bg_light"], fg=COLORS["text_dark"]).pack(anchor="w", pady=(0, 10))
+        l_head = tk.Frame(left_panel, bg=COLORS["bg_light"])
+        l_head.pack(fill="x", pady=(0, 10))
+        tk.Label(l_head, text="Current Equipment Holders", font=("Arial", 14, "bold"), bg=COLORS["bg_light"], fg=COLORS["text_dark"]).pack(side="left")
+        tk.Button(l_head, text="↩ Bulk Return", bg="#E3F2FD", fg="#1976D2", relief="flat", font=("Arial", 9, "bold"), padx=8,
+                  command=self.open_bulk_return).pack(side="right")
         
-        self.left_canvas = tk.Canvas(left_panel, bg="white", highlightthickness=0)
-        sb_left = ttk.Scrollbar(left_panel, orient="vertical", command=self.left_canvas.yview)
-        self.borrower_frame = tk.Frame(self.left_canvas, bg="white", padx=10, pady=10)
-        self.borrower_frame.bind("<Configure>", lambda e: self.left_canvas.configure(scrollregion=self.left_canvas.bbox("all")))
-        self.left_canvas.create_window((0, 0), window=self.borrower_frame, anchor="nw", width=550)
-        self.left_canvas.configure(yscrollcommand=sb_left.set)
-        self.left_canvas.pack(side="left", fill="both", expand=True)
-        sb_left.pack(side="right", fill="y")
-        self.left_canvas.bind("<Configure>", lambda e: self.left_canvas.itemconfig(self.left_canvas.find_all()[0], width=e.width))
+        # Only the cards in view are built; they are reused as the list scrolls
+        self.borrow_list = VirtualList(left_panel, self.CARD_HEIGHT, self.create_borrower_card,
+                                       self.update_borrower_card, key=lambda b: b['borrow_id'])
+        self.borrow_list.pack(fill="both", expand=True)
 
         tk.Button(left_panel, text="+ Quick Borrow", bg=COLORS["primary_green"], fg="white", relief="flat", pady=12, font=("Arial", 11, "bold"), command=self.open_quick_borrow).place(relx=0.05, rely=0.9, relwidth=0.9)
 
@@ -93,38 +122,139 @@ class DashboardPage(tk.Frame):
         sb_right.pack(side="right", fill="y")
         self.right_canvas.bind("<Configure>", lambda e: self.right_canvas.itemconfig("window", width=e.width))
 
+        # Placeholder / empty-state label, shown only while there are no rows
+        self.inv_msg = tk.Label(self.inv_frame, bg="white", fg="#999")
+
     def refresh_data(self):
         print(f"[Dashboard] Refreshing data...")
-        self.image_refs.clear()
-        for w in self.borrower_frame.winfo_children(): w.destroy()
-        for w in self.inv_frame.winfo_children(): w.destroy()
-
-        borrows = get_active_borrows(None)
-        
-        if not borrows:
-            tk.Label(self.borrower_frame, text="No active borrows.", bg="white", fg="#999").pack(pady=20)
+        # First load: show placeholders. Later refreshes keep the old cards until new data arrives.
+        if self.data_versions is None:
+            self.borrow_list.set_message("Loading active borrows...")
+            self.inv_msg.config(text="Loading inventory..."); self.inv_msg.pack(pady=20)
+
+        self.controller.executor.submit(self.fetch_data, on_success=self.render_data,
+                                        owner=self, key="dashboard.refresh")
+
+    def poll_versions(self):
+        """Auto-refresh: one tiny query, and a full reload only when something changed."""
+        self.poll_job = self.after(self.POLL_MS, self.poll_versions)
+        self.controller.executor.submit(get_data_versions, on_success=self.on_versions,
+                                        owner=self, key="dashboard.poll")
+
+    def on_versions(self, versions):
+        if versions and versions != self.data_versions:
+            self.refresh_data()
+
+    @staticmethod
+    def fetch_data():
+        """Runs on a worker thread. Versions are read first so a write during the fetch triggers another refresh."""
+        return get_data_versions(), get_active_borrows(None), get_equipment_categories()
+
+    def render_data(self, result):
+        versions, borrows, categories = result
+        self.data_versions = versions
+        self.active_borrows = borrows
+        self.render_borrows(borrows)
+        self.render_inventory(categories)
+
+    @staticmethod
+    def sync_order(entries, keys, widget_of):
+        """
+        Packs keyed widgets in the order of `keys`. New widgets are slotted in with
+        pack(before=...); everything is re-packed only when existing rows moved.
+        """
+        packed = [k for k in entries if entries[k]['packed']]
+        if packed == [k for k in keys if entries[k]['packed']]:
+            next_packed = None
+            for k in reversed(keys):
+                entry = entries[k]
+                if not entry['packed']:
+                    if next_packed is None: widget_of(entry).pack(fill="x")
+                    else: widget_of(entry).pack(fill="x", before=next_packed)
+                    entry['packed'] = True
+                next_packed = widget_of(entry)
         else:
-            for b in borrows:
-                self.create_borrower_card(b)
-
-        equipment = get_all_equipment()
-        cats = {}
-        for item in equipment:
-            c = item.get('category', 'Others')
-            if c not in cats: cats[c] = []
-            cats[c].append(item)
-
-        if not cats:
-             tk.Label(self.inv_frame, text="Inventory empty.", bg="white", fg="#999").pack(pady=20)
+            for k in packed: widget_of(entries[k]).pack_forget()
+            for k in keys:
+                widget_of(entries[k]).pack(fill="x")
+                entries[k]['packed'] = True
+        # Dict order tracks pack order so the next comparison is cheap
+        reordered = {k: entries.pop(k) for k in keys}
+        entries.update(reordered)
+
+    def render_borrows(self, borrows):
+        """The VirtualList only touches the visible cards whose borrow changed."""
+        self.borrow_list.set_message("" if borrows else "No active borrows.")
+        self.borrow_list.set_items(borrows)
+
+    def render_inventory(self, categories):
+        """
+        Accordions keyed by category, rows keyed by equipment_id (open/closed state survives refreshes).
+        Only the categories and their counts are fetched up front; a section's rows
+        are loaded when it is opened, SECTION_ROWS at a time.
+        """
+        cats = {c['category']: c['items'] for c in categories}
+
+        for c_name in [c for c in self.inv_sections if c not in cats]:
+            self.inv_sections.pop(c_name)['wrapper'].destroy()
+
+        for c_name, count in cats.items():
+            section = self.inv_sections.get(c_name)
+            if section is None:
+                section = self.inv_sections[c_name] = self.create_accordion(c_name)
+            section['count'].config(text=f"({count})")
+            if section['loaded']:
+                self.load_section(c_name)   # Stock may have changed
+
+        if cats:
+            self.inv_msg.pack_forget()
         else:
-            for c_name, items in cats.items():
-                self.create_accordion(c_name, items)
+            self.inv_msg.config(text="Inventory empty."); self.inv_msg.pack(pady=20)
+        self.sync_order(self.inv_sections, list(cats), lambda e: e['wrapper'])
+
+    def load_section(self, c_name):
+        section = self.inv_sections[c_name]
+        section['loaded'] = True
+        # One extra row tells whether "Show more" is needed
+        self.controller.executor.submit(search_equipment, "", c_name, False, section['limit'] + 1,
+                                        on_success=lambda items: self.show_section(c_name, items),
+                                        owner=section['wrapper'], key=f"dashboard.inv.{c_name}")
+
+    def show_section(self, c_name, items):
+        section = self.inv_sections.get(c_name)
+        if section is None: return
+        self.render_item_rows(section, items[:section['limit']])
+        if len(items) > section['limit']:
+            section['more'].pack(fill="x")
+        else:
+            section['more'].pack_forget()
+
+    def show_more(self, c_name):
+        self.inv_sections[c_name]['limit'] += self.SECTION_ROWS
+        self.load_section(c_name)
 
-    def create_borrower_card(self, data):
-        card = tk.Frame(self.borrower_frame, bg="white")
-        card.pack(fill="x", pady=0)
+    def render_item_rows(self, section, items):
+        rows = section['rows']
+        by_id = {item['equipment_id']: item for item in items}
+
+        for eq_id in [k for k in rows if k not in by_id]:
+            rows.pop(eq_id)['holder'].destroy()
+
+        for eq_id, item in by_id.items():
+            entry = rows.get(eq_id)
+            if entry is None:
+                rows[eq_id] = self.create_item_row(section['content'], item)
+            elif entry['data'] != item:
+                self.update_item_row(entry, item)
+
+        self.sync_order(rows, list(by_id), lambda e: e['holder'])
+
+    def create_borrower_card(self, parent):
+        """Builds one reusable card; update_borrower_card() fills it for whichever borrow it shows."""
+        card = tk.Frame(parent, bg="white")
+        entry = {'frame': card, 'data': None, 'avatar_key': None, 'actions': None}
         
-        container = tk.Frame(card, bg="white", padx=5, pady=8)
+        container = tk.Frame(card, bg="white", padx=15, pady=8)
         container.pack(fill="x")
 
         # --- 1. AVATAR (LEFT) ---
@@ -132,14 +262,8 @@ class DashboardPage(tk.Frame):
         avatar_frame.pack_propagate(False)
         avatar_frame.pack(side="left", padx=(0, 10), anchor="n")
         
-        img_path = data.get('profile_image')
-        user_name = data.get('full_name', 'Unknown')
-        
-        tk_img = self.get_circle_image(img_path, 50, user_name)
-        self.image_refs.append(tk_img)
-        
-        lbl_img = tk.Label(avatar_frame, image=tk_img, bg="white")
-        lbl_img.place(relx=0.5, rely=0.5, anchor="center")
+        entry['img'] = tk.Label(avatar_frame, bg="white")
+        entry['img'].place(relx=0.5, rely=0.5, anchor="center")
 
         # --- 2. INFO & ACTIONS (RIGHT) ---
         info_frame = tk.Frame(container, bg="white")
@@ -148,43 +272,69 @@ class DashboardPage(tk.Frame):
         top = tk.Frame(info_frame, bg="white")
         top.pack(fill="x")
         
-        borrower_id_str = data.get('student_id', '')
-        is_me = (borrower_id_str == self.my_formatted_id)
-        name_fg = COLORS["primary_green"] if is_me else "#333"
-        
-        tk.Label(top, text=user_name, font=("Arial", 11, "bold"), bg="white", fg=name_fg).pack(side="left")
+        entry['name'] = tk.Label(top, font=("Arial", 11, "bold"), bg="white")
+        entry['name'].pack(side="left")
         
         action_frame = tk.Frame(top, bg="white")
         action_frame.pack(side="right")
 
-        if self.user_role == "Admin":
-            tk.Button(action_frame, text="🗑 Void", bg="#FFEBEE", fg="#D32F2F", relief="flat", font=("Arial", 8, "bold"), padx=5, 
-                      command=lambda d=data: self.void_borrow_admin(d)).pack(side="right", padx=(5,0))
-            
-            tk.Button(action_frame, text="↩ Return", bg="#E3F2FD", fg="#1976D2", relief="flat", font=("Arial", 8, "bold"), padx=8, 
-                      command=lambda d=data: self.open_return(d)).pack(side="right")
-        
-        elif is_me:
-            tk.Button(action_frame, text="↩ Return", bg="#E3F2FD", fg="#1976D2", relief="flat", font=("Arial", 8, "bold"), padx=8, 
-                      command=lambda d=data: self.open_return(d)).pack(side="right")
-        else:
-            tk.Label(action_frame, text="🔒 In Use", bg="white", fg="#999", font=("Arial", 8)).pack(side="right", padx=5)
-
+        # All action widgets exist on every card; update_borrower_card() shows the ones this user may use.
+        # They read entry['data'] at click time, so a recycled card acts on the borrow it currently shows.
+        entry['void_btn'] = tk.Button(action_frame, text="🗑 Void", bg="#FFEBEE", fg="#D32F2F", relief="flat", font=("Arial", 8, "bold"), padx=5, 
+                                      command=lambda: self.void_borrow_admin(entry['data']))
+        entry['return_btn'] = tk.Button(action_frame, text="↩ Return", bg="#E3F2FD", fg="#1976D2", relief="flat", font=("Arial", 8, "bold"), padx=8, 
+                                        command=lambda: self.open_return(entry['data']))
+        entry['lock_lbl'] = tk.Label(action_frame, text="🔒 In Use", bg="white", fg="#999", font=("Arial", 8))
 
-        tk.Label(info_frame, text=f"{data['student_id']} | {data['department']}", font=("Arial", 8), bg="white", fg="#777").pack(anchor="w")
-        tk.Label(info_frame, text=data['item_name'], font=("Arial", 10), bg="white", fg="#444").pack(anchor="w", pady=(3,0))
+        entry['id'] = tk.Label(info_frame, font=("Arial", 8), bg="white", fg="#777")
+        entry['id'].pack(anchor="w")
+        entry['item'] = tk.Label(info_frame, font=("Arial", 10), bg="white", fg="#444")
+        entry['item'].pack(anchor="w", pady=(3,0))
 
         bot = tk.Frame(info_frame, bg="white")
         bot.pack(fill="x", pady=(2,0))
         
-        due_time = data.get('due_time', 'N/A')
-        tk.Label(bot, text=f"Due: {due_time}", font=("Arial", 9), bg="white", fg="#555").pack(side="left")
-        
+        entry['due'] = tk.Label(bot, font=("Arial", 9), bg="white", fg="#555")
+        entry['due'].pack(side="left")
+        entry['status'] = tk.Label(bot, font=("Arial", 8, "bold"), bg="white")
+        entry['status'].pack(side="right")
+
+        ttk.Separator(card, orient="horizontal").pack(fill="x", side="bottom")
+        return entry
+
+    def update_borrower_card(self, entry, data):
+        user_name = data.get('full_name', 'Unknown')
+
+        # Avatars are the expensive part: only swap when the picture or name changed
+        avatar_key = (data.get('profile_image'), user_name)
+        if avatar_key != entry['avatar_key']:
+            entry['avatar'] = avatar_image(avatar_key[0], 50, user_name)  # Card keeps its own reference
+            entry['img'].config(image=entry['avatar'])
+            entry['avatar_key'] = avatar_key
+
+        is_me = (data.get('student_id', '') == self.my_formatted_id)
+        entry['name'].config(text=user_name, fg=COLORS["primary_green"] if is_me else "#333")
+
+        actions = "admin" if self.user_role == "Admin" else "owner" if is_me else "locked"
+        if actions != entry['actions']:
+            for w in (entry['void_btn'], entry['return_btn'], entry['lock_lbl']): w.pack_forget()
+            if actions == "admin":
+                entry['void_btn'].pack(side="right", padx=(5,0))
+                entry['return_btn'].pack(side="right")
+            elif actions == "owner":
+                entry['return_btn'].pack(side="right")
+            else:
+                entry['lock_lbl'].pack(side="right", padx=5)
+            entry['actions'] = actions
+
+        entry['id'].config(text=f"{data['student_id']} | {data['department']}")
+        entry['item'].config(text=data['item_name'])
+        entry['due'].config(text=f"Due: {data.get('due_time', 'N/A')}")
+
         status_text = data.get('status', 'Ongoing')
         status_col = COLORS["overdue"] if status_text == "Overdue" else COLORS["ongoing"]
-        tk.Label(bot, text=f"● {status_text}", font=("Arial", 8, "bold"), bg="white", fg=status_col).pack(side="right")
-
-        ttk.Separator(card, orient="horizontal").pack(fill="x")
+        entry['status'].config(text=f"● {status_text}", fg=status_col)
+        entry['data'] = data
 
     def void_borrow_admin(self, data):
         borrow_id = data['borrow_id']
@@ -194,74 +344,90 @@ class DashboardPage(tk.Frame):
                                f"WARNING: You are about to DELETE the borrow record for '{item_name}' (ID: {borrow_id}) and RESTORE the item to inventory.\n\n"
                                "This action should ONLY be used if the record is void or the item is permanently lost/broken."
                                "\n\nContinue?"):
-            from database.borrow_db import delete_borrow_transaction 
-            if delete_borrow_transaction(borrow_id):
-                messagebox.showinfo("Success", f"Borrow transaction {borrow_id} voided. Item '{item_name}' quantity restored.")
-                self.refresh_data()
-            else:
-                messagebox.showerror("Error", "Failed to void transaction due to database error.")
-
-    def get_circle_image(self, path, size, name_for_initials):
-        try:
-            if path and os.path.exists(path):
-                img = Image.open(path)
-                img = ImageOps.fit(img, (size, size), method=Image.Resampling.LANCZOS)
-                mask = Image.new('L', (size, size), 0)
-                draw = ImageDraw.Draw(mask)
-                draw.ellipse((0, 0, size, size), fill=255)
-                circular = Image.new('RGBA', (size, size), (0,0,0,0))
-                circular.paste(img, (0, 0), mask)
-                return ImageTk.PhotoImage(circular)
-        except:
-            pass
-
-        colors = ["#FFCDD2", "#F8BBD0", "#E1BEE7", "#D1C4E9", "#C5CAE9", "#BBDEFB", "#B3E5FC", "#B2EBF2", "#B2DFDB", "#C8E6C9", "#DCEDC8", "#F0F4C3", "#FFF9C4", "#FFECB3", "#FFE0B2", "#FFCCBC"]
-        bg_color = colors[len(name_for_initials) % len(colors)]
-        base = Image.new('RGBA', (size, size), (0,0,0,0))
-        draw = ImageDraw.Draw(base)
-        draw.ellipse((0, 0, size, size), fill=bg_color)
-        return ImageTk.PhotoImage(base)
-
-    def create_accordion(self, title, items):
+            self.controller.executor.submit(delete_borrow_transaction, borrow_id,
+                                            on_success=lambda ok: self.on_voided(ok, borrow_id, item_name),
+                                            on_error=lambda e: messagebox.showerror("Error", f"Database Error: {e}"),
+                                            owner=self, key=f"dashboard.void.{borrow_id}")
+
+    def on_voided(self, ok, borrow_id, item_name):
+        if ok:
+            messagebox.showinfo("Success", f"Borrow transaction {borrow_id} voided. Item '{item_name}' quantity restored.")
+            self.refresh_data()
+        else:
+            messagebox.showerror("Error", "Failed to void transaction due to database error.")
+
+    def create_accordion(self, title):
         wrapper = tk.Frame(self.inv_frame, bg="white", pady=2)
-        wrapper.pack(fill="x")
         btn = tk.Frame(wrapper, bg="#F1F8E9", height=30, cursor="hand2")
         btn.pack(fill="x")
         btn.pack_propagate(False)
-        tk.Label(btn, text="▼", bg="#F1F8E9", fg=COLORS["dark_green"], font=("Arial", 8)).pack(side="left", padx=10)
+        arrow = tk.Label(btn, text="▶", bg="#F1F8E9", fg=COLORS["dark_green"], font=("Arial", 8))
+        arrow.pack(side="left", padx=10)
         tk.Label(btn, text=title, bg="#F1F8E9", fg=COLORS["dark_green"], font=("Arial", 10, "bold")).pack(side="left")
-        content = tk.Frame(wrapper, bg="white", padx=10)
-        content.pack(fill="x")
+        lbl_count = tk.Label(btn, bg="#F1F8E9", fg="#888", font=("Arial", 9))
+        lbl_count.pack(side="left", padx=5)
+        body = tk.Frame(wrapper, bg="white", padx=10)
+        content = tk.Frame(body, bg="white")
+        # Sections start closed; the rows are fetched the first time one is opened
         def toggle(e):
-            if content.winfo_ismapped(): content.pack_forget()
-            else: content.pack(fill="x")
-        btn.bind("<Button-1>", toggle)
+            if body.winfo_manager():
+                body.pack_forget(); arrow.config(text="▶")
+            else:
+                body.pack(fill="x"); arrow.config(text="▼")
+                if not self.inv_sections[title]['loaded']: self.load_section(title)
+        for widget in btn.winfo_children() + [btn]: widget.bind("<Button-1>", toggle)
         
-        h = tk.Frame(content, bg="white", pady=5)
+        h = tk.Frame(body, bg="white", pady=5)
         h.pack(fill="x")
         tk.Label(h, text="Item Name", width=20, anchor="w", font=("Arial", 8, "bold"), bg="white", fg="#888").pack(side="left")
         tk.Label(h, text="Qty", width=5, anchor="center", font=("Arial", 8, "bold"), bg="white", fg="#888").pack(side="left")
         tk.Label(h, text="Status", width=12, anchor="w", font=("Arial", 8, "bold"), bg="white", fg="#888").pack(side="left", padx=(10,0))
+        content.pack(fill="x")
+        more = tk.Button(body, text="Show more", bg="white", fg=COLORS["primary_green"], relief="flat",
+                         cursor="hand2", font=("Arial", 9), command=lambda: self.show_more(title))
 
-        for item in items: self.create_item_row(content, item)
+        return {'wrapper': wrapper, 'content': content, 'count': lbl_count, 'more': more, 'packed': False,
+                'rows': {}, 'loaded': False, 'limit': self.SECTION_ROWS}
 
     def create_item_row(self, parent, item):
-        row = tk.Frame(parent, bg="white", pady=2)
+        # Row + separator share a holder so one key maps to one packed widget
+        holder = tk.Frame(parent, bg="white")
+        row = tk.Frame(holder, bg="white", pady=2)
         row.pack(fill="x")
-        tk.Label(row, text=item['name'], width=22, anchor="w", font=("Arial", 9), bg="white").pack(side="left")
+        lbl_name = tk.Label(row, width=22, anchor="w", font=("Arial", 9), bg="white")
+        lbl_name.pack(side="left")
+        lbl_qty = tk.Label(row, width=5, anchor="center", font=("Arial", 9, "bold"), bg="white")
+        lbl_qty.pack(side="left")
+        lbl_status = tk.Label(row, width=15, anchor="w", font=("Arial", 8, "bold"), bg="white")
+        lbl_status.pack(side="left", padx=(10,0))
+        ttk.Separator(holder, orient="horizontal").pack(fill="x")
+
+        entry = {'holder': holder, 'packed': False, 'data': None, 'name': lbl_name, 'qty': lbl_qty, 'status': lbl_status}
+        self.update_item_row(entry, item)
+        return entry
+
+    def update_item_row(self, entry, item):
         qty = item['quantity']
-        qty_color = "black" if qty > 0 else "#999"
-        tk.Label(row, text=str(qty), width=5, anchor="center", font=("Arial", 9, "bold"), bg="white", fg=qty_color).pack(side="left")
+        entry['name'].config(text=item['name'])
+        entry['qty'].config(text=str(qty), fg="black" if qty > 0 else "#999")
         cond = item.get('condition', 'Good')
         if cond == 'Broken': s_txt, s_col = "Broken", COLORS["broken"]
         elif qty <= 0: s_txt, s_col = "Out of Stock", COLORS["outofstock"]
         else: s_txt, s_col = "Good", COLORS["success"]
-        tk.Label(row, text=s_txt, width=15, anchor="w", font=("Arial", 8, "bold"), bg="white", fg=s_col).pack(side="left", padx=(10,0))
-        ttk.Separator(parent, orient="horizontal").pack(fill="x")
+        entry['status'].config(text=s_txt, fg=s_col)
+        entry['data'] = item
 
     def open_quick_borrow(self):
-        BorrowPopup(self.winfo_toplevel(), callback=self.refresh_data)
+        BorrowPopup(self.winfo_toplevel(), self.controller.executor, callback=self.refresh_data)
 
     def open_return(self, data):
         p_data = {'id': data['borrow_id'], 'name': data['item_name'], 'borrower': data['full_name']}
-        ReturnPopup(self.winfo_toplevel(), p_data, callback=self.refresh_data)
\ No newline at end of file
+        ReturnPopup(self.winfo_toplevel(), self.controller.executor, p_data, callback=self.refresh_data)
+
+    def open_bulk_return(self):
+        # Same ownership rule as the per-card Return button
+        if self.user_role == "Admin":
+            borrows = self.active_borrows
+        else:
+            borrows = [b for b in self.active_borrows if b.get('student_id') == self.my_formatted_id]
+        BulkReturnPopup(self.winfo_toplevel(), self.controller.executor, borrows, callback=self.refresh_data)
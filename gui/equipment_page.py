@@ -3,20 +3,40 @@ from tkinter import ttk, messagebox
 from utils.colors import COLORS
 from utils.session import Session
 from gui.popups import AddItemPopup, EditItemPopup
-from database.equipment_db import get_all_equipment, delete_equipment
-from database.return_db import get_return_history
+from gui.paged_tree import PagedTreeLoader
+from database.equipment_db import (get_all_equipment, delete_equipment, search_equipment, count_equipment,
+                                   CATALOG_MIRROR_LIMIT)
+from database.return_db import get_return_history_page
+from database.data_versions import get_data_versions
+from utils.search_index import SearchIndex
 # FIX: Removed circular import here
 
 class EquipmentPage(tk.Frame):
+    SEARCH_DEBOUNCE_MS = 120   # Wait for a pause in typing before filtering
+    MAX_VISIBLE_ROWS = 500     # Treeview rows shown at once; narrower searches show everything
+
     def __init__(self, parent, controller):
         super().__init__(parent, bg=COLORS["bg_light"])
         self.controller = controller
         
         self.user = Session.get_user()
         self.user_role = self.user.get('role', 'Student') if self.user else 'Student'
+        self.data_versions = None  # Versions the inventory tab was loaded at
+        self.catalog = None        # SearchIndex over the equipment snapshot the tab shows
+        self.server_search = None  # Catalog too big to mirror: every search is a search_equipment() call (None: not known yet)
+        self.search_after = None
         
         self.build_ui()
 
+    # --- PAGE LIFECYCLE (called by TrackLabApp.show_page) ---
+    def on_show(self):
+        if self.data_versions is not None:
+            self.controller.refresh_if_changed(self, self.data_versions, self.refresh_all)
+
+    def refresh_all(self):
+        self.refresh_inventory()
+        self.refresh_history()
+
     def build_ui(self):
         # NAV BAR
         nav_bar = tk.Frame(self, bg="white", height=60, padx=20)
@@ -60,12 +80,15 @@ class EquipmentPage(tk.Frame):
         ctrl.pack(fill="x", pady=(0, 15))
         
         tk.Label(ctrl, text="Search:", bg="white", font=("Arial", 9, "bold")).pack(side="left")
-        self.search_var = tk.StringVar(); self.search_var.trace("w", self.refresh_inventory)
+        # Typing filters the local snapshot; the database is only read on refresh
+        self.search_var = tk.StringVar(); self.search_var.trace("w", self.on_search_changed)
         ttk.Entry(ctrl, textvariable=self.search_var, width=30).pack(side="left", padx=10)
+        self.match_label = tk.Label(ctrl, text="", bg="white", fg="#777", font=("Arial", 9))
+        self.match_label.pack(side="left")
         
         if self.user_role == "Admin":
             tk.Button(ctrl, text="+ Add Equipment", bg=COLORS["primary_green"], fg="white", 
-                      command=lambda: AddItemPopup(self.winfo_toplevel(), callback=self.refresh_inventory)).pack(side="right")
+                      command=lambda: AddItemPopup(self.winfo_toplevel(), self.controller.executor, callback=self.refresh_inventory)).pack(side="right")
 
         cols = ("id", "name", "cat", "qty", "cond")
         self.tree_inv = ttk.Treeview(self.tab_inv, columns=cols, show="headings", selectmode="browse")
@@ -83,28 +106,118 @@ class EquipmentPage(tk.Frame):
             actions = tk.Frame(self.tab_inv, bg="white")
             actions.pack(fill="x", pady=10)
             tk.Button(actions, text="✎ Edit Selected", bg="#E3F2FD", fg="#1976D2", command=self.edit_selected).pack(side="right", padx=5)
-            tk.Button(actions, text="🗑 Delete Selected", bg="#FFEBEE", fg="red", command=self.delete_selected).pack(side="right")
+            self.delete_btn = tk.Button(actions, text="🗑 Delete Selected", bg="#FFEBEE", fg="red", command=self.delete_selected)
+            self.delete_btn.pack(side="right")
         
         self.refresh_inventory()
 
     def refresh_inventory(self, *args):
-        for row in self.tree_inv.get_children(): self.tree_inv.delete(row)
-        term = self.search_var.get().lower()
-        for i in get_all_equipment():
-            if term in i['name'].lower() or term in i['code'].lower():
-                self.tree_inv.insert("", "end", values=(i['code'], i['name'], i['category'], i['quantity'], i['condition']), tags=(str(i['equipment_id']),))
+        if not self.tree_inv.get_children():
+            self.tree_inv.insert("", "end", iid="loading", values=("", "Loading...", "", "", ""))
+        self.controller.executor.submit(self.fetch_inventory, self.server_search, on_success=self.show_inventory,
+                                        owner=self, key="equipment.inventory")
+
+    @staticmethod
+    def fetch_inventory(server_search):
+        """
+        Runs on a worker thread; the search index is built here too, off the Tk thread.
+        Catalogs over CATALOG_MIRROR_LIMIT items are not copied: each search goes to the server.
+        Only the first load and server-search mode count the catalog first; a mirrored
+        catalog comes from equipment_cache and is measured by what it returned.
+        """
+        versions = get_data_versions()
+        if server_search is not False:
+            total = count_equipment()
+            if total is not None and total > CATALOG_MIRROR_LIMIT:
+                return versions, None
+        rows = get_all_equipment()
+        if len(rows) > CATALOG_MIRROR_LIMIT:
+            return versions, None
+        return versions, SearchIndex(rows, ("name", "code", "category"))
+
+    def show_inventory(self, result):
+        self.data_versions, self.catalog = result
+        self.server_search = self.catalog is None
+        self.apply_search()
+
+    @classmethod
+    def fetch_matches(cls, query):
+        """Runs on a worker thread: the first MAX_VISIBLE_ROWS server-side matches, and how many there are."""
+        rows = search_equipment(query, limit=cls.MAX_VISIBLE_ROWS + 1)
+        total = count_equipment(query) if len(rows) > cls.MAX_VISIBLE_ROWS else len(rows)
+        return rows, total
+
+    def on_search_changed(self, *args):
+        if self.search_after is not None:
+            self.after_cancel(self.search_after)
+        self.search_after = self.after(self.SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self):
+        self.search_after = None
+        if self.server_search:
+            self.controller.executor.submit(self.fetch_matches, self.search_var.get(),
+                                            on_success=lambda result: self.show_matches(*result),
+                                            owner=self, key="equipment.search")
+        elif self.catalog is not None:
+            matches = self.catalog.search(self.search_var.get())
+            self.show_matches(matches[:self.MAX_VISIBLE_ROWS], len(matches))
+
+    def show_matches(self, matches, total):
+        shown = matches[:self.MAX_VISIBLE_ROWS]
+        if total is None or total > len(shown):
+            total_text = f"{total:,}" if total is not None else "more"
+            self.match_label.config(text=f"Showing {len(shown):,} of {total_text} matches. Type more to narrow the list.")
+        else:
+            self.match_label.config(text="")
+        self.sync_tree(self.tree_inv, [(str(i['equipment_id']), (i['code'], i['name'], i['category'], i['quantity'], i['condition']))
+                                       for i in shown])
+
+    @staticmethod
+    def sync_tree(tree, rows):
+        """
+        Makes the tree show rows [(iid, values)] in order, touching only what changed:
+        rows that left are deleted in one call, new ones inserted in place, and
+        existing ones updated only if their values differ.
+        """
+        wanted = dict(rows)
+        current = tree.get_children()
+        gone = [iid for iid in current if iid not in wanted]
+        if gone: tree.delete(*gone)
+        present = set(current) - set(gone)
+
+        for index, (iid, values) in enumerate(rows):
+            if iid not in present:
+                tree.insert("", index, iid=iid, values=values, tags=(iid,))
+            elif [str(v) for v in tree.item(iid, "values")] != [str(v) for v in values]:
+                tree.item(iid, values=values)
+
+        # Only after a refresh that re-sorted the catalog (e.g. a rename)
+        if list(tree.get_children()) != [iid for iid, _ in rows]:
+            for index, (iid, _) in enumerate(rows):
+                tree.move(iid, "", index)
 
     def edit_selected(self):
         sel = self.tree_inv.selection()
         if not sel: return
         vals = self.tree_inv.item(sel[0])['values']
         data = {"db_id": self.tree_inv.item(sel[0])['tags'][0], "code": vals[0], "name": vals[1], "category": vals[2], "qty": vals[3], "status": vals[4]}
-        EditItemPopup(self.winfo_toplevel(), data, callback=self.refresh_inventory)
+        EditItemPopup(self.winfo_toplevel(), self.controller.executor, data, callback=self.refresh_inventory)
 
     def delete_selected(self):
         sel = self.tree_inv.selection()
         if sel and messagebox.askyesno("Confirm", "Are you sure you want to permanently delete this equipment record?"):
-            if delete_equipment(self.tree_inv.item(sel[0])['tags'][0]): self.refresh_inventory()
+            eq_id = self.tree_inv.item(sel[0])['tags'][0]
+            self.delete_btn.config(state="disabled")
+            self.controller.executor.submit(delete_equipment, eq_id, on_success=self.on_deleted,
+                                            on_error=self.on_delete_failed, owner=self, key=f"equipment.delete.{eq_id}")
+
+    def on_deleted(self, ok):
+        self.delete_btn.config(state="normal")
+        if ok: self.refresh_inventory()
+
+    def on_delete_failed(self, error):
+        self.delete_btn.config(state="normal")
+        messagebox.showerror("Error", f"Database Error: {error}")
 
     def build_returns_tab(self):
         cols = ("date", "time", "item", "by", "cond", "notes")
@@ -117,14 +230,19 @@ class EquipmentPage(tk.Frame):
         self.tree_ret.heading("notes", text="Remarks"); self.tree_ret.column("notes", width=250)
         
         sb = ttk.Scrollbar(self.tab_ret, orient="vertical", command=self.tree_ret.yview)
-        self.tree_ret.configure(yscrollcommand=sb.set)
         sb.pack(side="right", fill="y")
         self.tree_ret.pack(fill="both", expand=True)
+        # Newest returns first; older pages load while scrolling down
+        self.history = PagedTreeLoader(self.tree_ret, sb, self.controller.executor, owner=self,
+                                       key="equipment.history", fetch=get_return_history_page,
+                                       show=self.show_history)
         
         tk.Button(self.tab_ret, text="Refresh History", command=self.refresh_history).pack(pady=5, anchor="e")
         self.refresh_history()
 
     def refresh_history(self):
-        for row in self.tree_ret.get_children(): self.tree_ret.delete(row)
-        for r in get_return_history():
+        self.history.reset(placeholder=("", "", "Loading...", "", "", ""))
+
+    def show_history(self, rows):
+        for r in rows:
             self.tree_ret.insert("", "end", values=(r['ret_date'], r['ret_time'], r['item_name'], r['returned_by'], r['condition'], r['remarks']))
\ No newline at end of file
@@ -0,0 +1,79 @@
+# gui/equipment_picker.py
+import tkinter as tk
+from tkinter import ttk
+
+from database.equipment_db import search_equipment
+
+class EquipmentPicker(ttk.Combobox):
+    """
+    Editable combobox for choosing one equipment item. Typing searches the
+    catalog on the server (search_equipment) after a short pause, so only the
+    best few dozen matches are ever loaded, however big the catalog is.
+
+    on_select(row) is called with the chosen equipment row (Tk thread).
+    """
+    DEBOUNCE_MS = 200
+
+    def __init__(self, parent, executor, on_select, available_only=True, **kwargs):
+        super().__init__(parent, values=[], state="normal", **kwargs)
+        self.executor = executor
+        self.on_select = on_select
+        self.available_only = available_only
+        self.matches = {}   # label shown in the list -> equipment row
+        self.search_job = None
+        self.searched = None   # Text the current matches are for
+
+        self.bind("<KeyRelease>", self.on_key)
+        self.bind("<Return>", self.pick_first)
+        self.bind("<<ComboboxSelected>>", lambda e: self.pick(self.get()))
+        self.search()
+
+    @staticmethod
+    def label(row):
+        # The code keeps items with the same name apart
+        return f"{row['name']} ({row['code']})"
+
+    def on_key(self, event):
+        if event.keysym in ("Return", "Up", "Down", "Escape", "Tab"): return
+        if self.search_job: self.after_cancel(self.search_job)
+        self.search_job = self.after(self.DEBOUNCE_MS, self.search)
+
+    def search(self):
+        self.search_job = None
+        text = self.get().strip()
+        if text == self.searched or text in self.matches: return
+        # Same key: a newer search supersedes one still running
+        self.executor.submit(search_equipment, text, None, self.available_only,
+                             on_success=lambda rows: self.show_matches(text, rows),
+                             owner=self, key=f"picker.{self}")
+
+    def refresh(self):
+        """Runs the current search again (e.g. after stock levels changed)."""
+        self.searched = None
+        self.matches = {}
+        self.search()
+
+    def show_matches(self, text, rows):
+        self.searched = text
+        self.matches = {self.label(row): row for row in rows}
+        self.config(values=list(self.matches))
+
+    def pick(self, label):
+        row = self.matches.get(label)
+        if row is not None:
+            self.on_select(row)
+
+    def pick_first(self, event=None):
+        """Enter takes the best match of what was typed."""
+        if self.get() not in self.matches and self.matches and self.searched == self.get().strip():
+            self.set(next(iter(self.matches)))
+        self.pick(self.get())
+
+    def show(self, row):
+        """Puts a row in the box (e.g. one clicked elsewhere) as if it was picked here."""
+        self.matches[self.label(row)] = row
+        self.set(self.label(row))
+
+    def clear(self):
+        self.set("")
+        self.search()
@@ -1,8 +1,7 @@
 # gui/landing_page.py
 import tkinter as tk
-from PIL import Image, ImageTk 
-import os # Import os for path construction
 from utils.colors import COLORS
+from utils.logo import logo_image
 # REMOVED: from gui.app import TrackLabApp # FIX: Circular Import
 
 class LandingPage(tk.Frame):
@@ -14,42 +13,9 @@ class LandingPage(tk.Frame):
         self.build_ui()
 
     def load_landing_logo(self):
-        """Loads a larger version of the logo for the main screen, preserving aspect ratio."""
-        
-        # Determine the root of the project to find the file
-        root_dir = os.getcwd() 
-        logo_path = os.path.join(root_dir, 'utils', 'tracklablogo.png')
-        
-        try:
-            img = Image.open(logo_path)
-            
-            # --- FIX: Calculate new size based on max dimension (150px) while maintaining aspect ratio ---
-            max_size = 150
-            original_width, original_height = img.size
-            
-            if original_width > original_height:
-                # Scale by width
-                new_width = max_size
-                new_height = int(max_size * original_height / original_width)
-            else:
-                # Scale by height
-                new_height = max_size
-                new_width = int(max_size * original_width / original_height)
-
-            # Ensure minimal size (max(1, ...))
-            new_width = max(1, new_width)
-            new_height = max(1, new_height)
-            
-            resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            self.landing_logo = ImageTk.PhotoImage(resized_img)
-            return self.landing_logo
-            
-        except FileNotFoundError:
-            # Print error from the core module (app.py handles the general error printing)
-            return None
-        except Exception as e:
-            print(f"❌ Landing Page Logo Load Error: {e}")
-            return None
+        """Larger version of the logo for the main screen (pre-rendered, see utils/logo.py)."""
+        self.landing_logo = logo_image("landing")
+        return self.landing_logo
 
     def build_ui(self):
         # Center Content Wrapper
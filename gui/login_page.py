@@ -173,34 +173,59 @@ class LoginPage(tk.Frame):
                 return
             
             # Use selected role (Student/Staff only)
-            success, msg = register_user(username, password, self.selected_role)
-            if success:
-                messagebox.showinfo("Success", msg)
-                self.toggle_mode() 
-                self.user_entry.delete(0, tk.END)
-                self.pass_entry.delete(0, tk.END)
-                self.confirm_entry.delete(0, tk.END)
-            else:
-                messagebox.showerror("Registration Failed", msg)
+            self.set_busy(True)
+            self.controller.executor.submit(register_user, username, password, self.selected_role,
+                                            on_success=self.on_register_done,
+                                            on_error=self.on_request_failed, owner=self, key="login.action")
 
         else:
             # Login Logic
-            user = login_user(username, password)
-            if user:
-                role = user.get('role', 'Student')
-                
-                # STRICT ADMIN CHECK
-                if self.is_admin_login:
-                    if role != "Admin":
-                        messagebox.showerror("Access Denied", "This account is not an Administrator.")
-                        return
-                else:
-                    # Prevent Admin from logging in via standard portal? 
-                    # Optional: Typically Admins can use standard, but better to separate.
-                    pass 
-
-                Session.set_user(user)
-                print(f"✅ Login Successful: {user['username']} ({role})")
-                self.controller.show_dashboard()
+            self.set_busy(True)
+            self.controller.executor.submit(login_user, username, password,
+                                            on_success=self.on_login_done,
+                                            on_error=self.on_request_failed, owner=self, key="login.action")
+
+    def set_busy(self, busy):
+        """Disables the action button while the database request runs in the background."""
+        if busy:
+            self.action_btn.config(state="disabled", text="Please wait...")
+        else:
+            self.action_btn.config(state="normal")
+            self.refresh_dynamic_area()
+
+    def on_request_failed(self, error):
+        self.set_busy(False)
+        messagebox.showerror("Error", f"Database Error: {error}")
+
+    def on_register_done(self, result):
+        self.set_busy(False)
+        success, msg = result
+        if success:
+            messagebox.showinfo("Success", msg)
+            self.toggle_mode() 
+            self.user_entry.delete(0, tk.END)
+            self.pass_entry.delete(0, tk.END)
+            self.confirm_entry.delete(0, tk.END)
+        else:
+            messagebox.showerror("Registration Failed", msg)
+
+    def on_login_done(self, user):
+        self.set_busy(False)
+        if user:
+            role = user.get('role', 'Student')
+            
+            # STRICT ADMIN CHECK
+            if self.is_admin_login:
+                if role != "Admin":
+                    messagebox.showerror("Access Denied", "This account is not an Administrator.")
+                    return
             else:
-                messagebox.showerror("Login Failed", "Invalid Username or Password.")
\ No newline at end of file
+                # Prevent Admin from logging in via standard portal? 
+                # Optional: Typically Admins can use standard, but better to separate.
+                pass 
+
+            Session.set_user(user)
+            print(f"✅ Login Successful: {user['username']} ({role})")
+            self.controller.show_dashboard()
+        else:
+            messagebox.showerror("Login Failed", "Invalid Username or Password.")
@@ -0,0 +1,76 @@
+# gui/paged_tree.py
+
+class PagedTreeLoader:
+    """
+    Fills a ttk.Treeview one keyset page at a time: the next page is fetched on a
+    worker thread when the view scrolls near the bottom of what is loaded, so the
+    first screen costs the same whatever the size of the table.
+
+    fetch(after) -> (rows, next_cursor)   runs on a worker thread; next_cursor None = last page
+    show(rows)                             appends rows to the tree (Tk thread)
+
+    The loader owns the tree's yscrollcommand and forwards it to the scrollbar.
+    """
+    PREFETCH_AT = 0.9   # Fraction of the loaded rows scrolled past before the next page is fetched
+
+    def __init__(self, tree, scrollbar, executor, owner, key, fetch, show, on_error=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.executor = executor
+        self.owner = owner
+        self.key = key
+        self.fetch = fetch
+        self.show = show
+        self.on_error = on_error
+        self.cursor = None
+        self.exhausted = True
+        self.loading = False
+        self.first_page = True
+        tree.configure(yscrollcommand=self.on_scroll)
+
+    def reset(self, placeholder=None):
+        """Reloads from the first page; the old rows stay visible until it arrives."""
+        if placeholder and not self.tree.get_children():
+            self.tree.insert("", "end", iid="loading", values=placeholder)
+        self.cursor = None
+        self.exhausted = False
+        self.loading = False
+        self.first_page = True
+        self.load_more()
+
+    def start(self, rows, cursor):
+        """Shows a first page that was fetched elsewhere (e.g. together with other data)."""
+        self.cursor = None
+        self.exhausted = False
+        self.first_page = True
+        self.loading = True
+        self.loaded((rows, cursor))
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Also fires after rows are inserted, so a short first page keeps loading until the view is full
+        if float(last) >= self.PREFETCH_AT:
+            self.tree.after_idle(self.load_more)
+
+    def load_more(self):
+        if self.loading or self.exhausted: return
+        self.loading = True
+        # Same key: a reset() supersedes a page that is still loading
+        self.executor.submit(self.fetch, self.cursor, on_success=self.loaded, on_error=self.failed,
+                             owner=self.owner, key=self.key)
+
+    def loaded(self, result):
+        rows, cursor = result
+        if self.first_page:
+            self.tree.delete(*self.tree.get_children())
+            self.first_page = False
+        self.cursor = cursor
+        self.exhausted = cursor is None
+        self.loading = False
+        self.show(rows)
+
+    def failed(self, error):
+        # Leave the loaded rows; scrolling again retries the page
+        self.loading = False
+        print(f"❌ Page Load Error: {error}")
+        if self.on_error: self.on_error(error)
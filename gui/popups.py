@@ -4,12 +4,13 @@ import random
 from datetime import datetime, timedelta
 import calendar
 from utils.colors import COLORS
-from database.equipment_db import add_equipment, update_equipment, get_all_equipment
+from database.equipment_db import add_equipment, update_equipment
 from database.borrower_db import get_or_create_borrower
-from database.borrow_db import borrow_equipment
-from database.return_db import return_equipment
+from database.borrow_db import borrow_equipment, BORROW_OK, BORROW_INSUFFICIENT_STOCK, BORROW_FAILED
+from database.return_db import return_equipment, return_many
 from utils.session import Session
 from utils.id_generator import generate_formatted_id
+from gui.equipment_picker import EquipmentPicker
 
 # --- HELPER: Calendar Widget (Same as BorrowPage) ---
 class CalendarPopup(tk.Toplevel):
@@ -87,11 +88,12 @@ class CalendarPopup(tk.Toplevel):
 
 # 1. ADD ITEM POPUP
 class AddItemPopup:
-    def __init__(self, parent_root, callback=None):
+    def __init__(self, parent_root, executor, callback=None):
         self.top = tk.Toplevel(parent_root)
         self.top.title("Add New Equipment")
         self.top.geometry("400x450")
         self.top.configure(bg="white")
+        self.executor = executor
         self.callback = callback
         self.top.transient(parent_root); self.top.grab_set(); self.top.focus_force()
         self.build_ui()
@@ -123,9 +125,10 @@ class AddItemPopup:
         btn_frame = tk.Frame(self.top, bg="white", pady=20)
         btn_frame.pack(fill="x", padx=30)
         
-        tk.Button(btn_frame, text="Submit", bg=COLORS["primary_green"], fg="white", 
-                  relief="flat", pady=8, width=12, cursor="hand2",
-                  command=self.save_item).pack(side="right")
+        self.submit_btn = tk.Button(btn_frame, text="Submit", bg=COLORS["primary_green"], fg="white",
+                                    relief="flat", pady=8, width=12, cursor="hand2",
+                                    command=self.save_item)
+        self.submit_btn.pack(side="right")
         
         tk.Button(btn_frame, text="Cancel", bg="#F0F0F0", fg="#333", 
                   relief="flat", pady=8, width=10, cursor="hand2",
@@ -151,20 +154,38 @@ class AddItemPopup:
             messagebox.showerror("Error", "Missing required fields.")
             return
 
-        if add_equipment(name, code, cat, int(qty), cond):
+        try:
+            qty = int(qty)
+        except ValueError:
+            messagebox.showerror("Error", "Invalid Quantity")
+            return
+
+        self.submit_btn.config(state="disabled", text="Please wait...")
+        self.executor.submit(add_equipment, name, code, cat, qty, cond,
+                             on_success=self.on_saved, on_error=self.on_save_failed,
+                             owner=self.top, key="equipment.add")
+
+    def on_save_failed(self, error):
+        self.submit_btn.config(state="normal", text="Submit")
+        messagebox.showerror("Error", f"Database Error: {error}")
+
+    def on_saved(self, ok):
+        if ok:
             messagebox.showinfo("Success", "Item Added!")
             if self.callback: self.callback()
             self.top.destroy()
         else:
+            self.submit_btn.config(state="normal", text="Submit")
             messagebox.showerror("Error", "Database Error")
 
 # 2. EDIT ITEM POPUP
 class EditItemPopup:
-    def __init__(self, parent_root, item_data, callback=None):
+    def __init__(self, parent_root, executor, item_data, callback=None):
         self.top = tk.Toplevel(parent_root)
         self.top.title("Edit Equipment")
         self.top.geometry("400x500")
         self.top.configure(bg="white")
+        self.executor = executor
         self.item = item_data
         self.callback = callback
         self.top.transient(parent_root); self.top.grab_set(); self.top.focus_force()
@@ -195,9 +216,10 @@ class EditItemPopup:
         btn_frame = tk.Frame(self.top, bg="white", pady=20)
         btn_frame.pack(fill="x", padx=30)
         
-        tk.Button(btn_frame, text="Save Changes", bg="#1976D2", fg="white", 
-                  relief="flat", pady=8, width=15, cursor="hand2",
-                  command=self.save).pack(side="right")
+        self.save_btn = tk.Button(btn_frame, text="Save Changes", bg="#1976D2", fg="white",
+                                  relief="flat", pady=8, width=15, cursor="hand2",
+                                  command=self.save)
+        self.save_btn.pack(side="right")
         tk.Button(btn_frame, text="Cancel", bg="#F0F0F0", fg="#333", 
                   relief="flat", pady=8, width=10, cursor="hand2",
                   command=self.top.destroy).pack(side="right", padx=10)
@@ -215,16 +237,33 @@ class EditItemPopup:
         cat = self.cat_cb.get()
         qty = self.qty_ent.get()
         cond = self.cond_cb.get()
-        if update_equipment(self.item['db_id'], cat, int(qty), cond):
+        try:
+            qty = int(qty)
+        except ValueError:
+            messagebox.showerror("Error", "Invalid Quantity")
+            return
+
+        self.save_btn.config(state="disabled", text="Please wait...")
+        self.executor.submit(update_equipment, self.item['db_id'], cat, qty, cond,
+                             on_success=self.on_saved, on_error=self.on_save_failed,
+                             owner=self.top, key=f"equipment.update.{self.item['db_id']}")
+
+    def on_save_failed(self, error):
+        self.save_btn.config(state="normal", text="Save Changes")
+        messagebox.showerror("Error", f"Database Error: {error}")
+
+    def on_saved(self, ok):
+        if ok:
             messagebox.showinfo("Success", "Updated!")
             if self.callback: self.callback()
             self.top.destroy()
         else:
+            self.save_btn.config(state="normal", text="Save Changes")
             messagebox.showerror("Error", "Failed to update.")
 
 # 3. QUICK BORROW POPUP (UPDATED with TIME LIMIT)
 class BorrowPopup:
-    def __init__(self, parent_root, callback=None):
+    def __init__(self, parent_root, executor, callback=None):
         self.top = tk.Toplevel(parent_root)
         self.top.title("Quick Borrow")
         self.top.geometry("450x750")  # Increased height for calendar inputs
@@ -233,7 +272,8 @@ class BorrowPopup:
         
         self.callback = callback
         self.user = Session.get_user() 
-        self.items_map = {} 
+        self.executor = executor
+        self.selected = None   # Equipment row chosen in the picker
         self.build_ui()
 
     def build_ui(self):
@@ -252,18 +292,9 @@ class BorrowPopup:
         self.stu_id_ent = self.create_label_entry(form, "Student ID (Auto)", val=uid_fmt, readonly=True)
 
         tk.Label(form, text="Select Equipment", bg="white", font=("Arial", 9, "bold")).pack(anchor="w", pady=(10,0))
-        try: 
-            db_items = get_all_equipment()
-            item_names = []
-            for i in db_items:
-                if i['quantity'] > 0:
-                    self.items_map[i['name']] = i
-                    item_names.append(i['name'])
-        except: item_names = []
-        
-        self.item_cb = ttk.Combobox(form, values=item_names, state="readonly")
+        # Searches as you type instead of listing the whole catalog
+        self.item_cb = EquipmentPicker(form, self.executor, self.on_select)
         self.item_cb.pack(fill="x", pady=5)
-        self.item_cb.bind("<<ComboboxSelected>>", self.on_select)
         
         self.eq_id_entry = self.create_label_entry(form, "Equipment ID", readonly=True)
         
@@ -292,7 +323,8 @@ class BorrowPopup:
         self.max_lbl = tk.Label(form, text="(Max: -)", bg="white", fg="#999")
         self.max_lbl.pack(anchor="w")
 
-        tk.Button(form, text="Confirm", bg=COLORS["primary_green"], fg="white", command=self.confirm).pack(pady=20)
+        self.confirm_btn = tk.Button(form, text="Confirm", bg=COLORS["primary_green"], fg="white", command=self.confirm)
+        self.confirm_btn.pack(pady=20)
 
     def create_label_entry(self, parent, label, val="", readonly=False):
         tk.Label(parent, text=label, bg="white", font=("Arial", 9, "bold")).pack(anchor="w", pady=(5,0))
@@ -302,18 +334,16 @@ class BorrowPopup:
         if readonly: e.config(state="readonly")
         e.pack(fill="x", pady=5); return e
 
-    def on_select(self, event):
-        name = self.item_cb.get()
-        if name in self.items_map:
-            d = self.items_map[name]
-            self.eq_id_entry.config(state="normal"); self.eq_id_entry.delete(0, tk.END); self.eq_id_entry.insert(0, d['code']); self.eq_id_entry.config(state="readonly")
-            max_q = d['quantity']
-            self.max_lbl.config(text=f"(Max: {max_q})")
-            self.qty_spin.config(to=max_q)
+    def on_select(self, d):
+        self.selected = d
+        self.eq_id_entry.config(state="normal"); self.eq_id_entry.delete(0, tk.END); self.eq_id_entry.insert(0, d['code']); self.eq_id_entry.config(state="readonly")
+        max_q = d['quantity']
+        self.max_lbl.config(text=f"(Max: {max_q})")
+        self.qty_spin.config(to=max_q)
 
     def confirm(self):
-        item = self.item_cb.get()
-        if item in self.items_map:
+        item = self.selected
+        if item is not None and self.item_cb.get() == self.item_cb.label(item):
             # 1. Validate Time
             try:
                 d_str = self.date_var.get()
@@ -331,22 +361,47 @@ class BorrowPopup:
             # 2. Process
             try:
                 qty = int(self.qty_spin.get())
-                if qty > self.items_map[item]['quantity']:
-                    messagebox.showerror("Error", "Not enough stock.")
-                    return
+            except ValueError:
+                messagebox.showerror("Error", "Invalid Quantity")
+                return
+            if qty > item['quantity']:
+                messagebox.showerror("Error", "Not enough stock.")
+                return
 
-                b_id = get_or_create_borrower(self.stu_id_ent.get(), self.name_ent.get(), self.contact_ent.get(), self.dept_ent.get())
-                
-                if borrow_equipment(self.items_map[item]['equipment_id'], b_id, datetime.now(), return_dt, "Quick Borrow"):
-                    messagebox.showinfo("Success", "Borrowed!")
-                    if self.callback: self.callback() 
-                    self.top.destroy()
-            except ValueError: messagebox.showerror("Error", "Invalid Quantity")
+            self.confirm_btn.config(state="disabled", text="Please wait...")
+            self.executor.submit(self.submit_borrow, self.stu_id_ent.get(), self.name_ent.get(), self.contact_ent.get(),
+                                 self.dept_ent.get(), self.user.get('user_id'), item['equipment_id'], return_dt, qty,
+                                 on_success=self.on_borrow_done, on_error=self.on_borrow_failed,
+                                 owner=self.top, key="quick_borrow.confirm")
+
+    @staticmethod
+    def submit_borrow(stu_id, name, contact, dept, user_id, equipment_id, return_dt, qty):
+        """Runs on a worker thread: resolves the borrower, then borrows the item."""
+        b_id = get_or_create_borrower(stu_id, name, contact, dept, user_id)
+        if not b_id:
+            return BORROW_FAILED
+        return borrow_equipment(equipment_id, b_id, datetime.now(), return_dt, "Quick Borrow", qty)
+
+    def on_borrow_failed(self, error):
+        self.confirm_btn.config(state="normal", text="Confirm")
+        messagebox.showerror("Error", f"Database Error: {error}")
+
+    def on_borrow_done(self, result):
+        self.confirm_btn.config(state="normal", text="Confirm")
+        if result == BORROW_OK:
+            messagebox.showinfo("Success", "Borrowed!")
+            if self.callback: self.callback()
+            self.top.destroy()
+        elif result == BORROW_INSUFFICIENT_STOCK:
+            messagebox.showerror("Not Enough Stock", "Someone else just borrowed this item. Not enough stock is left.")
+        else:
+            messagebox.showerror("Error", "Transaction Failed.")
 
 # 4. RETURN POPUP
 class ReturnPopup:
-    def __init__(self, parent_root, data, callback=None):
+    def __init__(self, parent_root, executor, data, callback=None):
         self.top = tk.Toplevel(parent_root); self.top.title("Return"); self.top.geometry("400x550"); self.top.configure(bg="white")
+        self.executor = executor
         self.data = data
         self.callback = callback
         self.top.transient(parent_root); self.top.grab_set(); self.top.focus_force()
@@ -358,10 +413,153 @@ class ReturnPopup:
         for m in ["Good", "Minor Damage", "Broken"]: tk.Radiobutton(self.top, text=m, variable=self.cond_var, value=m, bg="white").pack(anchor="w", padx=30)
         tk.Label(self.top, text="Remarks", bg="white").pack(anchor="w", padx=30)
         self.notes = tk.Text(self.top, height=4); self.notes.pack(padx=30, fill="x")
-        tk.Button(self.top, text="Complete", bg=COLORS["primary_green"], fg="white", command=self.process).pack(pady=20)
+        self.complete_btn = tk.Button(self.top, text="Complete", bg=COLORS["primary_green"], fg="white", command=self.process)
+        self.complete_btn.pack(pady=20)
 
     def process(self):
-        if return_equipment(self.data['id'], self.cond_var.get(), self.notes.get("1.0", "end-1c").strip()):
+        self.complete_btn.config(state="disabled", text="Please wait...")
+        self.executor.submit(return_equipment, self.data['id'], self.cond_var.get(), self.notes.get("1.0", "end-1c").strip(),
+                             on_success=self.on_returned, on_error=self.on_return_failed,
+                             owner=self.top, key=f"return.{self.data['id']}")
+
+    def on_return_failed(self, error):
+        self.complete_btn.config(state="normal", text="Complete")
+        messagebox.showerror("Error", f"Database Error: {error}")
+
+    def on_returned(self, ok):
+        if ok:
             messagebox.showinfo("Success", "Returned!")
             if self.callback: self.callback()
-            self.top.destroy()
\ No newline at end of file
+            self.top.destroy()
+        else:
+            # Already returned elsewhere, or the database failed
+            self.complete_btn.config(state="normal", text="Complete")
+            messagebox.showerror("Error", "Return failed. The item may already have been returned.")
+
+class BulkReturnPopup:
+    """Returns many borrows at once (e.g. closing a lab section), each with its own condition."""
+    CONDITIONS = ["Good", "Minor Damage", "Broken"]
+
+    def __init__(self, parent_root, executor, borrows, callback=None):
+        self.top = tk.Toplevel(parent_root); self.top.title("Bulk Return"); self.top.geometry("720x600"); self.top.configure(bg="white")
+        self.executor = executor
+        self.borrows = borrows
+        self.callback = callback
+        self.rows = []  # (borrow data, selected var, condition var, remarks entry)
+        self.top.transient(parent_root); self.top.grab_set(); self.top.focus_force()
+        self.build_ui()
+
+    def build_ui(self):
+        tk.Label(self.top, text="Bulk Return", font=("Arial", 16, "bold"), bg="white", fg=COLORS["primary_green"]).pack(pady=(20, 10))
+
+        # --- SELECT BY BORROWER / DEPARTMENT ---
+        filter_row = tk.Frame(self.top, bg="white", padx=20); filter_row.pack(fill="x")
+        tk.Label(filter_row, text="Select by", bg="white", font=("Arial", 9, "bold")).pack(side="left")
+        self.filter_cb = ttk.Combobox(filter_row, values=["Borrower", "Department"], width=12, state="readonly")
+        self.filter_cb.set("Borrower"); self.filter_cb.pack(side="left", padx=5)
+        self.filter_cb.bind("<<ComboboxSelected>>", lambda e: self.update_filter_values())
+        self.value_cb = ttk.Combobox(filter_row, width=30, state="readonly"); self.value_cb.pack(side="left", padx=5)
+        tk.Button(filter_row, text="Select", bg="#E0E0E0", relief="flat", command=self.select_matching).pack(side="left", padx=5)
+        tk.Button(filter_row, text="All", bg="#E0E0E0", relief="flat", command=lambda: self.set_all(True)).pack(side="left", padx=2)
+        tk.Button(filter_row, text="None", bg="#E0E0E0", relief="flat", command=lambda: self.set_all(False)).pack(side="left", padx=2)
+        self.update_filter_values()
+
+        # --- ONE ROW PER ONGOING BORROW ---
+        list_frame = tk.Frame(self.top, bg="white", padx=20, pady=10); list_frame.pack(fill="both", expand=True)
+        canvas = tk.Canvas(list_frame, bg="white", highlightthickness=0)
+        sb = ttk.Scrollbar(list_frame, orient="vertical", command=canvas.yview)
+        content = tk.Frame(canvas, bg="white")
+        content.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=content, anchor="nw")
+        canvas.configure(yscrollcommand=sb.set)
+        canvas.pack(side="left", fill="both", expand=True); sb.pack(side="right", fill="y")
+
+        if not self.borrows:
+            tk.Label(content, text="No active borrows.", bg="white", fg="#999").pack(pady=20)
+
+        for b in self.borrows:
+            row = tk.Frame(content, bg="white", pady=2); row.pack(fill="x")
+            selected = tk.BooleanVar(value=False)
+            tk.Checkbutton(row, variable=selected, bg="white").pack(side="left")
+            tk.Label(row, text=f"{b['full_name']} - {b['item_name']}", width=32, anchor="w", bg="white").pack(side="left")
+            cond = tk.StringVar(value="Good")
+            ttk.Combobox(row, textvariable=cond, values=self.CONDITIONS, width=12, state="readonly").pack(side="left", padx=5)
+            remarks = tk.Entry(row, relief="solid", bd=1, width=25); remarks.pack(side="left", padx=5)
+            self.rows.append((b, selected, cond, remarks))
+
+        self.complete_btn = tk.Button(self.top, text="Return Selected", bg=COLORS["primary_green"], fg="white", command=self.process)
+        self.complete_btn.pack(pady=15)
+
+    def update_filter_values(self):
+        key = "full_name" if self.filter_cb.get() == "Borrower" else "department"
+        values = sorted({b.get(key) or "" for b in self.borrows})
+        self.value_cb.config(values=values)
+        self.value_cb.set(values[0] if values else "")
+
+    def select_matching(self):
+        key = "full_name" if self.filter_cb.get() == "Borrower" else "department"
+        value = self.value_cb.get()
+        for b, selected, _, _ in self.rows:
+            if (b.get(key) or "") == value: selected.set(True)
+
+    def set_all(self, state):
+        for _, selected, _, _ in self.rows: selected.set(state)
+
+    def process(self):
+        returns = [(b['borrow_id'], cond.get(), remarks.get().strip())
+                   for b, selected, cond, remarks in self.rows if selected.get()]
+        if not returns:
+            messagebox.showerror("Error", "Select at least one borrow to return.")
+            return
+
+        self.complete_btn.config(state="disabled", text="Please wait...")
+        self.executor.submit(return_many, returns, on_success=lambda count: self.on_returned(returns, count),
+                             on_error=self.on_return_failed, owner=self.top, key="bulk_return")
+
+    def on_return_failed(self, error):
+        self.complete_btn.config(state="normal", text="Return Selected")
+        messagebox.showerror("Error", f"Database Error: {error}")
+
+    def on_returned(self, returns, count):
+        if count is None:
+            self.complete_btn.config(state="normal", text="Return Selected")
+            messagebox.showerror("Error", "Return failed. Nothing was returned.")
+            return
+        skipped = len(returns) - count
+        msg = f"Returned {count} item(s)."
+        if skipped: msg += f"\n{skipped} had already been returned."
+        messagebox.showinfo("Success", msg)
+        if self.callback: self.callback()
+        self.top.destroy()
+
+class ExportProgressPopup:
+    """Shows how many rows a background export has written, with a Cancel button."""
+    POLL_MS = 200
+
+    def __init__(self, parent_root, progress, path):
+        self.top = tk.Toplevel(parent_root); self.top.title("Exporting"); self.top.geometry("380x170"); self.top.configure(bg="white")
+        self.progress = progress
+        self.top.transient(parent_root)
+        self.top.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        tk.Label(self.top, text="Exporting report...", font=("Arial", 12, "bold"), bg="white", fg=COLORS["primary_green"]).pack(pady=(15, 5))
+        tk.Label(self.top, text=path, bg="white", fg="#777", font=("Arial", 8), wraplength=340).pack()
+        self.bar = ttk.Progressbar(self.top, mode="indeterminate", length=300); self.bar.pack(pady=8)
+        self.bar.start(15)
+        self.count = tk.Label(self.top, text="0 rows written", bg="white"); self.count.pack()
+        self.cancel_btn = tk.Button(self.top, text="Cancel", bg="#FFEBEE", fg="red", relief="flat", command=self.cancel)
+        self.cancel_btn.pack(pady=8)
+        self.poll()
+
+    def poll(self):
+        if not self.top.winfo_exists(): return
+        self.count.config(text=f"{self.progress.rows:,} rows written")
+        self.top.after(self.POLL_MS, self.poll)
+
+    def cancel(self):
+        # The worker stops at the next chunk and deletes the partial file; close() follows from its callback
+        self.progress.cancel()
+        self.cancel_btn.config(state="disabled", text="Cancelling...")
+
+    def close(self):
+        if self.top.winfo_exists(): self.top.destroy()
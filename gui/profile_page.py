@@ -1,11 +1,11 @@
 # gui/profile_page.py
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk, ImageDraw, ImageOps 
-import os
 from utils.colors import COLORS
 from utils.session import Session
 from utils.id_generator import format_contact_number, generate_formatted_id
+from utils.avatars import circle_image
+from utils.image_store import ingest
 from database.users_db import update_user_profile, update_profile_image
 # FIX: Removed circular import here
 
@@ -167,7 +167,19 @@ class ProfilePage(tk.Frame):
              return
 
         user_id = self.user_data.get('user_id')
-        if update_user_profile(user_id, email, clean_contact, dept):
+        self.save_btn.config(state="disabled", text="Please wait...")
+        self.controller.executor.submit(update_user_profile, user_id, email, clean_contact, dept,
+                                        on_success=lambda ok: self.on_profile_saved(ok, email, clean_contact, dept),
+                                        on_error=self.on_profile_save_failed,
+                                        owner=self, key="profile.save")
+
+    def on_profile_save_failed(self, error):
+        self.save_btn.config(state="normal", text="Save Changes")
+        messagebox.showerror("Error", f"Database Error: {error}")
+
+    def on_profile_saved(self, ok, email, clean_contact, dept):
+        self.save_btn.config(state="normal", text="Save Changes")
+        if ok:
             messagebox.showinfo("Success", "Profile Updated!")
             self.user_data.update({'email': email, 'department': dept, 'contact': clean_contact})
             Session.set_user(self.user_data)
@@ -189,23 +201,11 @@ class ProfilePage(tk.Frame):
         
         initials = "".join([n[0] for n in self.user_data.get('username', 'U').split()[:2]]).upper()
         
-        try:
-            if path and os.path.exists(path):
-                img = Image.open(path)
-                img = ImageOps.fit(img, (size, size), method=Image.Resampling.LANCZOS)
-                
-                mask = Image.new('L', (size, size), 0)
-                draw = ImageDraw.Draw(mask)
-                draw.ellipse((0, 0, size, size), fill=255)
-                
-                output = Image.new('RGBA', (size, size), (0,0,0,0))
-                output.paste(img, (0, 0), mask)
-                
-                self.tk_image = ImageTk.PhotoImage(output)
-                self.avatar_canvas.create_image(size//2, size//2, image=self.tk_image)
-                return
-        except Exception as e:
-            print(f"Image Load Error: {e}")
+        # Shared avatar cache (utils/avatars.py): decoded once per file version and size
+        self.tk_image = circle_image(path, size)
+        if self.tk_image:
+            self.avatar_canvas.create_image(size//2, size//2, image=self.tk_image)
+            return
 
         self.avatar_canvas.create_oval(5, 5, size-5, size-5, fill="#E0E0E0", outline="")
         self.avatar_canvas.create_text(size//2, size//2, 
@@ -215,13 +215,26 @@ class ProfilePage(tk.Frame):
         file_path = filedialog.askopenfilename(filetypes=[("Images", "*.png;*.jpg;*.jpeg")])
         if file_path:
             user_id = self.user_data.get('user_id')
-            if update_profile_image(user_id, file_path):
-                self.user_data['profile_image'] = file_path
-                Session.set_user(self.user_data)
-                self.load_current_avatar() 
-                messagebox.showinfo("Success", "Picture Updated!")
-            else:
-                messagebox.showerror("Error", "Failed to save image path.")
+            # Decoding and resizing a large photo takes a moment; keep the window responsive
+            self.controller.executor.submit(self.save_photo, user_id, file_path,
+                                            on_success=self.on_photo_saved,
+                                            on_error=lambda e: messagebox.showerror("Error", f"Could not read that image: {e}"),
+                                            owner=self, key="profile.photo")
+
+    @staticmethod
+    def save_photo(user_id, file_path):
+        """Runs on a worker thread: copies the picture into the image store and saves its key."""
+        key = ingest(file_path)
+        return key if update_profile_image(user_id, key) else None
+
+    def on_photo_saved(self, key):
+        if key:
+            self.user_data['profile_image'] = key
+            Session.set_user(self.user_data)
+            self.load_current_avatar() 
+            messagebox.showinfo("Success", "Picture Updated!")
+        else:
+            messagebox.showerror("Error", "Failed to save image path.")
 
     def logout_action(self):
         if messagebox.askyesno("Log Out", "Are you sure?"):
@@ -1,16 +1,32 @@
 # gui/reports_page.py
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import csv
 from datetime import datetime, timedelta
 from utils.colors import COLORS
 # FIX: Removed circular import here
 
 from database.reports_db import (
-    get_borrowing_history, get_damage_reports, 
+    get_borrowing_history_page, get_damage_reports, stream_report,
     get_overdue_items, get_inventory_status,
     get_analytics_chart_data
 )
+from database.data_versions import get_data_versions
+from gui.paged_tree import PagedTreeLoader
+from gui.popups import ExportProgressPopup
+from utils.csv_export import ExportCancelled, ExportProgress, export_csv
+from utils.chart_series import DAY, WEEK, chart_series
+
+# Report Type -> (column headers, row keys)
+REPORT_COLUMNS = {
+    "Borrowing History": (["Item Name", "Borrower", "Date Borrowed", "Due Date", "Status"],
+                          ["item_name", "borrower", "date_borrowed", "due_date", "status"]),
+    "Damage Reports": (["Item Name", "Reported By", "Date Returned", "Severity", "Remarks"],
+                       ["item_name", "reported_by", "date_returned", "severity", "remarks"]),
+    "Overdue Items": (["Item Name", "Borrower", "Date Borrowed", "Due Date", "Days Overdue"],
+                      ["item_name", "borrower", "date_borrowed", "due_date", "days_overdue"]),
+    "Current Inventory": (["Code", "Name", "Category", "Quantity", "Status"],
+                          ["code", "name", "category", "quantity", "status"]),
+}
 
 class ReportsPage(tk.Frame):
     def __init__(self, parent, controller):
@@ -18,9 +34,26 @@ class ReportsPage(tk.Frame):
         self.controller = controller
         self.current_data = []
         self.current_columns = []
+        self.history_pages = None   # Loader of the Borrowing History table (it is paginated)
+        self.report_type = None     # Report on screen and the (start, end) it was generated for
+        self.report_range = None
+        self.export_popup = None
+        self.chart_data = None      # (rows, start, end) of the chart on screen, redrawn on resize
+        self.data_versions = None  # Versions the report on screen was generated at
         self.build_ui()
         self.generate_report()
 
+    # --- PAGE LIFECYCLE (called by TrackLabApp.show_page) ---
+    def on_show(self):
+        # Re-run the report only if borrows, returns or stock changed since it was generated
+        if self.data_versions is not None:
+            self.controller.refresh_if_changed(self, self.data_versions, self.generate_report)
+
+    def on_overdue(self):
+        # Pushed by the overdue scheduler; only the overdue report lists these borrows
+        if self.type_cb.get() == "Overdue Items":
+            self.generate_report()
+
     def build_ui(self):
         # --- NAV BAR ---
         nav_bar = tk.Frame(self, bg="white", height=60, padx=20)
@@ -89,10 +122,12 @@ class ReportsPage(tk.Frame):
 
         chart_frame = tk.Frame(split, bg="white", padx=10, pady=10)
         chart_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 10))
-        tk.Label(chart_frame, text="Activity Trends (Daily Usage)", font=("Arial", 12, "bold"), bg="white", fg="#555").pack(anchor="w")
+        self.chart_title = tk.Label(chart_frame, text="Activity Trends (Daily Usage)", font=("Arial", 12, "bold"), bg="white", fg="#555")
+        self.chart_title.pack(anchor="w")
         
         self.chart_canvas = tk.Canvas(chart_frame, bg="white", height=250, highlightthickness=0)
         self.chart_canvas.pack(fill="both", expand=True, pady=10)
+        self.chart_canvas.bind("<Configure>", lambda e: self.chart_data and self.draw_chart(*self.chart_data))
 
         table_frame = tk.Frame(split, bg="white", padx=10, pady=10)
         table_frame.grid(row=0, column=1, sticky="nsew")
@@ -135,98 +170,165 @@ class ReportsPage(tk.Frame):
             self.tree.column(col, width=100, anchor="w")
         
         self.tree.pack(fill="both", expand=True)
+        self.scroll_y = scroll_y
 
     def generate_report(self):
         report_type = self.type_cb.get()
         start = self.date_from.get()
         end = self.date_to.get()
 
-        self.draw_chart(start, end)
+        if report_type not in REPORT_COLUMNS:
+            return
+
+        # Loading placeholders while the worker thread runs the queries
         self.current_data = []
-        data = []
-        
+        self.table_title.config(text=f"{report_type} (Loading...)")
+        for widget in self.tree_frame.winfo_children(): widget.destroy()
+        tk.Label(self.tree_frame, text="Loading report...", bg="white", fg="#999").pack(pady=50)
+        self.chart_data = None
+        self.chart_canvas.delete("all")
+        self.chart_canvas.create_text(200, 100, text="Loading chart...", fill="#999")
+
+        self.controller.executor.submit(self.fetch_report, report_type, start, end,
+                                        on_success=lambda result: self.show_report(report_type, start, end, result),
+                                        on_error=self.show_report_error,
+                                        owner=self, key="reports.generate")
+
+    @staticmethod
+    def fetch_report(report_type, start, end):
+        """Runs on a worker thread. Returns (data versions, report rows, chart rows)."""
+        versions = get_data_versions()
+        chart_data = get_analytics_chart_data(start, end)
+
         if report_type == "Borrowing History":
-            data = get_borrowing_history(start, end)
-            cols = ["Item Name", "Borrower", "Date Borrowed", "Due Date", "Status"]
-            db_keys = ["item_name", "borrower", "date_borrowed", "due_date", "status"]
-            
+            # First page only; the table loads the rest while scrolling
+            data = get_borrowing_history_page(start, end)
         elif report_type == "Damage Reports":
             data = get_damage_reports(start, end)
-            cols = ["Item Name", "Reported By", "Date Returned", "Severity", "Remarks"]
-            db_keys = ["item_name", "reported_by", "date_returned", "severity", "remarks"]
-            
         elif report_type == "Overdue Items":
             data = get_overdue_items()
-            cols = ["Item Name", "Borrower", "Date Borrowed", "Due Date", "Days Overdue"]
-            db_keys = ["item_name", "borrower", "date_borrowed", "due_date", "days_overdue"]
-            
-        elif report_type == "Current Inventory":
-            data = get_inventory_status()
-            cols = ["Code", "Name", "Category", "Quantity", "Status"]
-            db_keys = ["code", "name", "category", "quantity", "status"]
-        
         else:
-            return
+            data = get_inventory_status()
+        return versions, data, chart_data
 
-        self.table_title.config(text=f"{report_type} ({len(data)} Records)")
+    def show_report(self, report_type, start, end, result):
+        self.data_versions, data, chart_data = result
+        cols, db_keys = REPORT_COLUMNS[report_type]
+
+        self.chart_data = (chart_data, start, end)
+        self.draw_chart(chart_data, start, end)
         self.create_tree(cols)
-        
-        if not data:
-            pass 
-        
-        for row in data:
+        self.report_type = report_type
+        self.report_range = (start, end)
+        self.history_pages = None
+
+        if report_type == "Borrowing History":
+            rows, cursor = data
+            self.history_pages = PagedTreeLoader(
+                self.tree, self.scroll_y, self.controller.executor, owner=self.tree, key="reports.history_page",
+                fetch=lambda after: get_borrowing_history_page(start, end, after),
+                show=lambda page: self.add_rows(report_type, page))
+            self.history_pages.start(rows, cursor)
+        else:
+            self.add_rows(report_type, data)
+
+    def add_rows(self, report_type, rows):
+        _, db_keys = REPORT_COLUMNS[report_type]
+        for row in rows:
             values = [str(row.get(k, "")) for k in db_keys]
             self.tree.insert("", "end", values=values)
             self.current_data.append(values)
+        more = self.history_pages is not None and not self.history_pages.exhausted
+        self.table_title.config(text=f"{report_type} ({len(self.current_data)}{'+' if more else ''} Records)")
 
-    def draw_chart(self, start, end):
+    def show_report_error(self, error):
+        self.table_title.config(text="Data Preview")
+        self.create_tree([])
         self.chart_canvas.delete("all")
-        data = get_analytics_chart_data(start, end)
-        
+        messagebox.showerror("Error", f"Failed to generate report: {error}")
+
+    # Chart layout: pixels per plotted point, and the most markers/labels drawn
+    CHART_PX_PER_POINT = 3
+    CHART_MAX_MARKERS = 40
+    CHART_MAX_TICKS = 8
+
+    def draw_chart(self, data, start, end):
+        """
+        Plots the zero-filled series, bucketed by day/week/month and downsampled to
+        the canvas width. The line is a single canvas item; point markers and
+        labels only appear when there are few points, so the item count is bounded.
+        """
+        canvas = self.chart_canvas
+        canvas.delete("all")
+
         if not data:
-            self.chart_canvas.create_text(200, 100, text="No activity data for selected period.", fill="#999")
+            canvas.create_text(200, 100, text="No activity data for selected period.", fill="#999")
             return
 
-        w, h, margin = 400, 200, 30
-        counts = [d['count'] for d in data]
-        max_val = max(counts) if counts else 1
-        num_points = len(data)
-        x_step = (w - 2 * margin) / max(1, num_points - 1)
-        
-        self.chart_canvas.create_line(margin, h-margin, w-margin, h-margin, fill="#999", width=2)
-        self.chart_canvas.create_line(margin, h-margin, margin, margin, fill="#999", width=2)
+        w = max(canvas.winfo_width(), 400)
+        h = max(canvas.winfo_height(), 200)
+        margin = 30
+        plot_w, plot_h = w - 2 * margin, h - 2 * margin
+        try:
+            resolution, series = chart_series(data, start, end, max(2, plot_w // self.CHART_PX_PER_POINT))
+        except ValueError:
+            canvas.create_text(200, 100, text="Invalid date range.", fill="#999")
+            return
+        self.chart_title.config(text=f"Activity Trends ({resolution} Usage)")
 
-        prev_x, prev_y = None, None
-        
-        for i, point in enumerate(data):
-            x = margin + (i * x_step)
-            y = (h - margin) - ((point['count'] / max_val) * (h - 2 * margin))
-            
-            if prev_x is not None:
-                self.chart_canvas.create_line(prev_x, prev_y, x, y, fill=COLORS["primary_green"], width=2)
-            
-            self.chart_canvas.create_oval(x-3, y-3, x+3, y+3, fill=COLORS["primary_green"], outline="white")
-            
-            if num_points < 10 or i % 3 == 0:
-                day_lbl = point['day'][5:]
-                self.chart_canvas.create_text(x, h-margin+10, text=day_lbl, font=("Arial", 7), angle=45)
-            
-            self.chart_canvas.create_text(x, y-10, text=str(point['count']), font=("Arial", 8, "bold"), fill="#555")
-
-            prev_x, prev_y = x, y
+        max_val = max(count for _, count in series) or 1
+        first, last = series[0][0], series[-1][0]
+        span = max((last - first).days, 1)
+
+        # x follows the date, so gaps left by downsampling keep their true width
+        coords = [(margin + (day - first).days / span * plot_w,
+                   (h - margin) - (count / max_val) * plot_h) for day, count in series]
+
+        canvas.create_line(margin, h-margin, w-margin, h-margin, fill="#999", width=2)
+        canvas.create_line(margin, h-margin, margin, margin, fill="#999", width=2)
+        canvas.create_text(margin - 4, margin, text=str(max_val), font=("Arial", 7), anchor="e", fill="#555")
+
+        if len(coords) > 1:
+            canvas.create_line(*[v for xy in coords for v in xy], fill=COLORS["primary_green"], width=2)
+
+        if len(coords) <= self.CHART_MAX_MARKERS:
+            for (x, y), (_, count) in zip(coords, series):
+                canvas.create_oval(x-3, y-3, x+3, y+3, fill=COLORS["primary_green"], outline="white")
+                canvas.create_text(x, y-10, text=str(count), font=("Arial", 8, "bold"), fill="#555")
+
+        step = max(1, -(-len(series) // self.CHART_MAX_TICKS))
+        for (x, _), (day, _) in list(zip(coords, series))[::step]:
+            label = day.strftime("%m-%d") if resolution in (DAY, WEEK) and span < 366 else day.strftime("%Y-%m")
+            canvas.create_text(x, h-margin+10, text=label, font=("Arial", 7), angle=45)
 
     def export_csv(self):
         if not self.current_data:
             messagebox.showwarning("Warning", "No data to export. Generate a report first.")
             return
-            
-        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
-        if path:
-            try:
-                with open(path, mode="w", newline="", encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(self.current_columns)
-                    writer.writerows(self.current_data)
-                messagebox.showinfo("Success", "Export successful!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export: {e}")
\ No newline at end of file
+        if self.export_popup is not None:
+            messagebox.showwarning("Warning", "An export is already running.")
+            return
+
+        path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                            filetypes=[("CSV Files", "*.csv"), ("Compressed CSV", "*.csv.gz")])
+        if not path: return
+
+        # Re-runs the report on the server and streams it to the file, so the export
+        # is complete even when only the first pages are loaded on screen
+        report_type, (start, end) = self.report_type, self.report_range
+        _, db_keys = REPORT_COLUMNS[report_type]
+        progress = ExportProgress()
+        self.export_popup = ExportProgressPopup(self.winfo_toplevel(), progress, path)
+        self.controller.executor.submit(
+            export_csv, path, self.current_columns, stream_report(report_type, start, end),
+            lambda row: [str(row.get(k, "")) for k in db_keys], progress, compress=path.endswith(".gz"),
+            on_success=self.on_export_done, on_error=self.on_export_failed)
+
+    def on_export_done(self, rows):
+        self.export_popup.close(); self.export_popup = None
+        messagebox.showinfo("Success", f"Export successful! ({rows:,} rows)")
+
+    def on_export_failed(self, error):
+        self.export_popup.close(); self.export_popup = None
+        if not isinstance(error, ExportCancelled):
+            messagebox.showerror("Error", f"Failed to export: {error}")
@@ -0,0 +1,145 @@
+# gui/virtual_list.py
+import tkinter as tk
+from tkinter import ttk
+
+WHEEL_EVENTS = ("<MouseWheel>", "<Button-4>", "<Button-5>")   # Windows/macOS, X11 up, X11 down
+
+class VirtualList(tk.Frame):
+    """
+    Scrollable list of fixed-height rows that only builds widgets for the rows in
+    view (plus a small buffer) and recycles them while scrolling, so memory and
+    redraw cost stay constant however many items there are.
+
+    create_row(parent) -> entry   builds one reusable row; entry['frame'] is its root widget
+    update_row(entry, item)        fills a row with an item's data
+    key(item)                      stable identity, used to keep the scroll position across set_items()
+    """
+    BUFFER = 3  # Extra rows kept built above and below the viewport
+
+    def __init__(self, parent, row_height, create_row, update_row, key=None, bg="white"):
+        super().__init__(parent, bg=bg)
+        self.row_height = row_height
+        self.create_row = create_row
+        self.update_row = update_row
+        self.key = key or (lambda item: item)
+        self.items = []
+        self.pool = []        # Built rows; each entry also records the index it shows
+        self.width = 1
+
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0, yscrollincrement=row_height // 3 or 1)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.message = self.canvas.create_text(0, 20, text="", fill="#999", anchor="n")
+
+        self.canvas.bind("<Configure>", self.on_resize)
+        # Wheel events over the list (canvas or any row widget) go to a bind tag of
+        # its own, so the application's other wheel bindings are left alone
+        self.wheel_tag = f"VirtualListWheel{id(self)}"
+        for seq in WHEEL_EVENTS: self.bind_class(self.wheel_tag, seq, self.on_wheel)
+        self.add_wheel_tag(self.canvas)
+
+    def destroy(self):
+        for seq in WHEEL_EVENTS: self.unbind_class(self.wheel_tag, seq)
+        super().destroy()
+
+    # --- DATA ---
+    def set_items(self, items):
+        """Replaces the data; rows already on screen are only updated if their item changed."""
+        anchor = self.first_visible_key()
+        self.items = items
+        self.canvas.configure(scrollregion=(0, 0, self.width, len(items) * self.row_height))
+
+        # Keep the same item at the top when rows are added or removed above it
+        if anchor is not None:
+            for index, item in enumerate(items):
+                if self.key(item) == anchor[0]:
+                    self.scroll_to_offset(index * self.row_height + anchor[1])
+                    break
+        self.layout()
+
+    def set_message(self, text):
+        """Centered text shown over the list (e.g. 'Loading...' or 'No active borrows.')."""
+        self.canvas.itemconfig(self.message, text=text)
+
+    def first_visible_key(self):
+        if not self.items: return None
+        top = self.canvas.canvasy(0)
+        index = min(int(top // self.row_height), len(self.items) - 1)
+        return self.key(self.items[index]), top - index * self.row_height
+
+    # --- SCROLLING ---
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.layout()
+
+    def scroll_to_offset(self, y):
+        total = len(self.items) * self.row_height
+        if total > 0:
+            self.canvas.yview_moveto(max(0.0, y / total))
+
+    def add_wheel_tag(self, widget):
+        """Makes the wheel scroll the list while the pointer is over widget or its children."""
+        stack = [widget]
+        while stack:
+            w = stack.pop()
+            w.bindtags((self.wheel_tag,) + w.bindtags())
+            stack.extend(w.winfo_children())
+
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0: step = -1
+        else: step = 1
+        self.yview("scroll", step * 3, "units")  # One row per notch
+
+    def on_resize(self, event):
+        self.width = event.width
+        self.canvas.coords(self.message, event.width / 2, 20)
+        for entry in self.pool:
+            self.canvas.itemconfig(entry['window'], width=event.width)
+        self.canvas.configure(scrollregion=(0, 0, self.width, len(self.items) * self.row_height))
+        self.layout()
+
+    # --- RECYCLING ---
+    def layout(self):
+        """Binds pooled rows to the indexes in view, building more only if the viewport grew."""
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.row_height)
+        first = max(0, int(top // self.row_height) - self.BUFFER)
+        last = min(len(self.items), int((top + height) // self.row_height) + 1 + self.BUFFER)
+        wanted = range(first, last)
+
+        while len(self.pool) < len(wanted):
+            entry = self.create_row(self.canvas)
+            self.add_wheel_tag(entry['frame'])
+            entry['index'] = None
+            entry['item'] = None
+            entry['window'] = self.canvas.create_window(0, -self.row_height, window=entry['frame'], anchor="nw",
+                                                        width=self.width, height=self.row_height)
+            self.pool.append(entry)
+
+        # A row already showing a wanted item keeps it (and just moves if rows were
+        # inserted above); the other rows are reassigned and refilled
+        by_key = {self.key(e['item']): e for e in self.pool if e['item'] is not None}
+        assigned = {}
+        for index in wanted:
+            entry = by_key.pop(self.key(self.items[index]), None)
+            if entry is not None: assigned[index] = entry
+        taken = {id(e) for e in assigned.values()}
+        free = [e for e in self.pool if id(e) not in taken]
+
+        for index in wanted:
+            entry = assigned.get(index) or free.pop()
+            if entry['index'] != index:
+                entry['index'] = index
+                self.canvas.coords(entry['window'], 0, index * self.row_height)
+            item = self.items[index]
+            if entry['item'] is not item and entry['item'] != item:
+                self.update_row(entry, item)
+                entry['item'] = item
+
+        # Spare rows wait above the scroll region, out of sight
+        for entry in free:
+            if entry['index'] is not None:
+                entry['index'] = None
+                self.canvas.coords(entry['window'], 0, -self.row_height)
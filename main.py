@@ -1,8 +1,21 @@
 # main.py
-import tkinter as tk
-from gui.app import TrackLabApp
+from utils.startup_profile import stage, report_first_paint
+
+with stage("import tkinter"):
+    import tkinter as tk
+with stage("import gui.app"):
+    from gui.app import TrackLabApp
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = TrackLabApp(root)
-    root.mainloop()     
\ No newline at end of file
+    with stage("create window"):
+        root = tk.Tk()
+    with stage("build landing page"):
+        app = TrackLabApp(root)
+    report_first_paint(root)
+    root.mainloop()
+    app.executor.shutdown()
+    # Imported late: the landing page never needs the database modules
+    from database.activity_db import close_activity_log
+    from database.connection import close_pool
+    close_activity_log()
+    close_pool()
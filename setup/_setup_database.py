@@ -1,27 +1,40 @@
-import mysql.connector
-from mysql.connector import Error
+import os
+import sys
+
+# Allow running as `python setup/_setup_database.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import DB_BACKEND, DB_CONFIG, SQLITE_PATH
+from database.migrations import migrate
+from utils.logo import prerender_logos
+
+# Password is 'admin123' hashed (SHA256)
+ADMIN_PASS = "240be518fabd2724ddb6f04eeb1da5967448d7e831c08c8fa822809f74c720a9"
 
 def create_database():
     """Creates the database and tables in MySQL (XAMPP)."""
+    import mysql.connector
+    from mysql.connector import Error
+
     try:
         # 1. Connect to MySQL Server (No Database yet)
         print("🔌 Connecting to MySQL...")
         conn = mysql.connector.connect(
-            host="127.0.0.1",
-            port=3307,          # CHECK THIS: Use 3306 if XAMPP is default
-            user="root",
-            password=""
+            host=DB_CONFIG["host"],
+            port=DB_CONFIG["port"],          # CHECK THIS: Use 3306 if XAMPP is default
+            user=DB_CONFIG["user"],
+            password=DB_CONFIG["password"]
         )
         
         if conn.is_connected():
             cursor = conn.cursor()
             
             # 2. Create Database
-            cursor.execute("CREATE DATABASE IF NOT EXISTS tracklab")
-            print("✅ Database 'tracklab' checked/created.")
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
+            print(f"✅ Database '{DB_CONFIG['database']}' checked/created.")
             
             # 3. Connect to the new Database
-            conn.database = "tracklab"
+            conn.database = DB_CONFIG["database"]
             
             # 4. Create Tables
             tables = {
@@ -98,15 +111,16 @@ def create_database():
             
             # 5. Insert Default Admin User
             try:
-                # Password is 'admin123' hashed (SHA256)
-                admin_pass = "240be518fabd2724ddb6f04eeb1da5967448d7e831c08c8fa822809f74c720a9"
-                cursor.execute(f"INSERT IGNORE INTO users (username, password, role) VALUES ('admin', '{admin_pass}', 'Staff')")
+                cursor.execute(f"INSERT IGNORE INTO users (username, password, role) VALUES ('admin', '{ADMIN_PASS}', 'Staff')")
                 print("✅ Default user 'admin' (pass: admin123) ensured.")
             except Error as e:
                 print(f"   ⚠️ Could not create default admin: {e}")
 
             conn.commit()
-            print("\n🚀 Database Setup Complete! You can now run main.py.")
+
+            # 6. Indexes and later schema changes
+            if migrate():
+                print("\n🚀 Database Setup Complete! You can now run main.py.")
 
     except Error as e:
         print(f"❌ Critical Connection Error: {e}")
@@ -115,5 +129,108 @@ def create_database():
             cursor.close()
             conn.close()
 
+SQLITE_TABLES = {
+    "users": """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            role VARCHAR(20) DEFAULT 'Student',
+            email VARCHAR(100),
+            contact VARCHAR(20),
+            department VARCHAR(100),
+            profile_image VARCHAR(255)
+        );
+    """,
+    "equipment": """
+        CREATE TABLE IF NOT EXISTS equipment (
+            equipment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code VARCHAR(50) UNIQUE NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            category VARCHAR(50),
+            quantity INT DEFAULT 0,
+            `condition` VARCHAR(50) DEFAULT 'Good'
+        );
+    """,
+    "borrowers": """
+        CREATE TABLE IF NOT EXISTS borrowers (
+            borrower_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id VARCHAR(50) UNIQUE NOT NULL,
+            full_name VARCHAR(100) NOT NULL,
+            contact VARCHAR(50),
+            department VARCHAR(100)
+        );
+    """,
+    "borrow_transactions": """
+        CREATE TABLE IF NOT EXISTS borrow_transactions (
+            borrow_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipment_id INT NOT NULL REFERENCES equipment(equipment_id),
+            borrower_id INT NOT NULL REFERENCES borrowers(borrower_id),
+            borrow_date DATETIME,
+            expected_return_date DATETIME,
+            purpose TEXT,
+            status VARCHAR(50) DEFAULT 'Ongoing'
+        );
+    """,
+    "return_transactions": """
+        CREATE TABLE IF NOT EXISTS return_transactions (
+            return_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            borrow_id INT NOT NULL REFERENCES borrow_transactions(borrow_id),
+            return_date DATETIME DEFAULT (datetime('now', 'localtime')),
+            `condition` VARCHAR(50),
+            remarks TEXT
+        );
+    """
+    # activity_logs: one table per month, created by database/activity_partitions.py
+}
+
+# InnoDB indexes foreign key columns automatically; SQLite does not
+SQLITE_FK_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_borrow_equipment ON borrow_transactions (equipment_id)",
+    "CREATE INDEX IF NOT EXISTS idx_borrow_borrower ON borrow_transactions (borrower_id)",
+    "CREATE INDEX IF NOT EXISTS idx_return_borrow ON return_transactions (borrow_id)",
+]
+
+def create_sqlite_database(path=SQLITE_PATH):
+    """Creates the tables in a local SQLite file (single-lab kiosks / CI)."""
+    import sqlite3
+    from database.sqlite_backend import connect
+
+    print(f"🔌 Opening SQLite database: {os.path.abspath(path)}")
+    conn = None
+    try:
+        conn = connect(path)
+        cursor = conn.cursor()
+
+        for name, query in SQLITE_TABLES.items():
+            cursor.execute(query)
+            print(f"   - Table '{name}' is ready.")
+        for query in SQLITE_FK_INDEXES:
+            cursor.execute(query)
+
+        cursor.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES ('admin', %s, 'Staff')", (ADMIN_PASS,))
+        print("✅ Default user 'admin' (pass: admin123) ensured.")
+
+        conn.commit()
+
+        if migrate():
+            print("\n🚀 Database Setup Complete! You can now run main.py.")
+    except sqlite3.Error as e:
+        print(f"❌ SQLite Setup Error: {e}")
+    finally:
+        if conn: conn.close()
+
+def prepare_assets():
+    """Renders the logo sizes now so the first kiosk start does not have to."""
+    try:
+        prerender_logos()
+        print("✅ Logo images pre-rendered.")
+    except Exception as e:
+        print(f"⚠️ Could not pre-render logo images: {e}")
+
 if __name__ == "__main__":
-    create_database()
\ No newline at end of file
+    if DB_BACKEND == "sqlite":
+        create_sqlite_database()
+    else:
+        create_database()
+    prepare_assets()
\ No newline at end of file
@@ -0,0 +1,36 @@
+# setup/archive_activity_logs.py
+"""
+Activity log retention: months older than the retention window are written to
+data/archive/activity_logs/YYYY-MM.jsonl.gz (one JSON object per line) and
+their partition (MySQL) or monthly table (SQLite) is dropped. On MySQL it also
+creates the partitions for the coming months. Schedule it monthly, e.g. with
+cron or Task Scheduler.
+
+    python setup/archive_activity_logs.py                 # keep TRACKLAB_ACTIVITY_RETENTION_MONTHS (default 12)
+    python setup/archive_activity_logs.py --keep-months 6
+    python setup/archive_activity_logs.py --no-archive    # drop old months without writing archives
+"""
+import argparse
+import os
+import sys
+
+# Allow running as `python setup/archive_activity_logs.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.activity_partitions import RETENTION_MONTHS, archive_old_months
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archive and drop old activity log months")
+    parser.add_argument("--keep-months", type=int, default=RETENTION_MONTHS,
+                        help="Months kept in the database, the current one included")
+    parser.add_argument("--no-archive", action="store_true", help="Drop old months without archiving them")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    done = archive_old_months(args.keep_months, archive=not args.no_archive)
+    if done is None:
+        sys.exit(1)
+    for month, rows in done:
+        print(f"   - {month:%Y-%m}: {rows} entries archived, month dropped")
+    print(f"✅ Activity log retention applied ({len(done)} month(s) moved out).")
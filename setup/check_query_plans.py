@@ -0,0 +1,113 @@
+# setup/check_query_plans.py
+"""
+Runs EXPLAIN on every query in reports_db, borrow_db and return_db and exits with status 1
+when one of them falls back to a full table scan.
+
+    python setup/check_query_plans.py
+
+Run it against a database holding realistic data: on near-empty MySQL tables the
+optimizer may legitimately prefer a scan over an index.
+"""
+import os
+import sys
+
+# Allow running as `python setup/check_query_plans.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import DB_BACKEND, get_connection
+from database import borrow_db, reports_db, return_db
+
+CHECKED_MODULES = [borrow_db, reports_db, return_db]
+
+SAMPLE_RANGE = ("2025-01-01 00:00:00", "2025-01-31 23:59:59")
+SAMPLE_DAYS = ("2025-01-01", "2025-01-31")
+SAMPLE_CURSOR = ("2025-01-15 12:00:00", "2025-01-15 12:00:00", 1000)   # (date, date, id) of a history page cursor
+
+# name -> (query, sample params, tables/aliases allowed to be scanned)
+CHECKED_QUERIES = {
+    "borrow_db.get_active_borrows": (
+        borrow_db.ACTIVE_BORROWS_QUERY + borrow_db.ACTIVE_BORROWS_ORDER, (), set()),
+    "borrow_db.get_active_borrows(student_id)": (
+        borrow_db.ACTIVE_BORROWS_QUERY + borrow_db.ACTIVE_BORROWS_STUDENT_FILTER + borrow_db.ACTIVE_BORROWS_ORDER,
+        ("STU-00001",), set()),
+    "borrow_db.delete_borrow_transaction": (borrow_db.ONGOING_EQUIPMENT_QUERY, (1,), set()),
+    "borrow_db.get_due_borrows": (borrow_db.DUE_BORROWS_QUERY, (), set()),
+    "borrow_db.mark_overdue": (borrow_db.MARK_OVERDUE_QUERY, ("2025-01-15 12:00:00",), set()),
+    "reports_db.get_borrowing_history": (
+        reports_db.BORROWING_HISTORY_QUERY + reports_db.BORROWING_HISTORY_ORDER, SAMPLE_RANGE, set()),
+    "reports_db.get_borrowing_history_page(after)": (
+        reports_db.BORROWING_HISTORY_QUERY + reports_db.BORROWING_HISTORY_AFTER
+        + reports_db.BORROWING_HISTORY_ORDER + " LIMIT %s", SAMPLE_RANGE + SAMPLE_CURSOR + (101,), set()),
+    "reports_db.get_damage_reports": (reports_db.DAMAGE_REPORTS_QUERY, SAMPLE_RANGE, set()),
+    "reports_db.get_overdue_items": (reports_db.OVERDUE_ITEMS_QUERY, (), set()),
+    # The inventory report lists the whole catalog by design
+    "reports_db.get_inventory_status": (reports_db.INVENTORY_STATUS_QUERY, (), {"equipment"}),
+    "reports_db.get_analytics_chart_data": (reports_db.ANALYTICS_CHART_QUERY, SAMPLE_DAYS, set()),
+    # The first page walks the return_date index newest-first and stops at the LIMIT
+    "return_db.get_return_history_page": (
+        return_db.RETURN_HISTORY_QUERY + return_db.RETURN_HISTORY_ORDER, (101,), {"r"}),
+    "return_db.get_return_history_page(after)": (
+        return_db.RETURN_HISTORY_QUERY + return_db.RETURN_HISTORY_AFTER + return_db.RETURN_HISTORY_ORDER,
+        SAMPLE_CURSOR + (101,), set()),
+}
+
+def find_unchecked_queries():
+    """Every *_QUERY constant in the checked modules must be covered above."""
+    checked = [query for query, _, _ in CHECKED_QUERIES.values()]
+    missing = []
+    for module in CHECKED_MODULES:
+        for name, value in vars(module).items():
+            if name.endswith("_QUERY") and not any(value in q for q in checked):
+                missing.append(f"{module.__name__.split('.')[-1]}.{name}")
+    return missing
+
+def find_full_scans(cursor, query, params):
+    """Returns the tables (as named in the plan) that are read with a full scan."""
+    scans = []
+    if DB_BACKEND == "sqlite":
+        cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+        for row in cursor.fetchall():
+            detail = row[-1]
+            # "SCAN t" / "SCAN t USING INDEX x" read every row; "SEARCH t ..." uses the index
+            if detail.startswith("SCAN ") and not detail.startswith("SCAN CONSTANT"):
+                scans.append(detail.split()[1])
+    else:
+        cursor.execute("EXPLAIN " + query, params)
+        columns = [col[0] for col in cursor.description]
+        for row in cursor.fetchall():
+            plan = dict(zip(columns, row))
+            # ALL = full table scan, index = full index scan
+            if plan.get("type") in ("ALL", "index"):
+                scans.append(plan.get("table"))
+    return scans
+
+def check_query_plans():
+    failures = []
+    with get_connection() as conn:
+        if not conn:
+            print("❌ Could not connect to the database.")
+            return False
+        cursor = conn.cursor()
+        try:
+            for name, (query, params, allowed) in CHECKED_QUERIES.items():
+                scans = [t for t in find_full_scans(cursor, query, params) if t not in allowed]
+                if scans:
+                    failures.append(name)
+                    print(f"   ❌ {name}: full scan of {', '.join(scans)}")
+                else:
+                    print(f"   ✅ {name}")
+        finally:
+            cursor.close()
+
+    for name in find_unchecked_queries():
+        failures.append(name)
+        print(f"   ❌ {name}: not registered in CHECKED_QUERIES")
+
+    if failures:
+        print(f"\n{len(failures)} query plan check(s) failed.")
+        return False
+    print("\nAll query plans use indexes.")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_plans() else 1)
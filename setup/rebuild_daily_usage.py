@@ -0,0 +1,29 @@
+# setup/rebuild_daily_usage.py
+"""
+Recomputes the daily_usage rollup (database/daily_usage.py) from the raw borrow
+and return tables. The write paths keep it current; run this after importing or
+hand-editing transactions, ideally while the kiosks are idle.
+
+    python setup/rebuild_daily_usage.py                    # everything
+    python setup/rebuild_daily_usage.py --since 2025-01-01 # only from that day on
+"""
+import argparse
+import os
+import sys
+
+# Allow running as `python setup/rebuild_daily_usage.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.daily_usage import rebuild
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rebuild the daily_usage rollup")
+    parser.add_argument("--since", help="First day to rebuild (YYYY-MM-DD); default is all history")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    written = rebuild(args.since)
+    if written is None:
+        sys.exit(1)
+    print(f"✅ daily_usage rebuilt ({written} day/item rows).")
@@ -0,0 +1,125 @@
+# setup/stress_borrow.py
+"""
+Hammers borrow_equipment() from many threads at once and checks that stock is
+never oversold: every unit is borrowed exactly once and the quantity ends at 0.
+
+    python setup/stress_borrow.py --threads 16 --stock 20
+    python setup/stress_borrow.py --temp-sqlite      # throwaway SQLite file
+
+The script creates its own equipment item and borrower and removes them afterwards.
+A smaller version of the same check runs in the test suite (tests/test_borrow_db.py).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Allow running as `python setup/stress_borrow.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent borrow stress check")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent borrowers (default 16)")
+    parser.add_argument("--stock", type=int, default=20, help="Units of the test item (default 20)")
+    parser.add_argument("--attempts", type=int, default=5, help="Borrow attempts per thread (default 5)")
+    parser.add_argument("--temp-sqlite", action="store_true", help="Run against a fresh temporary SQLite file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    # Configuration is read at import time, so set the environment first
+    pool_size = int(os.environ.get("TRACKLAB_DB_POOL_SIZE", "5"))
+    os.environ["TRACKLAB_DB_POOL_SIZE"] = str(max(pool_size, args.threads))
+    temp_dir = None
+    if args.temp_sqlite:
+        temp_dir = tempfile.TemporaryDirectory()
+        os.environ["TRACKLAB_DB_BACKEND"] = "sqlite"
+        os.environ["TRACKLAB_SQLITE_PATH"] = os.path.join(temp_dir.name, "stress.db")
+
+    from database.connection import get_connection, close_pool
+    from database.activity_db import close_activity_log
+    from database.borrow_db import borrow_equipment, BORROW_OK, BORROW_INSUFFICIENT_STOCK
+
+    if args.temp_sqlite:
+        from setup._setup_database import create_sqlite_database
+        create_sqlite_database(os.environ["TRACKLAB_SQLITE_PATH"])
+
+    tag = f"STRESS-{int(time.time())}"
+    with get_connection() as conn:
+        if not conn:
+            print("❌ Could not connect to the database.")
+            return False
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO equipment (code, name, category, quantity, `condition`) VALUES (%s, %s, %s, %s, 'Good')",
+                       (tag, "Stress Test Item", "Test", args.stock))
+        equipment_id = cursor.lastrowid
+        cursor.execute("INSERT INTO borrowers (student_id, full_name) VALUES (%s, %s)", (tag, "Stress Tester"))
+        borrower_id = cursor.lastrowid
+        conn.commit()
+        cursor.close()
+
+    outcomes = []
+    outcomes_lock = threading.Lock()
+    start_gate = threading.Barrier(args.threads)
+    due = datetime.now() + timedelta(hours=1)
+
+    def worker():
+        start_gate.wait()
+        for _ in range(args.attempts):
+            result = borrow_equipment(equipment_id, borrower_id, datetime.now(), due, "Stress Test")
+            with outcomes_lock:
+                outcomes.append(result)
+
+    print(f"🔨 {args.threads} threads x {args.attempts} attempts against {args.stock} units...")
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - started
+
+    ok = True
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT quantity FROM equipment WHERE equipment_id = %s", (equipment_id,))
+            remaining = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM borrow_transactions WHERE equipment_id = %s AND status IN ('Ongoing', 'Overdue')",
+                           (equipment_id,))
+            ongoing = cursor.fetchone()[0]
+
+            successes = outcomes.count(BORROW_OK)
+            rejected = outcomes.count(BORROW_INSUFFICIENT_STOCK)
+            failed = len(outcomes) - successes - rejected
+            expected = min(args.stock, args.threads * args.attempts)
+
+            print(f"   Borrowed: {successes}  Rejected (no stock): {rejected}  Failed: {failed}")
+            print(f"   Remaining stock: {remaining}  Ongoing rows: {ongoing}")
+            print(f"   {len(outcomes) / elapsed:.0f} borrows/s over {elapsed:.2f}s")
+
+            if successes != expected or ongoing != expected or remaining != args.stock - expected or failed:
+                ok = False
+                print("❌ Stock mismatch: the borrow path oversold or lost units.")
+            else:
+                print("✅ No oversell.")
+        finally:
+            # Clean up the test rows
+            cursor.execute("DELETE FROM daily_usage WHERE equipment_id = %s", (equipment_id,))
+            cursor.execute("DELETE FROM borrow_transactions WHERE equipment_id = %s", (equipment_id,))
+            cursor.execute("DELETE FROM equipment WHERE equipment_id = %s", (equipment_id,))
+            cursor.execute("DELETE FROM borrowers WHERE borrower_id = %s", (borrower_id,))
+            conn.commit()
+            cursor.close()
+
+    # Flush the audit log while the database file still exists
+    close_activity_log()
+    close_pool()
+    if temp_dir:
+        temp_dir.cleanup()
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
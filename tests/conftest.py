@@ -0,0 +1,73 @@
+# tests/conftest.py
+"""
+The suite runs against a throwaway SQLite database, so it needs no MySQL
+server. Configuration is read when the database modules are imported, so the
+environment is set here, before any test module imports them.
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_TEMP_DIR = tempfile.TemporaryDirectory(prefix="tracklab-tests-")
+os.environ["TRACKLAB_DB_BACKEND"] = "sqlite"
+os.environ["TRACKLAB_SQLITE_PATH"] = os.path.join(_TEMP_DIR.name, "tracklab.db")
+os.environ["TRACKLAB_DATA_DIR"] = os.path.join(_TEMP_DIR.name, "data")
+os.environ["TRACKLAB_CACHE_DIR"] = os.path.join(_TEMP_DIR.name, "cache")
+os.environ["TRACKLAB_DB_POOL_SIZE"] = "16"   # Room for the concurrent borrow tests
+
+_codes = itertools.count(1)
+
+@pytest.fixture(scope="session")
+def database():
+    """Creates the schema once; pooled connections and the audit log are closed at the end."""
+    from setup._setup_database import create_sqlite_database
+    from database.activity_db import close_activity_log
+    from database.connection import close_pool
+
+    create_sqlite_database(os.environ["TRACKLAB_SQLITE_PATH"])
+    yield os.environ["TRACKLAB_SQLITE_PATH"]
+    # The audit log writes through the pool, so it goes first
+    close_activity_log()
+    close_pool()
+    _TEMP_DIR.cleanup()
+
+def _insert(query, params):
+    from database.connection import get_connection
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            cursor.close()
+
+@pytest.fixture
+def make_equipment(database):
+    """make_equipment(quantity) -> equipment_id of a new item with a unique code."""
+    def make(quantity, name="Test Item", category="Test"):
+        code = f"TEST-{next(_codes):05d}"
+        return _insert("INSERT INTO equipment (code, name, category, quantity, `condition`) VALUES (%s, %s, %s, %s, 'Good')",
+                       (code, name, category, quantity))
+    return make
+
+@pytest.fixture
+def borrower_id(database):
+    code = f"STU-T{next(_codes):05d}"
+    return _insert("INSERT INTO borrowers (student_id, full_name) VALUES (%s, %s)", (code, "Test Borrower"))
+
+def query_one(query, params=()):
+    """First column of the first row (tests read back what the code under test wrote)."""
+    from database.connection import get_connection
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
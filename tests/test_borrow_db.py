@@ -0,0 +1,91 @@
+# tests/test_borrow_db.py
+import threading
+from datetime import datetime, timedelta
+
+from database.borrow_db import BORROW_FAILED, BORROW_INSUFFICIENT_STOCK, BORROW_OK, borrow_cart
+from conftest import query_one
+
+NOW = datetime(2030, 1, 15, 9, 0)
+DUE = NOW + timedelta(hours=2)
+
+def stock(equipment_id):
+    return query_one("SELECT quantity FROM equipment WHERE equipment_id = %s", (equipment_id,))
+
+def open_borrows(equipment_id):
+    return query_one("SELECT COUNT(*) FROM borrow_transactions WHERE equipment_id = %s AND status IN ('Ongoing', 'Overdue')",
+                     (equipment_id,))
+
+def test_cart_borrows_every_line(make_equipment, borrower_id):
+    beaker, flask = make_equipment(5), make_equipment(3)
+
+    assert borrow_cart(borrower_id, [(beaker, 2), (flask, 3)], NOW, DUE, "Lab") == (BORROW_OK, [])
+
+    assert (stock(beaker), stock(flask)) == (3, 0)
+    # One transaction row per unit
+    assert (open_borrows(beaker), open_borrows(flask)) == (2, 3)
+
+def test_repeated_lines_are_merged(make_equipment, borrower_id):
+    beaker = make_equipment(4)
+
+    assert borrow_cart(borrower_id, [(beaker, 1), (beaker, 2)], NOW, DUE, "Lab") == (BORROW_OK, [])
+
+    assert stock(beaker) == 1
+    assert open_borrows(beaker) == 3
+
+def test_short_item_rolls_back_the_whole_cart(make_equipment, borrower_id):
+    beaker, flask = make_equipment(5), make_equipment(1)
+
+    status, short = borrow_cart(borrower_id, [(beaker, 2), (flask, 2)], NOW, DUE, "Lab")
+
+    assert status == BORROW_INSUFFICIENT_STOCK
+    assert short == [flask]
+    # Nothing was taken, not even the line that had enough stock
+    assert (stock(beaker), stock(flask)) == (5, 1)
+    assert (open_borrows(beaker), open_borrows(flask)) == (0, 0)
+
+def test_empty_or_invalid_cart_fails(make_equipment, borrower_id):
+    beaker = make_equipment(2)
+
+    assert borrow_cart(borrower_id, [], NOW, DUE, "Lab") == (BORROW_FAILED, [])
+    assert borrow_cart(borrower_id, [(beaker, 0)], NOW, DUE, "Lab") == (BORROW_FAILED, [])
+    assert stock(beaker) == 2
+
+def test_concurrent_borrows_never_oversell(make_equipment, borrower_id):
+    """The pytest form of setup/stress_borrow.py: more attempts than units, all at once."""
+    units, threads, attempts = 10, 8, 4
+    beaker = make_equipment(units)
+    outcomes = []
+    outcomes_lock = threading.Lock()
+    start_gate = threading.Barrier(threads)
+
+    def worker():
+        start_gate.wait()
+        for _ in range(attempts):
+            status, _ = borrow_cart(borrower_id, [(beaker, 1)], NOW, DUE, "Stress")
+            with outcomes_lock:
+                outcomes.append(status)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers: t.start()
+    for t in workers: t.join()
+
+    assert outcomes.count(BORROW_OK) == units
+    assert outcomes.count(BORROW_INSUFFICIENT_STOCK) == threads * attempts - units
+    assert stock(beaker) == 0
+    assert open_borrows(beaker) == units
+
+def test_borrow_keeps_the_catalog_cache_current(make_equipment, borrower_id, monkeypatch):
+    from database.equipment_cache import equipment_cache
+    from database.equipment_db import get_all_equipment
+    beaker = make_equipment(3)
+    equipment_cache.invalidate()   # make_equipment() writes behind the cache's back
+    get_all_equipment()   # Loads the catalog, at the current version
+    monkeypatch.setattr(equipment_cache, "ttl", 0.0001)
+    misses = equipment_cache.stats()['misses']
+
+    assert borrow_cart(borrower_id, [(beaker, 1)], NOW, DUE, "Lab") == (BORROW_OK, [])
+    rows = {row['equipment_id']: row for row in get_all_equipment()}
+
+    # The expired cache revalidated against the borrow's own version instead of reloading
+    assert rows[beaker]['quantity'] == 2
+    assert equipment_cache.stats()['misses'] == misses
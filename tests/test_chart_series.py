@@ -0,0 +1,57 @@
+# tests/test_chart_series.py
+from datetime import date
+
+from utils.chart_series import DAY, MONTH, WEEK, bucket, chart_series, choose_resolution, lttb, zero_fill
+
+def test_zero_fill_adds_missing_days():
+    rows = [{'day': '2024-01-02', 'count': 3}, {'day': '2024-01-04', 'count': '1'}]
+
+    assert zero_fill(rows, date(2024, 1, 1), date(2024, 1, 4)) == [
+        (date(2024, 1, 1), 0), (date(2024, 1, 2), 3), (date(2024, 1, 3), 0), (date(2024, 1, 4), 1)]
+
+def test_zero_fill_empty_range():
+    assert zero_fill([], date(2024, 1, 5), date(2024, 1, 4)) == []
+
+def test_resolution_follows_range_length():
+    assert choose_resolution(date(2024, 1, 1), date(2024, 3, 31)) == DAY
+    assert choose_resolution(date(2024, 1, 1), date(2024, 12, 31)) == WEEK
+    assert choose_resolution(date(2020, 1, 1), date(2024, 12, 31)) == MONTH
+
+def test_bucket_weeks_start_on_monday():
+    # 2024-01-07 is a Sunday, 2024-01-08 a Monday
+    series = [(date(2024, 1, 6), 1), (date(2024, 1, 7), 2), (date(2024, 1, 8), 4)]
+
+    assert bucket(series, WEEK) == [(date(2024, 1, 1), 3), (date(2024, 1, 8), 4)]
+
+def test_bucket_months():
+    series = [(date(2024, 1, 31), 1), (date(2024, 2, 1), 2), (date(2024, 2, 29), 3)]
+
+    assert bucket(series, MONTH) == [(date(2024, 1, 1), 1), (date(2024, 2, 1), 5)]
+    assert bucket(series, DAY) == series
+
+def test_lttb_keeps_ends_and_spikes():
+    points = [(i, 0) for i in range(100)]
+    points[37] = (37, 50)
+    points[71] = (71, -20)
+
+    sampled = lttb(points, 10)
+
+    assert len(sampled) == 10
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert (37, 50) in sampled and (71, -20) in sampled
+    assert [x for x, _ in sampled] == sorted(x for x, _ in sampled)
+
+def test_lttb_leaves_short_series_alone():
+    points = [(0, 1), (1, 2), (2, 3)]
+
+    assert lttb(points, 5) == points
+    assert lttb(points, 2) == points
+
+def test_chart_series_fits_max_points():
+    rows = [{'day': f'2024-01-{d:02d}', 'count': d} for d in range(1, 32)]
+
+    resolution, series = chart_series(rows, "2024-01-01", "2024-01-31", 12)
+
+    assert resolution == DAY
+    assert len(series) == 12
+    assert series[0] == (date(2024, 1, 1), 1) and series[-1] == (date(2024, 1, 31), 31)
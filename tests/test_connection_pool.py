@@ -0,0 +1,109 @@
+# tests/test_connection_pool.py
+import threading
+import time
+
+from database.connection import ConnectionPool
+
+class FakeConnection:
+    in_transaction = False
+
+    def __init__(self):
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        if self.closed: raise RuntimeError("closed")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+class Factory:
+    def __init__(self):
+        self.made = []
+
+    def __call__(self):
+        conn = FakeConnection()
+        self.made.append(conn)
+        return conn
+
+def test_released_connections_are_reused():
+    factory = Factory()
+    pool = ConnectionPool(factory, size=2, checkout_timeout=0.1)
+
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    assert len(factory.made) == 1
+
+def test_checkout_times_out_when_all_are_in_use():
+    pool = ConnectionPool(Factory(), size=2, checkout_timeout=0.1)
+    pool.acquire()
+    pool.acquire()
+
+    started = time.monotonic()
+    assert pool.acquire() is None
+    assert time.monotonic() - started >= 0.1
+    assert pool.stats()['in_use'] == 2
+
+def test_waiter_gets_the_released_connection():
+    pool = ConnectionPool(Factory(), size=1, checkout_timeout=5)
+    conn = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+
+    time.sleep(0.05)
+    pool.release(conn)
+    waiter.join(2)
+
+    assert got == [conn]
+
+def test_discarded_connection_frees_its_slot():
+    factory = Factory()
+    pool = ConnectionPool(factory, size=1, checkout_timeout=0.1)
+    conn = pool.acquire()
+
+    pool.release(conn, discard=True)
+
+    assert conn.closed
+    assert pool.acquire() is not conn
+    assert len(factory.made) == 2
+
+def test_dead_idle_connection_is_replaced():
+    factory = Factory()
+    pool = ConnectionPool(factory, size=1, checkout_timeout=0.1, ping_after=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.closed = True   # The server dropped it while idle
+
+    fresh = pool.acquire()
+
+    assert fresh is not conn and not fresh.closed
+
+def test_idle_connections_expire():
+    factory = Factory()
+    pool = ConnectionPool(factory, size=2, idle_timeout=0, checkout_timeout=0.1)
+    conn = pool.acquire()
+    pool.release(conn)
+    time.sleep(0.01)
+
+    assert pool.acquire() is not conn
+    assert conn.closed
+
+def test_unreachable_database_frees_the_slot():
+    pool = ConnectionPool(lambda: None, size=1, checkout_timeout=0.1)
+
+    assert pool.acquire() is None
+    assert pool.stats()['in_use'] == 0
+
+def test_failing_factory_frees_the_slot():
+    def factory():
+        raise OSError("connection refused")
+    pool = ConnectionPool(factory, size=1, checkout_timeout=0.1)
+
+    assert pool.acquire() is None
+    assert pool.acquire() is None   # Would time out if the first failure had kept the slot
+    assert pool.stats()['in_use'] == 0
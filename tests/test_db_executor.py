@@ -0,0 +1,92 @@
+# tests/test_db_executor.py
+import threading
+
+from utils.db_executor import DbExecutor
+
+class FakeRoot:
+    """Stands in for the Tk root: after() callbacks run when the test calls run_pending()."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.jobs[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_pending(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values(): callback()
+
+def drain(executor, root, task):
+    task.result(timeout=2)
+    while root.jobs: root.run_pending()
+
+def test_result_is_delivered_on_the_polling_thread():
+    root = FakeRoot()
+    executor = DbExecutor(root)
+    got = []
+
+    task = executor.submit(lambda x: x * 2, 21, on_success=got.append)
+    drain(executor, root, task)
+
+    assert got == [42]
+    executor.shutdown()
+
+def test_newer_task_with_the_same_key_wins():
+    root = FakeRoot()
+    executor = DbExecutor(root, max_workers=1)
+    gate = threading.Event()
+    got = []
+
+    executor.submit(gate.wait, 2)   # Keeps the only worker busy
+    old = executor.submit(lambda: "old", on_success=got.append, key="search")
+    new = executor.submit(lambda: "new", on_success=got.append, key="search")
+    gate.set()
+
+    # The cancelled task never ran, but result() still returns instead of blocking
+    assert old.result(timeout=2) is None
+    drain(executor, root, new)
+    assert got == ["new"]
+    executor.shutdown()
+
+def test_errors_go_to_on_error():
+    root = FakeRoot()
+    executor = DbExecutor(root)
+    errors = []
+
+    task = executor.submit(lambda: 1 / 0, on_error=errors.append)
+    task._done.wait(2)
+    while root.jobs: root.run_pending()
+
+    assert len(errors) == 1 and isinstance(errors[0], ZeroDivisionError)
+    executor.shutdown()
+
+def test_post_from_the_tk_thread_starts_polling():
+    root = FakeRoot()
+    executor = DbExecutor(root)
+    got = []
+
+    executor.post(got.append, "progress")
+    root.run_pending()
+
+    assert got == ["progress"]
+    executor.shutdown()
+
+def test_shutdown_drops_queued_tasks():
+    root = FakeRoot()
+    executor = DbExecutor(root, max_workers=1)
+    gate = threading.Event()
+    ran = []
+
+    busy = executor.submit(gate.wait, 2)
+    executor.submit(ran.append, "queued")
+    executor.shutdown()
+    gate.set()
+    busy.result(timeout=2)
+
+    assert ran == []
@@ -0,0 +1,129 @@
+# tests/test_equipment_cache.py
+from types import SimpleNamespace
+
+import pytest
+
+import database.equipment_cache as equipment_cache_module
+from database.equipment_cache import EquipmentCache
+
+ROWS = [{'equipment_id': 1, 'quantity': 5}, {'equipment_id': 2, 'quantity': 1}]
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(equipment_cache_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+class Loader:
+    def __init__(self, rows=ROWS):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [dict(row) for row in self.rows]
+
+def test_hit_within_ttl(clock):
+    cache, load = EquipmentCache(ttl=5), Loader()
+
+    assert cache.get(load) == ROWS
+    clock.value += 4
+    assert cache.get(load) == ROWS
+
+    assert load.calls == 1
+    assert cache.stats()['hits'] == 1
+
+def test_rows_are_copies(clock):
+    cache, load = EquipmentCache(ttl=5), Loader()
+    cache.get(load)[0]['quantity'] = 99
+
+    assert cache.get(load)[0]['quantity'] == 5
+
+def test_expired_but_unchanged_version_revalidates(clock):
+    cache, load = EquipmentCache(ttl=5), Loader()
+    cache.get(load, version=lambda: 7)
+
+    clock.value += 6
+    assert cache.get(load, version=lambda: 7) == ROWS
+
+    assert load.calls == 1
+    assert cache.stats()['revalidations'] == 1
+    # The TTL restarts from the revalidation
+    clock.value += 4
+    cache.get(load, version=lambda: 8)
+    assert load.calls == 1
+
+def test_expired_and_changed_version_reloads(clock):
+    cache, load = EquipmentCache(ttl=5), Loader()
+    cache.get(load, version=lambda: 7)
+
+    clock.value += 6
+    cache.get(load, version=lambda: 8)
+
+    assert load.calls == 2
+
+def test_expired_without_version_reloads(clock):
+    cache, load = EquipmentCache(ttl=5), Loader()
+    cache.get(load)
+
+    clock.value += 6
+    cache.get(load)
+
+    assert load.calls == 2
+
+def test_local_writes_patch_the_rows(clock):
+    cache, load = EquipmentCache(ttl=5), Loader()
+    cache.get(load)
+
+    cache.adjust_quantities({1: -2})
+    cache.update_item(2, quantity=4)
+    cache.remove_item(3)
+
+    assert cache.get(load) == [{'equipment_id': 1, 'quantity': 3}, {'equipment_id': 2, 'quantity': 4}]
+    assert load.calls == 1
+
+def test_load_racing_a_write_is_not_cached(clock):
+    cache = EquipmentCache(ttl=5)
+
+    def load():
+        cache.invalidate()   # A write lands while the rows are being read
+        return [dict(row) for row in ROWS]
+
+    assert cache.get(load) == ROWS
+    assert cache.stats()['cached_rows'] == 0
+
+def test_failed_load_is_not_cached(clock):
+    cache = EquipmentCache(ttl=5)
+
+    assert cache.get(lambda: None) == []
+    assert cache.stats()['cached_rows'] == 0
+
+def test_zero_ttl_disables_caching(clock):
+    cache, load = EquipmentCache(ttl=0), Loader()
+    cache.get(load)
+    cache.get(load)
+
+    assert load.calls == 2
+
+def test_own_write_moves_the_version_along(clock):
+    cache, load = EquipmentCache(ttl=5), Loader()
+    cache.get(load, version=lambda: 7)
+    cache.adjust_quantities({1: -1}, version=8)
+
+    clock.value += 6
+    cache.get(load, version=lambda: 8)
+
+    # Revalidated against the version our write produced, not reloaded
+    assert load.calls == 1
+    assert cache.stats()['revalidations'] == 1
+
+def test_version_gap_means_another_writer(clock):
+    cache, load = EquipmentCache(ttl=5), Loader()
+    cache.get(load, version=lambda: 7)
+    # Another kiosk wrote version 8; ours became 9
+    cache.update_item(1, version=9, quantity=4)
+
+    clock.value += 6
+    cache.get(load, version=lambda: 9)
+
+    assert load.calls == 2
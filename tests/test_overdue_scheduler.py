@@ -0,0 +1,66 @@
+# tests/test_overdue_scheduler.py
+from datetime import datetime, timedelta
+
+from utils.overdue_scheduler import OverdueScheduler
+
+class FakeRoot:
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.jobs[self.next_id] = (ms, callback)
+        return self.next_id
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+class RecordingExecutor:
+    """Keeps submitted calls instead of running them, so the test decides when they land."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args, on_success=None, **kwargs):
+        self.calls.append((fn, args, on_success))
+
+def make_scheduler():
+    root, executor, fired = FakeRoot(), RecordingExecutor(), []
+    return OverdueScheduler(root, executor, fired.append), root, executor, fired
+
+def test_loaded_arms_the_timer_for_the_earliest_due_time():
+    scheduler, root, executor, _ = make_scheduler()
+    scheduler.start()
+    now = datetime.now()
+
+    scheduler.loaded((1, [(now + timedelta(minutes=5), 2), (now + timedelta(minutes=1), 1)]))
+
+    assert scheduler.heap[0][1] == 1
+    delay, _ = root.jobs[scheduler.wake_job]
+    assert 55000 < delay <= 60001
+    assert scheduler.borrows_version == 1
+
+def test_wake_marks_due_borrows():
+    scheduler, root, executor, _ = make_scheduler()
+    scheduler.start()
+    scheduler.loaded((1, [(datetime.now() - timedelta(seconds=1), 1), (datetime.now() + timedelta(hours=1), 2)]))
+
+    scheduler.wake()
+
+    assert [b for _, b in scheduler.heap] == [2]
+    assert executor.calls[-1][0].__name__ == "mark_overdue"
+
+def test_results_landing_after_stop_are_ignored():
+    scheduler, root, executor, fired = make_scheduler()
+    scheduler.start()
+    scheduler.stop()
+    assert root.jobs == {}
+
+    # The resync submitted by start() finishes after the stop
+    scheduler.loaded((1, [(datetime.now() - timedelta(seconds=1), 1)]))
+    scheduler.wake()
+    scheduler.resync()
+
+    assert root.jobs == {}
+    assert len(executor.calls) == 1   # Only the resync from start()
@@ -0,0 +1,71 @@
+# tests/test_return_db.py
+from datetime import datetime, timedelta
+
+from database.borrow_db import BORROW_OK, borrow_cart, mark_overdue
+from database.connection import get_connection
+from database.return_db import return_many
+from conftest import query_one
+
+NOW = datetime(2030, 2, 1, 10, 0)
+
+def borrow(borrower_id, equipment_id, units):
+    assert borrow_cart(borrower_id, [(equipment_id, units)], NOW, NOW + timedelta(hours=1), "Lab") == (BORROW_OK, [])
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT borrow_id FROM borrow_transactions WHERE equipment_id = %s ORDER BY borrow_id",
+                       (equipment_id,))
+        ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    return ids
+
+def status(borrow_id):
+    return query_one("SELECT status FROM borrow_transactions WHERE borrow_id = %s", (borrow_id,))
+
+def stock(equipment_id):
+    return query_one("SELECT quantity FROM equipment WHERE equipment_id = %s", (equipment_id,))
+
+def test_returns_all_and_restocks_good_items(make_equipment, borrower_id):
+    beaker = make_equipment(3)
+    first, second, third = borrow(borrower_id, beaker, 3)
+
+    returned = return_many([(first, "Good", ""), (second, "Damaged", "Cracked"), (third, "Good", "")])
+
+    assert returned == 3
+    assert [status(b) for b in (first, second, third)] == ["Returned"] * 3
+    # The damaged unit does not go back on the shelf
+    assert stock(beaker) == 2
+    assert query_one("SELECT COUNT(*) FROM return_transactions WHERE borrow_id IN (%s, %s, %s)",
+                     (first, second, third)) == 3
+
+def test_returning_twice_restocks_once(make_equipment, borrower_id):
+    beaker = make_equipment(2)
+    first, second = borrow(borrower_id, beaker, 2)
+
+    assert return_many([(first, "Good", "")]) == 1
+    # first is already back; only second counts
+    assert return_many([(first, "Good", ""), (second, "Good", "")]) == 1
+    assert return_many([(first, "Good", ""), (second, "Good", "")]) == 0
+
+    assert stock(beaker) == 2
+    assert query_one("SELECT COUNT(*) FROM return_transactions WHERE borrow_id = %s", (first,)) == 1
+
+def test_overdue_borrows_can_be_returned(make_equipment, borrower_id):
+    beaker = make_equipment(1)
+    (borrow_id,) = borrow(borrower_id, beaker, 1)
+    assert mark_overdue(NOW + timedelta(days=1)) >= 1
+    assert status(borrow_id) == "Overdue"
+
+    assert return_many([(borrow_id, "Good", "")]) == 1
+    assert status(borrow_id) == "Returned"
+    assert stock(beaker) == 1
+
+def test_empty_list_returns_nothing(database):
+    assert return_many([]) == 0
+
+def test_restock_covers_every_item_of_the_batch(make_equipment, borrower_id):
+    beaker, flask = make_equipment(2), make_equipment(1)
+    beakers, flasks = borrow(borrower_id, beaker, 2), borrow(borrower_id, flask, 1)
+
+    assert return_many([(b, "Good", "") for b in beakers + flasks]) == 3
+
+    assert (stock(beaker), stock(flask)) == (2, 1)
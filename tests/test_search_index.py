@@ -0,0 +1,45 @@
+# tests/test_search_index.py
+from utils.search_index import SearchIndex
+
+ROWS = [
+    {'name': "Beaker 250ml", 'code': "EQ-00001", 'category': "Glassware"},
+    {'name': "Bunsen Burner", 'code': "EQ-00002", 'category': "Heating"},
+    {'name': "Erlenmeyer Flask", 'code': "EQ-00003", 'category': "Glassware"},
+    {'name': "Safety Goggles", 'code': "EQ-00004", 'category': None},
+]
+FIELDS = ("name", "code", "category")
+
+def names(rows):
+    return [row['name'] for row in rows]
+
+def test_substring_match():
+    index = SearchIndex(ROWS, FIELDS)
+
+    assert names(index.search("ake")) == ["Beaker 250ml"]
+    assert names(index.search("GLASS")) == ["Beaker 250ml", "Erlenmeyer Flask"]
+    assert names(index.search("00004")) == ["Safety Goggles"]
+
+def test_short_terms_match_word_prefixes():
+    index = SearchIndex(ROWS, FIELDS)
+
+    # Only word starts count for 1-2 characters ("fl" is not matched inside other words)
+    assert names(index.search("b")) == ["Beaker 250ml", "Bunsen Burner"]
+    assert names(index.search("fl")) == ["Erlenmeyer Flask"]
+
+def test_terms_must_all_match():
+    index = SearchIndex(ROWS, FIELDS)
+
+    assert names(index.search("glass fl")) == ["Erlenmeyer Flask"]
+    assert index.search("glass burner") == []
+
+def test_no_trigram_spans_two_fields():
+    index = SearchIndex(ROWS, FIELDS)
+
+    # "ml" + "EQ" would only match across the name/code boundary
+    assert index.search("mleq") == []
+
+def test_empty_query_returns_everything_in_order():
+    index = SearchIndex(ROWS, FIELDS)
+
+    assert index.search("   ") == ROWS
+    assert index.search("zzz") == []
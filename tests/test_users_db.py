@@ -0,0 +1,30 @@
+# tests/test_users_db.py
+import pytest
+
+import database.users_db as users_db
+from database.users_db import login_user, register_user
+
+@pytest.fixture
+def logged(monkeypatch):
+    """Audit entries login_user() queues: [(action, user_id)]."""
+    entries = []
+    monkeypatch.setattr(users_db, "log_activity", lambda action, user_id=None: entries.append((action, user_id)))
+    return entries
+
+@pytest.fixture(scope="module")
+def account(database):
+    assert register_user("lab.tech", "s3cret-pass", "Staff")[0]
+    return login_user("lab.tech", "s3cret-pass")['user_id']
+
+def test_successful_login(account, logged):
+    assert login_user("lab.tech", "s3cret-pass")['user_id'] == account
+    assert logged == [("Logged in", account)]
+
+def test_wrong_password_is_logged_against_the_account(account, logged):
+    assert login_user("lab.tech", "wrong") is None
+    assert logged == [("Failed login", account)]
+
+def test_unknown_username_is_not_recorded(database, logged):
+    # People type their password into the username box by mistake
+    assert login_user("s3cret-pass", "lab.tech") is None
+    assert logged == [("Failed login", None)]
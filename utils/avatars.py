@@ -0,0 +1,127 @@
+# utils/avatars.py
+"""
+Shared circular avatar service.
+
+Decoding a full-size phone photo and resampling it is the slow part of drawing a
+borrower card, so each (path, mtime, size) is rendered once:
+  1. in-memory LRU of ready Tk images (per process)
+  2. on-disk PNG thumbnail, already cropped and masked (survives restarts)
+  3. only then the original file is decoded
+Pictures ingested into utils/image_store.py ("store:<hash>") already have their
+variants on disk and skip straight to step 2's cheap PNG read.
+Placeholder circles are cached the same way. Call from the Tk thread only.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+import tkinter as tk
+from PIL import Image, ImageDraw, ImageOps, ImageTk
+
+from utils.paths import cache_path
+from utils import image_store
+
+MEMORY_CACHE_SIZE = 256
+
+PLACEHOLDER_COLORS = ["#FFCDD2", "#F8BBD0", "#E1BEE7", "#D1C4E9", "#C5CAE9", "#BBDEFB", "#B3E5FC", "#B2EBF2",
+                      "#B2DFDB", "#C8E6C9", "#DCEDC8", "#F0F4C3", "#FFF9C4", "#FFECB3", "#FFE0B2", "#FFCCBC"]
+
+_images = OrderedDict()   # cache key -> Tk image
+
+def _remember(key, image):
+    _images[key] = image
+    if len(_images) > MEMORY_CACHE_SIZE:
+        _images.popitem(last=False)
+    return image
+
+def _recall(key):
+    image = _images.get(key)
+    if image is not None:
+        _images.move_to_end(key)
+    return image
+
+@lru_cache(maxsize=16)
+def _circle_mask(size):
+    mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+    return mask
+
+def _thumbnail_path(path, mtime, size):
+    digest = hashlib.sha1(f"{os.path.abspath(path)}|{mtime}|{size}".encode()).hexdigest()
+    return cache_path("avatars", f"{digest}.png")
+
+def _render_circle(path, size):
+    """Decodes the original and returns the cropped, masked RGBA thumbnail."""
+    img = Image.open(path)
+    # JPEG can decode at a fraction of full resolution, which is most of the cost on phone photos
+    img.draft('RGB', (size * 2, size * 2))
+    img = ImageOps.fit(img, (size, size), method=Image.Resampling.LANCZOS)
+    circular = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    circular.paste(img, (0, 0), _circle_mask(size))
+    return circular
+
+def circle_image(path, size):
+    """
+    Tk image of the picture cropped to a circle, or None if it is missing/unreadable.
+    `path` is a users.profile_image value: an image store key or (older rows) a file path.
+    """
+    if image_store.is_store_key(path):
+        return _stored_image(path, size)
+    try:
+        mtime = os.path.getmtime(path) if path else None
+    except OSError:
+        mtime = None
+    if mtime is None:
+        return None
+
+    key = (path, mtime, size)
+    image = _recall(key)
+    if image is not None:
+        return image
+
+    thumb = _thumbnail_path(path, mtime, size)
+    try:
+        if os.path.exists(thumb):
+            # Tk reads PNG natively; no PIL decode needed
+            return _remember(key, tk.PhotoImage(file=thumb))
+    except tk.TclError:
+        pass  # Damaged thumbnail: render it again below
+
+    try:
+        circular = _render_circle(path, size)
+    except Exception as e:
+        print(f"Image Load Error: {e}")
+        return None
+    try:
+        circular.save(thumb, "PNG")
+    except OSError as e:
+        print(f"Avatar cache write failed: {e}")
+    return _remember(key, ImageTk.PhotoImage(circular))
+
+def _stored_image(key, size):
+    # Store entries never change, so the key alone identifies the picture
+    image = _recall((key, size))
+    if image is not None:
+        return image
+    try:
+        variant = image_store.variant_path(key, size)
+        return _remember((key, size), tk.PhotoImage(file=variant)) if variant else None
+    except Exception as e:
+        print(f"Image Load Error: {e}")
+        return None
+
+def placeholder_image(size, name):
+    """Colored circle used when a borrower has no picture (color depends on the name)."""
+    color = PLACEHOLDER_COLORS[len(name or "") % len(PLACEHOLDER_COLORS)]
+    key = ("placeholder", color, size)
+    image = _recall(key)
+    if image is not None:
+        return image
+    base = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    ImageDraw.Draw(base).ellipse((0, 0, size, size), fill=color)
+    return _remember(key, ImageTk.PhotoImage(base))
+
+def avatar_image(path, size, name):
+    """The picture if there is one, else the placeholder."""
+    return circle_image(path, size) or placeholder_image(size, name)
@@ -0,0 +1,90 @@
+# utils/chart_series.py
+"""
+Turns the per-day borrow counts of the analytics chart into a series that fits
+the canvas: missing days are filled with 0, long ranges are summed into weeks
+or months, and whatever is still wider than the plot is reduced with LTTB
+(Largest-Triangle-Three-Buckets), which keeps the peaks and dips that matter
+visually while dropping points that would share a pixel.
+"""
+from datetime import date, timedelta
+
+DAY, WEEK, MONTH = "Daily", "Weekly", "Monthly"
+
+# Longest range (in days) still shown at each resolution
+MAX_DAILY_RANGE = 92        # About a quarter
+MAX_WEEKLY_RANGE = 2 * 366  # About two years
+
+def parse_day(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+def zero_fill(rows, start, end):
+    """[(date, count)] for every day from start to end; rows: [{'day': 'YYYY-MM-DD', 'count': n}]."""
+    counts = {parse_day(r['day']): int(r['count']) for r in rows}
+    days = (end - start).days + 1
+    return [(start + timedelta(days=i), counts.get(start + timedelta(days=i), 0)) for i in range(max(days, 0))]
+
+def choose_resolution(start, end):
+    days = (end - start).days + 1
+    if days <= MAX_DAILY_RANGE: return DAY
+    if days <= MAX_WEEKLY_RANGE: return WEEK
+    return MONTH
+
+def bucket(series, resolution):
+    """Sums a daily series into weeks (starting Monday) or calendar months."""
+    if resolution == DAY:
+        return list(series)
+    totals = {}
+    for day, count in series:
+        if resolution == WEEK:
+            key = day - timedelta(days=day.weekday())
+        else:
+            key = day.replace(day=1)
+        totals[key] = totals.get(key, 0) + count
+    return sorted(totals.items())
+
+def lttb(points, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling of [(x, y)] to at most `threshold`
+    points. The first and last points are always kept.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third corner of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p[0] for p in span) / len(span)
+        avg_y = sum(p[1] for p in span) / len(span)
+
+        # Keep the point of this bucket forming the largest triangle with the previous pick
+        ax, ay = points[a]
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+def chart_series(rows, start, end, max_points):
+    """
+    Returns (resolution, [(date, count)]) ready to plot: zero-filled, bucketed for
+    the range, and downsampled to at most max_points.
+    """
+    start, end = parse_day(start), parse_day(end)
+    resolution = choose_resolution(start, end)
+    series = bucket(zero_fill(rows, start, end), resolution)
+    if len(series) > max_points:
+        # LTTB works on numbers; the index stands in for the (evenly spaced) date
+        picked = lttb([(i, count) for i, (_, count) in enumerate(series)], max_points)
+        series = [series[i] for i, _ in picked]
+    return resolution, series
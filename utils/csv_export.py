@@ -0,0 +1,58 @@
+# utils/csv_export.py
+"""
+Streams report rows to a CSV file (optionally gzip-compressed) on a worker thread.
+
+The rows arrive in chunks from a generator (e.g. reports_db.stream_report), so
+memory use does not grow with the export. The Tk thread polls an ExportProgress
+for the row count and can cancel it. The file is written as <path>.part and only
+renamed into place once complete, so a cancelled or failed export leaves nothing
+behind.
+"""
+import csv
+import gzip
+import os
+import threading
+
+class ExportCancelled(Exception):
+    """Raised on the worker thread when the user cancelled the export."""
+
+class ExportProgress:
+    """Shared between the exporting worker thread and the Tk thread that shows it."""
+
+    def __init__(self):
+        self.rows = 0
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+def export_csv(path, header, chunks, to_row, progress, compress=False):
+    """
+    Writes header plus to_row(row) for every row of every chunk. Runs on a worker thread.
+    Returns the number of rows written; raises ExportCancelled if progress was cancelled.
+    """
+    part = path + ".part"
+    try:
+        opener = gzip.open if compress else open
+        with opener(part, "wt", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for chunk in chunks:
+                if progress.cancelled:
+                    raise ExportCancelled()
+                writer.writerows(to_row(row) for row in chunk)
+                progress.rows += len(chunk)
+        os.replace(part, path)
+        return progress.rows
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    finally:
+        # Stops the database cursor at once when we bailed out early
+        close = getattr(chunks, "close", None)
+        if close: close()
@@ -0,0 +1,170 @@
+# utils/db_executor.py
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DbTask:
+    """Future-style handle returned by DbExecutor.submit()."""
+
+    def __init__(self, key=None, owner=None):
+        self.key = key
+        self.owner = owner
+        self._cancelled = False
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def cancel(self):
+        """Marks the task as unwanted. Its callbacks will not run."""
+        self._cancelled = True
+
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """
+        Blocks until the worker finishes (None if the task was cancelled before it ran).
+        Never call this from the Tk thread.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("Database task did not finish in time.")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def is_stale(self):
+        """True when nobody wants the result anymore (cancelled, or the owning widget is gone)."""
+        if self._cancelled:
+            return True
+        if self.owner is not None:
+            try:
+                return not self.owner.winfo_exists()
+            except Exception:
+                return True
+        return False
+
+    def _finish(self, result, error):
+        self._result, self._error = result, error
+        self._done.set()
+
+
+class DbExecutor:
+    """
+    Runs database calls on worker threads so the Tk mainloop never blocks on I/O.
+
+    Results are handed back to the Tk thread by polling a queue with root.after(),
+    because Tk widgets must only be touched from the thread running mainloop.
+
+        self.controller.executor.submit(get_all_equipment,
+                                        on_success=self.show_items,
+                                        owner=self, key="equipment.inventory")
+
+    - owner: a widget; the callbacks are dropped if it was destroyed meanwhile.
+    - key:   submitting again with the same key cancels the older task, so only
+             the newest result (e.g. the latest search term) is ever rendered.
+    """
+
+    POLL_MS = 20
+
+    def __init__(self, root, max_workers=4):
+        self.root = root
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tracklab-db")
+        self._inbox = queue.Queue()
+        self._latest = {}
+        self._pending = 0
+        self._futures = set()   # Queued or running; shutdown() cancels the ones not started
+        self._after_id = None
+        self._closed = False
+        self._tk_thread = threading.current_thread()   # Created by the app on the mainloop thread
+
+    def submit(self, fn, *args, on_success=None, on_error=None, owner=None, key=None, **kwargs):
+        """Queues fn(*args, **kwargs) on a worker thread. Must be called from the Tk thread."""
+        task = DbTask(key=key, owner=owner)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None: previous.cancel()
+            self._latest[key] = task
+
+        def run():
+            if task.cancelled():
+                task._finish(None, None)   # Release anyone waiting in result()
+                self._inbox.put((task, None, None))
+                return
+            try:
+                result, error = fn(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+            task._finish(result, error)
+            self._inbox.put((task, on_success, on_error))
+
+        self._pending += 1
+        future = self._workers.submit(run)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        self._ensure_polling()
+        return task
+
+    def post(self, callback, *args):
+        """
+        Thread-safe: schedules callback(*args) on the Tk thread (e.g. progress updates).
+
+        Worker threads must not call root.after(), so a post from one is picked up
+        by the poll that runs while submitted tasks are pending: post from inside
+        a submit()ted function. Anything posted otherwise waits for the next poll.
+        """
+        self._inbox.put((None, lambda _: callback(*args), None))
+        if threading.current_thread() is self._tk_thread:
+            self._ensure_polling()
+
+    def shutdown(self):
+        self._closed = True
+        if self._after_id is not None:
+            try: self.root.after_cancel(self._after_id)
+            except Exception: pass
+            self._after_id = None
+        for task in self._latest.values(): task.cancel()
+        # Same as shutdown(cancel_futures=True), which needs Python 3.9
+        for future in list(self._futures): future.cancel()
+        self._workers.shutdown(wait=False)
+
+    # --- Tk thread side ---
+    def _ensure_polling(self):
+        if self._after_id is None and not self._closed:
+            self._after_id = self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        self._after_id = None
+        while True:
+            try:
+                task, on_success, on_error = self._inbox.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                self._deliver(on_success, None)
+                continue
+
+            self._pending -= 1
+            if task.key is not None and self._latest.get(task.key) is task:
+                del self._latest[task.key]
+            if task.is_stale():
+                continue
+            if task._error is not None:
+                if on_error: self._deliver(on_error, task._error)
+                else: print(f"❌ Background Task Error: {task._error}")
+            elif on_success:
+                self._deliver(on_success, task._result)
+
+        # Keep polling while workers are busy (they may also post() progress)
+        if self._pending > 0:
+            self._ensure_polling()
+
+    @staticmethod
+    def _deliver(callback, value):
+        try:
+            callback(value)
+        except Exception as e:
+            print(f"❌ Background Callback Error: {e}")
@@ -0,0 +1,77 @@
+# utils/image_store.py
+"""
+Content-addressed store for profile pictures.
+
+An upload is read once, hashed, and saved under DATA_DIR/images/<hash>/ as a
+downscaled original plus circular PNG variants at the sizes the UI draws.
+users.profile_image then holds "store:<hash>" instead of the path the user
+picked, so rendering is a small local read and identical uploads share files.
+Older rows that still hold a plain path keep working (utils/avatars.py).
+"""
+import hashlib
+import os
+
+from PIL import Image, ImageDraw, ImageOps
+
+from utils.paths import data_path
+
+KEY_PREFIX = "store:"
+VARIANT_SIZES = (50, 120)   # Dashboard card, profile page
+ORIGINAL_MAX = 512          # Longest side kept of the uploaded picture (enough to make new sizes later)
+
+def is_store_key(value):
+    return bool(value) and value.startswith(KEY_PREFIX)
+
+def _image_dir(digest):
+    return data_path("images", digest[:2], digest, "")
+
+def _circle(img, size):
+    img = ImageOps.fit(img, (size, size), method=Image.Resampling.LANCZOS)
+    mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+    circular = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    circular.paste(img, (0, 0), mask)
+    return circular
+
+def _save_png(img, path):
+    # Write-then-rename so another kiosk never reads a half-written file
+    img.save(path + ".tmp", "PNG")
+    os.replace(path + ".tmp", path)
+
+def ingest(path):
+    """
+    Copies the picture at `path` into the store and renders its variants.
+    Returns the key to save in users.profile_image. Raises OSError/PIL errors on bad files.
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    folder = _image_dir(digest)
+    original = os.path.join(folder, "original.png")
+
+    # Same bytes uploaded before (by anyone): nothing to do
+    if not os.path.exists(original):
+        img = Image.open(path)
+        img.draft('RGB', (ORIGINAL_MAX, ORIGINAL_MAX))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((ORIGINAL_MAX, ORIGINAL_MAX), Image.Resampling.LANCZOS)
+        for size in VARIANT_SIZES:
+            _save_png(_circle(img, size), os.path.join(folder, f"circle_{size}.png"))
+        # Written last: its presence marks a complete entry
+        _save_png(img, original)
+    return KEY_PREFIX + digest
+
+def variant_path(key, size):
+    """Path of the circular PNG for `key` at `size` (rendered from the stored original if new), or None."""
+    digest = key[len(KEY_PREFIX):]
+    folder = _image_dir(digest)
+    path = os.path.join(folder, f"circle_{size}.png")
+    if os.path.exists(path):
+        return path
+    original = os.path.join(folder, "original.png")
+    if not os.path.exists(original):
+        return None
+    _save_png(_circle(Image.open(original), size), path)
+    return path
@@ -0,0 +1,64 @@
+# utils/logo.py
+"""
+Pre-rendered TrackLab logo.
+
+Each size the UI shows is rendered from tracklablogo.png once, saved as a PNG
+under CACHE_DIR, and from then on read directly by Tk. PIL is only imported
+when a variant is missing or the source logo changed, so a normal start does
+not pay for it.
+"""
+import os
+
+import tkinter as tk
+
+from utils.paths import PROJECT_ROOT, cache_path
+
+LOGO_PATH = os.path.join(PROJECT_ROOT, "utils", "tracklablogo.png")
+
+# Variant name -> bounding box (width, height); None leaves that side free
+VARIANTS = {
+    "nav": (None, 40),        # Navigation bar of the signed-in pages
+    "landing": (150, 150),    # Landing page
+}
+
+def _variant_path(name, source_mtime):
+    return cache_path("logo", f"{name}-{source_mtime}.png")
+
+def _fit(size, box):
+    width, height = size
+    scales = [limit / side for limit, side in zip(box, (width, height)) if limit]
+    scale = min(scales)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+def render_variant(name):
+    """Writes the cached PNG for a variant if it is missing; returns its path. Needs no Tk root."""
+    source_mtime = os.stat(LOGO_PATH).st_mtime_ns
+    path = _variant_path(name, source_mtime)
+    if not os.path.exists(path):
+        from PIL import Image
+        img = Image.open(LOGO_PATH)
+        img = img.resize(_fit(img.size, VARIANTS[name]), Image.Resampling.LANCZOS)
+        img.save(path + ".tmp", "PNG")
+        os.replace(path + ".tmp", path)
+    return path
+
+def prerender_logos():
+    """Renders every variant ahead of time (run by the setup script)."""
+    for name in VARIANTS:
+        render_variant(name)
+
+def logo_image(name):
+    """Tk image of a logo variant, or None if the logo file is missing or unreadable."""
+    try:
+        path = render_variant(name)
+        try:
+            return tk.PhotoImage(file=path)
+        except tk.TclError:
+            os.remove(path)   # Damaged cache file: render it again
+            return tk.PhotoImage(file=render_variant(name))
+    except FileNotFoundError:
+        print(f"❌ Error: Logo file not found. Expected path: {LOGO_PATH}. Using text fallback.")
+        return None
+    except Exception as e:
+        print(f"❌ Error loading logo image: {e}. Using text fallback.")
+        return None
@@ -0,0 +1,100 @@
+# utils/overdue_scheduler.py
+"""
+Flips borrows to Overdue the moment they fall due.
+
+The due times of all Ongoing borrows sit in a min-heap, and a single Tk timer
+sleeps until the earliest one. When it fires, the due entries are popped, one
+UPDATE persists the Ongoing -> Overdue transition (bumping the borrows data
+version), and the app pushes the change to the page on screen. Nothing is
+evaluated per row on every read any more: reads just look at the status.
+
+Borrows made or returned elsewhere reach the heap through a periodic check of
+the borrows data version; the heap is only reloaded when it moved.
+"""
+import heapq
+from datetime import datetime
+
+from database.borrow_db import get_due_borrows, mark_overdue
+from database.data_versions import BORROWS, get_data_version
+
+class OverdueScheduler:
+    """
+    root:       Tk widget whose after() drives the timer
+    executor:   DbExecutor running the queries
+    on_overdue: called with the number of borrows that just became overdue (Tk thread)
+    """
+    RESYNC_MS = 30000          # How often to look for borrows added or returned meanwhile
+    MAX_SLEEP_MS = 60 * 60 * 1000   # Re-check at least hourly (e.g. after the clock changed)
+
+    def __init__(self, root, executor, on_overdue):
+        self.root = root
+        self.executor = executor
+        self.on_overdue = on_overdue
+        self.heap = []              # (expected_return_date, borrow_id), earliest first
+        self.borrows_version = None   # Version the heap was loaded at
+        self.wake_job = None
+        self.resync_job = None
+        self.running = False
+
+    def start(self):
+        """Starts the scheduler, or checks for new borrows right away if it is running."""
+        self.running = True
+        self.resync()
+
+    def stop(self):
+        # A load or mark still in flight must not re-arm the timers when it lands
+        self.running = False
+        for job in (self.wake_job, self.resync_job):
+            if job is not None: self.root.after_cancel(job)
+        self.wake_job = self.resync_job = None
+        self.borrows_version = None
+
+    def resync(self):
+        """Reloads the heap if borrows changed since it was loaded (call after a local borrow to skip the wait)."""
+        if not self.running: return
+        if self.resync_job is not None: self.root.after_cancel(self.resync_job)
+        self.resync_job = self.root.after(self.RESYNC_MS, self.resync)
+        self.executor.submit(self.load, self.borrows_version, on_success=self.loaded,
+                             owner=self.root, key="overdue.resync")
+
+    @staticmethod
+    def load(seen_version):
+        """Runs on a worker thread. Returns (version, due list), or (version, None) when nothing changed."""
+        version = get_data_version(BORROWS)
+        if version is not None and version == seen_version:
+            return version, None
+        return version, get_due_borrows()
+
+    def loaded(self, result):
+        version, due = result
+        if not self.running or due is None: return
+        self.borrows_version = version
+        self.heap = list(due)
+        heapq.heapify(self.heap)
+        self.schedule()
+
+    def schedule(self):
+        """Sets the timer for the earliest due time (immediately if it already passed)."""
+        if not self.running: return
+        if self.wake_job is not None: self.root.after_cancel(self.wake_job)
+        self.wake_job = None
+        if not self.heap: return
+        delay = (self.heap[0][0] - datetime.now()).total_seconds()
+        # +1 ms so the wake-up is never a hair before the due time
+        self.wake_job = self.root.after(min(max(int(delay * 1000) + 1, 0), self.MAX_SLEEP_MS), self.wake)
+
+    def wake(self):
+        self.wake_job = None
+        if not self.running: return
+        now = datetime.now()
+        fell_due = False
+        while self.heap and self.heap[0][0] <= now:
+            heapq.heappop(self.heap)
+            fell_due = True
+        if fell_due:
+            self.executor.submit(mark_overdue, now, on_success=self.marked, owner=self.root, key="overdue.mark")
+        self.schedule()
+
+    def marked(self, changed):
+        if changed:
+            self.on_overdue(changed)
@@ -0,0 +1,23 @@
+# utils/paths.py
+import os
+
+# Project root (the folder holding main.py), independent of the working directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Data the app owns (e.g. the profile image store); back this up with the database
+DATA_DIR = os.environ.get("TRACKLAB_DATA_DIR", os.path.join(PROJECT_ROOT, "data"))
+
+# Generated files (thumbnails, pre-rendered images); safe to delete at any time
+CACHE_DIR = os.environ.get("TRACKLAB_CACHE_DIR", os.path.join(PROJECT_ROOT, ".cache"))
+
+def cache_path(*parts):
+    """Path inside CACHE_DIR; creates the parent folder on first use."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def data_path(*parts):
+    """Path inside DATA_DIR; creates the parent folder on first use."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
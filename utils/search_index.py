@@ -0,0 +1,77 @@
+# utils/search_index.py
+"""
+In-memory search over a snapshot of catalog rows, fast enough to run on every
+keystroke without touching the database.
+
+Each row's searchable text is indexed two ways:
+  - trigrams of the whole text, for terms of 3+ characters (substring match:
+    "ake" finds "Beaker"); the rarest trigram gives the candidates, which are
+    then checked with a plain substring test
+  - 1- and 2-character prefixes of every word, for shorter terms ("b" finds the
+    words starting with b, instead of nearly every row)
+Posting lists are compact arrays of row positions, so a 50,000-item catalog
+indexes in a fraction of a second on a worker thread.
+"""
+import re
+from array import array
+
+_WORD_RE = re.compile(r"\w+")
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class SearchIndex:
+    """
+    rows:   list of dicts, kept in the given order (results come back in that order)
+    fields: keys whose values are searched (e.g. name, code, category)
+    Terms in a query must all match (AND).
+    """
+
+    def __init__(self, rows, fields):
+        self.rows = rows
+        # Fields are separated by a newline so no trigram spans two fields
+        self.texts = ["\n".join(str(row.get(f) or "") for f in fields).lower() for row in rows]
+        self.trigrams = {}
+        self.prefixes = {}
+        for pos, text in enumerate(self.texts):
+            for gram in _trigrams(text):
+                self._post(self.trigrams, gram, pos)
+            words = _WORD_RE.findall(text)
+            for prefix in {w[:n] for w in words for n in (1, 2) if len(w) >= n}:
+                self._post(self.prefixes, prefix, pos)
+
+    @staticmethod
+    def _post(index, key, pos):
+        postings = index.get(key)
+        if postings is None:
+            index[key] = postings = array("I")
+        postings.append(pos)
+
+    def _candidates(self, term):
+        """Row positions that can match term (exact for short terms, to be verified for long ones)."""
+        if len(term) < 3:
+            return self.prefixes.get(term, ())
+        postings = [self.trigrams.get(gram) for gram in _trigrams(term)]
+        if any(p is None for p in postings):
+            return ()
+        return min(postings, key=len)
+
+    def search(self, query):
+        """Rows matching every whitespace-separated term of query, in catalog order."""
+        terms = query.lower().split()
+        if not terms:
+            return list(self.rows)
+
+        positions = None
+        # Longer terms are usually rarer, so they narrow the candidates first
+        for term in sorted(terms, key=len, reverse=True):
+            if len(term) < 3:
+                allowed = set(self._candidates(term))
+                matches = lambda pos: pos in allowed
+            else:
+                matches = lambda pos: term in self.texts[pos]
+            pool = self._candidates(term) if positions is None else positions
+            positions = [pos for pos in pool if matches(pos)]
+            if not positions:
+                return []
+        return [self.rows[pos] for pos in positions]
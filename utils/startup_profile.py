@@ -0,0 +1,51 @@
+# utils/startup_profile.py
+"""
+Opt-in cold start timing, enabled with TRACKLAB_STARTUP_PROFILE=1.
+
+Wrap each startup step in `with stage("..."):`. Once the landing page has been
+drawn, report_first_paint() prints every stage and the total time since this
+module was imported (main.py imports it first). Stages timed after that, such
+as a page module loaded on first navigation, are printed as they finish.
+Does nothing when disabled.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+ENABLED = os.environ.get("TRACKLAB_STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+
+_started = time.perf_counter()
+_stages = []        # (name, seconds) until the first paint
+_reported = False
+
+@contextmanager
+def stage(name):
+    if not ENABLED:
+        yield
+        return
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - began
+        if _reported:
+            print(f"⏱️ {name}: {elapsed * 1000:.1f} ms")
+        else:
+            _stages.append((name, elapsed))
+
+def report_first_paint(root):
+    """Prints the stage table after the window is mapped and its first redraw has run."""
+    if not ENABLED: return
+
+    def report():
+        global _reported
+        if _reported: return
+        _reported = True
+        total = time.perf_counter() - _started
+        print("⏱️ Startup profile")
+        for name, elapsed in _stages:
+            print(f"   {name:<32}{elapsed * 1000:9.1f} ms")
+        print(f"   {'first paint (total)':<32}{total * 1000:9.1f} ms")
+
+    # Redraws are idle callbacks queued when the window maps, so this runs right after them
+    root.bind("<Map>", lambda e: root.after_idle(report), add="+")